@@ -0,0 +1,154 @@
+"""
+Analysis Jobs - Interview assessments run in the background, one job per interview
+Jobs are queued when an interview completes (or on the recruiter's click), and every
+later request for the same interview returns the existing job or its stored result.
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+
+from database import db
+from deadline import run_db, run_db_write
+from config import ANALYSIS_WORKERS, ANALYSIS_JOBS_RETAINED
+
+
+class AnalysisJobManager:
+
+    def __init__(self, workers: int, retain: int):
+        self.worker_count = workers
+        self.retain = retain
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Oldest first; finished jobs beyond `retain` are dropped (completed ones are then
+        # answered from the database, failed ones resubmitted from the live session)
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conductors: Dict[str, Any] = {}
+        self._on_complete: Dict[str, Callable[[], None]] = {}
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, interview_id: str, conductor, on_complete: Callable[[], None] = None) -> Dict[str, Any]:
+        """Queue analysis unless it is already queued, running or done; failed jobs are retried"""
+        job = self.jobs.get(interview_id)
+        if job is not None and job["status"] != "failed":
+            return self.status(job)
+
+        now = datetime.utcnow().isoformat()
+        if job is None:
+            job = {
+                "interview_id": interview_id,
+                "status": "queued",
+                "attempts": 0,
+                "analysis": None,
+                "saved": False,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            }
+            self.jobs[interview_id] = job
+        else:
+            job.update(status="queued", error=None, updated_at=now)
+
+        self._conductors[interview_id] = conductor
+        if on_complete is not None:
+            self._on_complete[interview_id] = on_complete
+        self.queue.put_nowait(interview_id)
+        return self.status(job)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            interview_id = await self.queue.get()
+            job = self.jobs.get(interview_id)
+            try:
+                if job and job["status"] == "queued":
+                    await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Analysis for interview {interview_id} failed: {e}")
+                job.update(status="failed", error=str(e), updated_at=datetime.utcnow().isoformat())
+                # A retry resubmits with the session's conductor and callback
+                self._release(interview_id)
+                self._prune()
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, job: Dict[str, Any]):
+        interview_id = job["interview_id"]
+        job.update(status="running", attempts=job["attempts"] + 1, updated_at=datetime.utcnow().isoformat())
+
+        # A retry after a failed save reuses the analysis instead of paying for it again
+        if job["analysis"] is None:
+            job["analysis"] = await self._conductors[interview_id].analyze_interview()
+        if not job["saved"]:
+            await run_db_write(db.save_analysis, interview_id, job["analysis"])
+            job["saved"] = True
+
+        job.update(status="completed", updated_at=datetime.utcnow().isoformat())
+        on_complete = self._release(interview_id)
+        if on_complete is not None:
+            on_complete()
+        self._prune()
+
+    def _release(self, interview_id: str) -> Optional[Callable[[], None]]:
+        """Drop a finished job's conductor, handing back its completion callback"""
+        self._conductors.pop(interview_id, None)
+        return self._on_complete.pop(interview_id, None)
+
+    def _prune(self):
+        finished = [i for i, j in self.jobs.items() if j["status"] in ("completed", "failed")]
+        for old_id in finished[:max(0, len(self.jobs) - self.retain)]:
+            del self.jobs[old_id]
+
+    async def get(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, falling back to an analysis already stored for the interview"""
+        job = self.jobs.get(interview_id)
+        if job is not None:
+            return self.status(job)
+
+        analysis = await run_db(db.get_interview_analysis, interview_id)
+        if analysis is None:
+            return None
+        return {
+            "interview_id": interview_id,
+            "status": "completed",
+            "analysis": analysis,
+            "error": None,
+            "attempts": 0,
+            "created_at": analysis.get("created_at"),
+            "updated_at": analysis.get("created_at")
+        }
+
+    def status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "interview_id": job["interview_id"],
+            "status": job["status"],
+            "analysis": job["analysis"] if job["status"] == "completed" else None,
+            "error": job["error"],
+            "attempts": job["attempts"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"]
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self.queue.qsize(),
+            "jobs_by_status": by_status
+        }
+
+
+analysis_jobs = AnalysisJobManager(workers=ANALYSIS_WORKERS, retain=ANALYSIS_JOBS_RETAINED)
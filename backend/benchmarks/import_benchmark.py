@@ -0,0 +1,136 @@
+"""
+Import Benchmark - Wall-clock CSV import time, sequential vs concurrent categorization
+
+Providers are replaced by a local stub that sleeps for a fixed latency and the
+database by in-memory no-ops, so only the import pipeline itself is measured.
+
+Usage (from backend/):
+    python benchmarks/import_benchmark.py --rows 1000 --latency 0.2 --concurrency 16
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py refuses to load without these; nothing here talks to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import llm_gateway
+import migration_service
+from database import db
+from migration_service import MigrationService
+
+MAPPING = {
+    "Date": "expense_date",
+    "Description": "description",
+    "Amount": "amount",
+    "Vendor": "vendor"
+}
+
+
+class LatencyStub:
+    """Stands in for both provider SDK clients, answering after `latency` seconds"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.peak_in_flight = 0
+        self._in_flight = 0
+
+    async def _respond(self, text: str) -> str:
+        self.calls += 1
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._in_flight -= 1
+
+        if "CSV Columns" in text:
+            return json.dumps({"mapping": MAPPING, "confidence": 0.95, "warnings": []})
+        return json.dumps({"category": "Software & Tools", "confidence": 0.95, "reasoning": "stub"})
+
+    async def anthropic_create(self, **kwargs):
+        text = await self._respond(kwargs["messages"][-1]["content"])
+        usage = types.SimpleNamespace(input_tokens=50, output_tokens=20)
+        return types.SimpleNamespace(content=[types.SimpleNamespace(type="text", text=text)], usage=usage)
+
+    async def openai_create(self, **kwargs):
+        text = await self._respond(kwargs["messages"][-1]["content"])
+        usage = types.SimpleNamespace(total_tokens=70)
+        message = types.SimpleNamespace(content=text)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def install_stubs(stub: LatencyStub):
+    llm_gateway.anthropic_client.messages.create = stub.anthropic_create
+    llm_gateway.openai_client.chat.completions.create = stub.openai_create
+
+    db.get_column_mapping = lambda organization_id, signature: None
+    db.save_column_mapping = lambda data: None
+    db.get_expenses_on_dates = lambda organization_id, dates: []
+    db.create_expenses = lambda rows: rows
+
+
+def build_csv(rows: int) -> bytes:
+    lines = ["Date,Description,Amount,Vendor"]
+    for i in range(rows):
+        # Unique description/amount pairs so duplicate detection keeps every row
+        lines.append(f"01/{i % 28 + 1:02d}/2024,Subscription {i},{10 + i % 400}.{i % 100:02d},Vendor {i}")
+    return "\n".join(lines).encode("utf-8")
+
+
+async def run_import(data: bytes, concurrency: int) -> dict:
+    migration_service.IMPORT_CATEGORIZE_CONCURRENCY = concurrency
+    started = time.perf_counter()
+    result = await MigrationService.import_expenses(io.BytesIO(data), "benchmark-org")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected provider latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=migration_service.IMPORT_CATEGORIZE_CONCURRENCY)
+    parser.add_argument("--skip-sequential", action="store_true", help="Only time the concurrent run")
+    args = parser.parse_args()
+
+    stub = LatencyStub(args.latency)
+    install_stubs(stub)
+    data = build_csv(args.rows)
+
+    runs = [("concurrent", args.concurrency)]
+    if not args.skip_sequential:
+        runs.insert(0, ("sequential", 1))
+
+    timings = {}
+    for label, concurrency in runs:
+        stub.calls = stub.peak_in_flight = 0
+        result = await run_import(data, concurrency)
+        if not result["success"]:
+            print(f"{label}: import failed - {result['error']}")
+            return
+        timings[label] = result["seconds"]
+        print(
+            f"{label:>10}: {result['imported']}/{result['total']} rows in {result['seconds']:.2f}s "
+            f"(concurrency={concurrency}, provider calls={stub.calls}, peak in flight={stub.peak_in_flight}, "
+            f"errors={len(result['errors'])})"
+        )
+
+    if "sequential" in timings:
+        print(f"   speedup: {timings['sequential'] / timings['concurrent']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,208 @@
+"""
+Interview Load - How many concurrent interviews one worker can hold
+
+Simulates N candidates interviewing at once against a local LLM stub with
+log-normally distributed response times, then reports turn latency percentiles,
+event-loop lag and the memory held per live session. Sessions live in the same
+session store the API uses, so its history caps and eviction are what's measured.
+
+Usage (from backend/):
+    python benchmarks/interview_load.py --sessions 500 --turns 8 --latency 1.2 --think 3
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py refuses to load without these; nothing here talks to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import llm_gateway
+from llm_gateway import llm
+from interview_service import InterviewConductor
+from session_store import SessionStore
+
+POSITIONS = ["Senior Backend Engineer", "Product Designer", "Data Analyst", "Account Executive"]
+SCORE_UPDATE = json.dumps({
+    "overall_score": 72, "technical_score": 70, "communication_score": 78, "cultural_fit_score": 74,
+    "new_strengths": ["Concrete examples"], "new_weaknesses": [], "note": "Gave a specific, measurable result."
+})
+
+
+class InterviewStub:
+    """Anthropic messages.create/stream stand-in with log-normal latency around `latency`"""
+
+    def __init__(self, latency: float, haiku_latency: float, sigma: float, rng: random.Random):
+        self.latency = latency
+        self.haiku_latency = haiku_latency
+        self.sigma = sigma
+        self.rng = rng
+        self.calls = 0
+
+    async def _wait(self, model: str):
+        self.calls += 1
+        median = self.haiku_latency if "haiku" in model else self.latency
+        await asyncio.sleep(self.rng.lognormvariate(math.log(median), self.sigma))
+
+    def _text(self, kwargs) -> str:
+        prompt = kwargs["messages"][-1]["content"]
+        if "LATEST EXCHANGE" in prompt:
+            return SCORE_UPDATE
+        # Fresh strings per call, as a real client would return
+        if "running summary" in prompt:
+            return f"- Candidate described several projects with concrete results ({self.calls})\n" * 6
+        return f"Thanks, that's helpful ({self.calls}). Could you walk me through a time you had to make a hard trade-off?"
+
+    async def create(self, **kwargs):
+        await self._wait(kwargs["model"])
+        usage = types.SimpleNamespace(input_tokens=800, output_tokens=80)
+        return types.SimpleNamespace(content=[types.SimpleNamespace(type="text", text=self._text(kwargs))], usage=usage)
+
+
+def install_stub(stub: InterviewStub):
+    llm_gateway.anthropic_client.messages.create = stub.create
+    # Measure session capacity, not the configured provider limits
+    llm_gateway.LLM_MODEL_LIMITS = {}
+    llm_gateway.LLM_DEFAULT_LIMITS = {
+        "max_concurrency": 100000, "tokens_per_minute": 10 ** 12, "max_queue": 100000, "queue_timeout_seconds": 600
+    }
+    llm.limiters.clear()
+
+
+def deep_size(obj, seen: set) -> int:
+    """Bytes reachable from `obj`, counting each object once across calls that share `seen`"""
+    if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, asyncio.Future)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(obj, slot):
+                size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(p / 100 * len(ordered))) - 1)]
+
+
+async def monitor_loop_lag(interval: float, lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def candidate(index: int, args, store: SessionStore, rng: random.Random, latencies: list, done: asyncio.Event, finished: list):
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    interview_id = f"load-{index}"
+    conductor = InterviewConductor(position=rng.choice(POSITIONS), candidate_name=f"Candidate {index}")
+    store[interview_id] = conductor
+    await conductor.start_interview(f"Hi Candidate {index}, thanks for joining. Tell me about your background.")
+
+    answer = ("I led the migration of our billing service to an event-driven design, cut p99 latency by 40% "
+              "and mentored two engineers through it. ") * max(1, args.answer_chars // 120)
+    for turn in range(args.turns):
+        await asyncio.sleep(rng.expovariate(1 / args.think) if args.think > 0 else 0)
+        conductor = store.get(interview_id)
+        if conductor is None:
+            finished.append("evicted")
+            return
+        started = time.perf_counter()
+        await conductor.process_response(f"{answer}(answer {turn})")
+        latencies.append(time.perf_counter() - started)
+
+    finished.append("completed")
+    if len(finished) == args.sessions:
+        done.set()
+    # Held until every candidate is done so memory is measured at peak occupancy
+    await done.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=8, help="Candidate answers per interview")
+    parser.add_argument("--latency", type=float, default=1.2, help="Median interviewer (Sonnet) latency in seconds")
+    parser.add_argument("--haiku-latency", type=float, default=0.4, help="Median scoring/summary latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.35, help="Log-normal spread of stub latency")
+    parser.add_argument("--think", type=float, default=3.0, help="Mean candidate think time between turns")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which candidates arrive")
+    parser.add_argument("--answer-chars", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stub = InterviewStub(args.latency, args.haiku_latency, args.sigma, rng)
+    install_stub(stub)
+    store = SessionStore(max_sessions=max(args.sessions, 1), idle_seconds=3600)
+
+    latencies: list = []
+    lags: list = []
+    finished: list = []
+    done = asyncio.Event()
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(0.05, lags, stop))
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(candidate(i, args, store, random.Random(args.seed + i), latencies, done, finished))
+        for i in range(args.sessions)
+    ]
+    await done.wait()
+    wall = time.perf_counter() - started
+
+    stop.set()
+    await monitor
+
+    # Let trailing background summaries and score updates land before measuring
+    await asyncio.gather(*(conductor.scorer.settle() for conductor in store.values()))
+    await asyncio.gather(*(conductor.context.settle() for conductor in store.values()))
+    live = list(store.values())
+    held = deep_size(live, set()) - sys.getsizeof(live)
+    await asyncio.gather(*tasks)
+
+    turns = len(latencies)
+    print(f"sessions: {args.sessions} ({finished.count('completed')} completed, {finished.count('evicted')} evicted)")
+    print(f"   turns: {turns} in {wall:.1f}s ({turns / wall:.1f}/s), provider calls={stub.calls}")
+    print(
+        f" latency: p50={percentile(latencies, 50) * 1000:.0f}ms p99={percentile(latencies, 99) * 1000:.0f}ms "
+        f"max={max(latencies, default=0) * 1000:.0f}ms"
+    )
+    print(
+        f"loop lag: p50={percentile(lags, 50) * 1000:.1f}ms p99={percentile(lags, 99) * 1000:.1f}ms "
+        f"max={max(lags, default=0) * 1000:.1f}ms"
+    )
+    print(
+        f"  memory: {held / max(len(live), 1) / 1024:.1f} KiB per live session "
+        f"({held / 1024 / 1024:.1f} MiB for {len(live)}), peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB"
+    )
+    if lags:
+        print(f"          mean lag {statistics.mean(lags) * 1000:.2f}ms over {len(lags)} samples")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+Chat Sessions - Server-side conversation state for the assistant chat
+Clients send a conversation_id and only the new message; recent turns stay verbatim
+and older ones are folded into a short summary, so prompts carry a bounded context.
+"""
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from conversation_context import ConversationContext
+from session_store import SessionStore
+from config import (
+    CHAT_MAX_SESSIONS, CHAT_SESSION_TTL_SECONDS, CHAT_RECENT_TURNS, CHAT_FOLD_BATCH,
+    CHAT_CONTEXT_TOKEN_BUDGET, CHAT_SUMMARY_MAX_TOKENS, CHAT_MAX_VERBATIM_TURNS
+)
+
+CHAT_SUMMARY_FOCUS = (
+    "This is a user talking to a business assistant. Keep the user's requests, the "
+    "records that were created or looked up (amounts, vendors, project names) and any "
+    "open follow-ups."
+)
+# The dashboard labels assistant turns "ai"
+CHAT_ROLES = {"user": "user", "assistant": "assistant", "ai": "assistant"}
+
+
+class ChatSession:
+    __slots__ = ("conversation_id", "organization_id", "context")
+
+    def __init__(self, conversation_id: str, organization_id: str):
+        self.conversation_id = conversation_id
+        self.organization_id = organization_id
+        self.context = ConversationContext(
+            recent_turns=CHAT_RECENT_TURNS,
+            fold_batch=CHAT_FOLD_BATCH,
+            token_budget=CHAT_CONTEXT_TOKEN_BUDGET,
+            summary_max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+            summary_focus=CHAT_SUMMARY_FOCUS,
+            max_verbatim_turns=CHAT_MAX_VERBATIM_TURNS
+        )
+
+    def prompt_context(self) -> str:
+        """Summary plus the latest turns as plain text for intent prompts, or '' for a new chat"""
+        return self.context.transcript(self.context.token_budget)
+
+    def record(self, user_message: str, reply: str):
+        self.context.add("user", user_message)
+        self.context.add("assistant", reply)
+
+
+chat_sessions = SessionStore(
+    max_sessions=CHAT_MAX_SESSIONS,
+    idle_seconds=CHAT_SESSION_TTL_SECONDS,
+    label="chat"
+)
+
+
+def open_chat_session(
+    conversation_id: Optional[str],
+    organization_id: str,
+    seed_history: Optional[List[Dict]] = None
+) -> Tuple[ChatSession, bool]:
+    """
+    Session for `conversation_id`, or a new one when it's missing, expired or belongs to
+    another organization. A new session is seeded from `seed_history` for clients that
+    still send it. Returns (session, created).
+    """
+    session = chat_sessions.get(conversation_id) if conversation_id else None
+    if session is not None and session.organization_id == organization_id:
+        return session, False
+
+    session = ChatSession(str(uuid.uuid4()), organization_id)
+    for turn in seed_history or []:
+        role = CHAT_ROLES.get(turn.get("role"))
+        content = turn.get("content")
+        if role and isinstance(content, str) and content.strip():
+            session.context.add(role, content)
+    chat_sessions[session.conversation_id] = session
+    return session, True
@@ -0,0 +1,166 @@
+"""
+Circuit Breaker - Per-provider failure-rate and latency breaker with half-open probing
+"""
+from fastapi import HTTPException
+from collections import deque
+import math
+import time
+from typing import Dict, Any, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(HTTPException):
+    """Raised instead of calling a provider whose breaker is open - surfaces as 503"""
+
+    def __init__(self, provider: str, retry_after: int):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=503,
+            detail=f"AI provider {provider} is temporarily unavailable. Retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class CircuitBreaker:
+    """
+    Trips when the failure rate over the last `window_size` calls crosses the
+    threshold. Calls slower than their slow threshold count as failures; callers
+    pass one sized to the call, `slow_call_seconds` is the default.
+    After `open_seconds` a limited number of half-open probes decide whether to close.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int,
+        min_calls: int,
+        failure_rate_threshold: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        half_open_max_calls: int
+    ):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.outcomes = deque(maxlen=window_size)
+        self.half_open_in_flight = 0
+        self.ewma_latency: Optional[float] = None
+
+        self.total_successes = 0
+        self.total_failures = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def _cooldown_elapsed(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at >= self.open_seconds
+
+    def is_available(self) -> bool:
+        """Side-effect free check used by routers to skip open tiers"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self._cooldown_elapsed()
+        return self.half_open_in_flight < self.half_open_max_calls
+
+    def allow_request(self) -> bool:
+        """Reserve the right to call the provider; moves open -> half-open after the cooldown"""
+        if self.state == OPEN and self._cooldown_elapsed():
+            self.state = HALF_OPEN
+            self.half_open_in_flight = 0
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.half_open_in_flight < self.half_open_max_calls:
+            self.half_open_in_flight += 1
+            return True
+
+        self.short_circuited += 1
+        return False
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        remaining = self.open_seconds - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def _observe_latency(self, latency: float):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = 0.7 * self.ewma_latency + 0.3 * latency
+
+    def record_success(self, latency: float, slow_after: Optional[float] = None):
+        self._observe_latency(latency)
+
+        if latency > (slow_after if slow_after is not None else self.slow_call_seconds):
+            self._record(False)
+            return
+
+        self.total_successes += 1
+        if self.state == HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            self._close()
+            return
+        self.outcomes.append(True)
+
+    def record_failure(self, latency: float):
+        self._observe_latency(latency)
+        self._record(False)
+
+    def release(self):
+        """A reserved call ended without saying anything about provider health"""
+        if self.state == HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+
+    def _record(self, ok: bool):
+        self.total_failures += 1
+        if self.state == HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            self._open()
+            return
+
+        self.outcomes.append(ok)
+        if len(self.outcomes) >= self.min_calls and self.failure_rate() >= self.failure_rate_threshold:
+            self._open()
+
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def _open(self):
+        if self.state != OPEN:
+            self.times_opened += 1
+            print(f"⚡ Circuit breaker OPEN for {self.name}")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def _close(self):
+        print(f"✅ Circuit breaker CLOSED for {self.name}")
+        self.state = CLOSED
+        self.opened_at = None
+        self.outcomes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "window_calls": len(self.outcomes),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "retry_after_seconds": self.retry_after() if self.state == OPEN else None,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures
+        }
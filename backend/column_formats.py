@@ -0,0 +1,290 @@
+"""
+Column Formats - Infers date and amount formats once per CSV column, then transforms batches column-wise
+Each column gets one date format or one set of separators and currency symbols, chosen
+from a sample. Ambiguous cases (dd/mm vs mm/dd, 1,234 as thousands or decimal) are
+reported instead of being guessed row by row.
+"""
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+# Order is the tie-break preference when a sample fits several formats
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%m/%d/%y',
+    '%d/%m/%y',
+    '%d.%m.%Y',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+]
+
+CURRENCY_PATTERN = r"(?:US\$|USD|EUR|GBP|CAD|AUD|[$€£¥₹])"
+
+
+def _non_empty(values: List[Any]) -> pd.Series:
+    series = pd.Series([v for v in values if v is not None], dtype="string").str.strip()
+    return series[series.fillna("") != ""]
+
+
+def _day_month_order(fmt: str) -> Optional[str]:
+    """'day' or 'month' first for formats that can be misread by swapping them; None for year-first"""
+    if fmt.startswith('%Y'):
+        return None
+    return 'day' if fmt.index('%d') < fmt.index('%m') else 'month'
+
+
+def infer_date_format(values: List[Any]) -> Dict[str, Any]:
+    sample = _non_empty(values)
+    if sample.empty:
+        return {"format": DATE_FORMATS[0], "fallbacks": [], "ambiguous": False, "candidates": []}
+
+    parsed = {
+        fmt: pd.to_datetime(sample, format=fmt, errors="coerce")
+        for fmt in DATE_FORMATS
+    }
+    hits = {fmt: int(dates.notna().sum()) for fmt, dates in parsed.items()}
+    best = max(hits.values())
+    unparsed = int(pd.concat(parsed, axis=1).isna().all(axis=1).sum())
+    candidates = [fmt for fmt in DATE_FORMATS if hits[fmt] == best and best > 0]
+
+    if not candidates:
+        return {"format": DATE_FORMATS[0], "fallbacks": [], "ambiguous": False,
+                "candidates": [], "unparsed": unparsed}
+
+    chosen = candidates[0]
+    # A column reads day and month one way: fallbacks that swap them would be per-row guessing
+    order = _day_month_order(chosen)
+    fallbacks = []
+    for fmt in sorted((f for f in DATE_FORMATS if hits[f] > 0 and f != chosen), key=lambda f: -hits[f]):
+        fmt_order = _day_month_order(fmt)
+        if fmt_order is not None and order is not None and fmt_order != order:
+            continue
+        order = order or fmt_order
+        fallbacks.append(fmt)
+    rejected = [fmt for fmt in DATE_FORMATS if hits[fmt] > 0 and fmt != chosen and fmt not in fallbacks]
+
+    readable = parsed[chosen].notna()
+    fallback_rows = 0
+    for fmt in fallbacks:
+        fallback_rows += int((~readable & parsed[fmt].notna()).sum())
+        readable |= parsed[fmt].notna()
+    conflicting_rows = 0
+    for fmt in rejected:
+        conflicting_rows += int((~readable & parsed[fmt].notna()).sum())
+        readable |= parsed[fmt].notna()
+
+    # Formats that fit the whole sample equally well but read it as different dates
+    conflicting = [
+        fmt for fmt in candidates[1:]
+        if not parsed[fmt].equals(parsed[chosen])
+    ]
+    all_same_day_month = len(candidates) > 1 and not conflicting
+
+    return {
+        "format": chosen,
+        "fallbacks": fallbacks,
+        "ambiguous": bool(conflicting) or all_same_day_month,
+        "candidates": candidates,
+        "unparsed": unparsed,
+        "fallback_rows": fallback_rows,
+        "rejected": rejected,
+        "conflicting_rows": conflicting_rows
+    }
+
+
+def infer_amount_format(values: List[Any]) -> Dict[str, Any]:
+    sample = _non_empty(values)
+    stripped = (
+        sample.str.replace(CURRENCY_PATTERN, "", regex=True)
+        .str.replace(r"[\s()+-]", "", regex=True)
+    )
+    symbols = sorted(set(sample.str.findall(CURRENCY_PATTERN).explode().dropna()))
+
+    has_comma = stripped.str.contains(",", regex=False)
+    has_dot = stripped.str.contains(".", regex=False)
+    both = stripped[has_comma & has_dot]
+    ambiguous = False
+    examples: List[str] = []
+
+    if not both.empty:
+        # "1.234,56" vs "1,234.56": whichever separator comes last is the decimal point
+        comma_last = both.str.rfind(",") > both.str.rfind(".")
+        decimal, thousands = (",", ".") if comma_last.mean() > 0.5 else (".", ",")
+        # Rows disagreeing on which separator is last: the column mixes both conventions
+        if comma_last.any() and not comma_last.all():
+            ambiguous = True
+            examples = [both[comma_last].iloc[0], both[~comma_last].iloc[0]]
+    elif has_comma.any():
+        comma_only = stripped[has_comma]
+        grouped = comma_only.str.fullmatch(r"\d{1,3}(,\d{3})+")
+        if grouped.all():
+            decimal, thousands = ".", ","
+            # "1,234,567" can only be grouped; a lone "1,234" could be either
+            ambiguous = not has_dot.any() and bool((comma_only.str.count(",") == 1).all())
+            examples = [comma_only.iloc[0]] if ambiguous else []
+        else:
+            decimal, thousands = ",", "."
+            # "1,234" next to "12,50": a thousands group beside a decimal comma, and
+            # nothing in the sample says which reading the grouped values use
+            if grouped.any():
+                ambiguous = True
+                examples = [comma_only[grouped].iloc[0], comma_only[~grouped].iloc[0]]
+    elif stripped.str.fullmatch(r"\d{1,3}(\.\d{3}){2,}").any():
+        decimal, thousands = ",", "."
+    else:
+        decimal, thousands = ".", ","
+
+    return {
+        "decimal": decimal,
+        "thousands": thousands,
+        "currency_symbols": symbols,
+        "negative_parentheses": bool(sample.str.fullmatch(r"\(.*\)").any()),
+        "ambiguous": ambiguous,
+        "examples": examples
+    }
+
+
+def infer_formats(sample_rows: List[Dict[str, Any]], mapping: Dict[str, str]) -> Dict[str, Any]:
+    """Per-column format spec for the date and amount columns of `mapping`"""
+    formats = {}
+    warnings = []
+
+    for csv_col, target_field in mapping.items():
+        values = [row.get(csv_col) for row in sample_rows]
+
+        if target_field == 'expense_date':
+            spec = infer_date_format(values)
+            formats[csv_col] = {"type": "date", **spec}
+            if spec["ambiguous"]:
+                warnings.append({
+                    "column": csv_col,
+                    "issue": "ambiguous_date_format",
+                    "candidates": spec["candidates"],
+                    "chosen": spec["format"],
+                    "message": f"Dates in '{csv_col}' fit {', '.join(spec['candidates'])}; using {spec['format']}"
+                })
+            if spec.get("unparsed"):
+                warnings.append({
+                    "column": csv_col,
+                    "issue": "unparsed_dates",
+                    "count": spec["unparsed"],
+                    "message": f"{spec['unparsed']} sampled dates in '{csv_col}' match no known format"
+                })
+            if spec.get("fallback_rows"):
+                warnings.append({
+                    "column": csv_col,
+                    "issue": "mixed_date_formats",
+                    "count": spec["fallback_rows"],
+                    "fallbacks": spec["fallbacks"],
+                    "message": (
+                        f"{spec['fallback_rows']} sampled dates in '{csv_col}' don't match {spec['format']} "
+                        f"and are read as {', '.join(spec['fallbacks'])}"
+                    )
+                })
+            if spec.get("conflicting_rows"):
+                warnings.append({
+                    "column": csv_col,
+                    "issue": "conflicting_date_formats",
+                    "count": spec["conflicting_rows"],
+                    "rejected": spec["rejected"],
+                    "message": (
+                        f"{spec['conflicting_rows']} sampled dates in '{csv_col}' only fit "
+                        f"{', '.join(spec['rejected'])}, which swaps day and month against {spec['format']}; "
+                        f"they won't be parsed"
+                    )
+                })
+
+        elif target_field == 'amount':
+            spec = infer_amount_format(values)
+            formats[csv_col] = {"type": "amount", **spec}
+            if spec["ambiguous"]:
+                warnings.append({
+                    "column": csv_col,
+                    "issue": "ambiguous_amount_separator",
+                    "candidates": [{"decimal": ".", "thousands": ","}, {"decimal": ",", "thousands": "."}],
+                    "chosen": {"decimal": spec["decimal"], "thousands": spec["thousands"]},
+                    "examples": spec["examples"],
+                    "message": (
+                        f"Amounts in '{csv_col}' ({', '.join(spec['examples'])}) read differently with ',' "
+                        f"or '.' as the decimal separator; using '{spec['decimal']}' - check the preview"
+                    )
+                })
+
+    return {"columns": formats, "warnings": warnings}
+
+
+def _parse_dates(values: pd.Series, spec: Dict[str, Any]) -> List[Optional[str]]:
+    dates = pd.to_datetime(values, format=spec["format"], errors="coerce")
+    for fmt in spec.get("fallbacks", []):
+        missing = dates.isna() & values.notna()
+        if not missing.any():
+            break
+        dates = dates.fillna(pd.to_datetime(values.where(missing), format=fmt, errors="coerce"))
+    return [None if pd.isna(d) else d for d in dates.dt.strftime('%Y-%m-%d').tolist()]
+
+
+def _parse_amounts(values: pd.Series, spec: Dict[str, Any]) -> List[Optional[float]]:
+    text = values
+    if spec.get("currency_symbols"):
+        text = text.str.replace(CURRENCY_PATTERN, "", regex=True).str.strip()
+    negative = None
+    if spec.get("negative_parentheses"):
+        negative = text.str.startswith("(").fillna(False).to_numpy(dtype=bool)
+        text = text.str.strip("()")
+    text = text.str.replace(spec["thousands"], "", regex=False)
+    if spec["decimal"] != ".":
+        text = text.str.replace(spec["decimal"], ".", regex=False)
+
+    amounts = pd.to_numeric(text, errors="coerce").fillna(0.0).to_numpy(dtype=float, copy=True)
+    if negative is not None:
+        amounts[negative] = -amounts[negative]
+    # Empty cells stay unset, unparseable ones become 0 like before
+    return [None if value is None else amount for value, amount in zip(values.tolist(), amounts.tolist())]
+
+
+def transform_batch(
+    rows: List[Dict[str, Any]],
+    mapping: Dict[str, str],
+    formats: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Map and convert a batch of raw CSV rows to expense fields, one column at a time"""
+    if not rows:
+        return []
+
+    column_specs = formats.get("columns", {})
+    fields: Dict[str, List[Any]] = {}
+
+    for csv_col, target_field in mapping.items():
+        values = [(row.get(csv_col) or "").strip() or None for row in rows]
+
+        if target_field == 'expense_date':
+            spec = column_specs.get(csv_col) or infer_date_format(values)
+            values = _parse_dates(pd.Series(values, dtype=object), spec)
+        elif target_field == 'amount':
+            spec = column_specs.get(csv_col) or infer_amount_format(values)
+            values = _parse_amounts(pd.Series(values, dtype=object), spec)
+
+        # Later columns mapped onto the same field win where they have a value
+        previous = fields.get(target_field)
+        if previous is not None:
+            values = [new if new is not None else old for new, old in zip(values, previous)]
+        fields[target_field] = values
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    defaults = {'description': 'Unknown Expense', 'amount': 0, 'expense_date': today}
+    names = list(fields.keys())
+    columns = list(fields.values())
+
+    transformed = []
+    for values in zip(*columns):
+        record = {name: value for name, value in zip(names, values) if value is not None}
+        for field, default in defaults.items():
+            record.setdefault(field, default)
+        transformed.append(record)
+    return transformed
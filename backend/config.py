@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +21,143 @@ API_DESCRIPTION = "AI orchestration for AI-native ERP"
 
 MAX_INTERVIEW_QUESTIONS = 8
 
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "30"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+HEALTH_STALE_AFTER_SECONDS = float(os.getenv("HEALTH_STALE_AFTER_SECONDS", "90"))
+
+# Admission control shared by every LLM caller (see llm_gateway.py)
+LLM_DEFAULT_LIMITS = {
+    "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    "tokens_per_minute": int(os.getenv("LLM_TOKENS_PER_MINUTE", "100000")),
+    "max_queue": int(os.getenv("LLM_MAX_QUEUE", "32")),
+    "queue_timeout_seconds": float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+}
+
+LLM_MODEL_LIMITS = {
+    "claude-sonnet-4-5-20250929": {"max_concurrency": 8, "tokens_per_minute": 80000, "max_queue": 32},
+    "claude-3-5-haiku-20241022": {"max_concurrency": 16, "tokens_per_minute": 100000, "max_queue": 64},
+    "gpt-3.5-turbo": {"max_concurrency": 16, "tokens_per_minute": 160000, "max_queue": 64}
+}
+
+# e.g. LLM_MODEL_LIMITS='{"gpt-3.5-turbo": {"max_concurrency": 4}}'
+for _model, _limits in json.loads(os.getenv("LLM_MODEL_LIMITS", "{}")).items():
+    LLM_MODEL_LIMITS.setdefault(_model, {}).update(_limits)
+
+# Per-provider circuit breakers (see circuit_breaker.py)
+CIRCUIT_BREAKER_SETTINGS = {
+    "window_size": int(os.getenv("CIRCUIT_WINDOW_SIZE", "20")),
+    "min_calls": int(os.getenv("CIRCUIT_MIN_CALLS", "5")),
+    "failure_rate_threshold": float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+    "slow_call_seconds": float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "10")),
+    "open_seconds": float(os.getenv("CIRCUIT_OPEN_SECONDS", "30")),
+    "half_open_max_calls": int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+}
+
+# Output throughput assumed when judging a call slow: a call counts as slow past
+# slow_call_seconds + max_tokens / tokens-per-second; streams are judged on their first token
+LLM_SLOW_CALL_TOKENS_PER_SECOND = {
+    "claude-sonnet-4-5-20250929": 25,
+    "claude-3-5-haiku-20241022": 50,
+    "gpt-3.5-turbo": 50
+}
+LLM_DEFAULT_SLOW_CALL_TOKENS_PER_SECOND = float(os.getenv("LLM_DEFAULT_SLOW_CALL_TOKENS_PER_SECOND", "25"))
+
+TIER_ROUTING_EXPLORE_RATE = float(os.getenv("TIER_ROUTING_EXPLORE_RATE", "0.05"))
+
+# Request deadlines (see deadline.py)
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "30"))
+AI_CHAT_DEADLINE_SECONDS = float(os.getenv("AI_CHAT_DEADLINE_SECONDS", "25"))
+EXPENSE_CREATE_DEADLINE_SECONDS = float(os.getenv("EXPENSE_CREATE_DEADLINE_SECONDS", "20"))
+DEADLINE_DB_RESERVE_SECONDS = float(os.getenv("DEADLINE_DB_RESERVE_SECONDS", "1.5"))
+TIER2_CHECK_MIN_BUDGET_SECONDS = float(os.getenv("TIER2_CHECK_MIN_BUDGET_SECONDS", "3"))
+TIER3_MIN_BUDGET_SECONDS = float(os.getenv("TIER3_MIN_BUDGET_SECONDS", "8"))
+
+# Chat command interpretation (see orchestrator.py)
+FUSED_CATEGORY_MIN_CONFIDENCE = float(os.getenv("FUSED_CATEGORY_MIN_CONFIDENCE", "0.8"))
+MULTI_EXPENSE_MAX_ITEMS = int(os.getenv("MULTI_EXPENSE_MAX_ITEMS", "25"))
+MULTI_EXPENSE_CONCURRENCY = int(os.getenv("MULTI_EXPENSE_CONCURRENCY", "8"))
+
+# Per-step model escalation for the orchestrator (see model_routing.py): models are tried
+# in order, moving on when output fails validation or confidence is below min_confidence
+ORCHESTRATOR_MODEL_POLICY = {
+    "interpret": {"models": ["claude-3-5-haiku-20241022", "claude-sonnet-4-5-20250929"], "min_confidence": 0.75},
+    "classify": {"models": ["claude-3-5-haiku-20241022", "claude-sonnet-4-5-20250929"], "min_confidence": 0.75},
+    "extract": {"models": ["claude-3-5-haiku-20241022", "claude-sonnet-4-5-20250929"], "min_confidence": 0.8},
+    "general": {"models": ["claude-3-5-haiku-20241022", "claude-sonnet-4-5-20250929"], "min_confidence": None}
+}
+
+# e.g. ORCHESTRATOR_MODEL_POLICY='{"extract": {"models": ["claude-sonnet-4-5-20250929"]}}'
+for _step, _policy in json.loads(os.getenv("ORCHESTRATOR_MODEL_POLICY", "{}")).items():
+    ORCHESTRATOR_MODEL_POLICY.setdefault(_step, {"models": [], "min_confidence": None}).update(_policy)
+
+# Assistant chat sessions (see chat_sessions.py)
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "5000"))
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "4"))
+CHAT_FOLD_BATCH = int(os.getenv("CHAT_FOLD_BATCH", "4"))
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "800"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "250"))
+CHAT_MAX_VERBATIM_TURNS = int(os.getenv("CHAT_MAX_VERBATIM_TURNS", "16"))
+
+# Streaming CSV import (see migration_service.py)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "200"))
+IMPORT_QUEUE_DEPTH = int(os.getenv("IMPORT_QUEUE_DEPTH", "4"))
+MAPPING_CACHE_MIN_CONFIDENCE = float(os.getenv("MAPPING_CACHE_MIN_CONFIDENCE", "0.85"))
+FORMAT_SAMPLE_ROWS = int(os.getenv("FORMAT_SAMPLE_ROWS", "200"))
+ROW_COUNT_SCAN_MAX_BYTES = int(os.getenv("ROW_COUNT_SCAN_MAX_BYTES", str(256 * 1024 * 1024)))
+NEAR_DUPLICATE_DAYS = int(os.getenv("NEAR_DUPLICATE_DAYS", "1"))
+DUPLICATE_REPORT_LIMIT = int(os.getenv("DUPLICATE_REPORT_LIMIT", "50"))
+IMPORT_CATEGORIZE_CONCURRENCY = int(os.getenv("IMPORT_CATEGORIZE_CONCURRENCY", "16"))
+IMPORT_ADMISSION_RETRIES = int(os.getenv("IMPORT_ADMISSION_RETRIES", "3"))
+IMPORT_ERROR_REPORT_LIMIT = int(os.getenv("IMPORT_ERROR_REPORT_LIMIT", "50"))
+
+# Interview context bounds (see conversation_context.py)
+INTERVIEW_RECENT_TURNS = int(os.getenv("INTERVIEW_RECENT_TURNS", "6"))
+INTERVIEW_FOLD_BATCH = int(os.getenv("INTERVIEW_FOLD_BATCH", "4"))
+INTERVIEW_CONTEXT_TOKEN_BUDGET = int(os.getenv("INTERVIEW_CONTEXT_TOKEN_BUDGET", "3000"))
+INTERVIEW_SUMMARY_MAX_TOKENS = int(os.getenv("INTERVIEW_SUMMARY_MAX_TOKENS", "500"))
+INTERVIEW_ANALYSIS_TOKEN_BUDGET = int(os.getenv("INTERVIEW_ANALYSIS_TOKEN_BUDGET", "6000"))
+INTERVIEW_MAX_VERBATIM_TURNS = int(os.getenv("INTERVIEW_MAX_VERBATIM_TURNS", "20"))
+
+# Live interview sessions per worker (see session_store.py)
+INTERVIEW_MAX_SESSIONS = int(os.getenv("INTERVIEW_MAX_SESSIONS", "2000"))
+INTERVIEW_SESSION_IDLE_SECONDS = float(os.getenv("INTERVIEW_SESSION_IDLE_SECONDS", "3600"))
+
+# Per-turn candidate scoring (see interview_scoring.py)
+SCORING_MAX_NOTES = int(os.getenv("SCORING_MAX_NOTES", "12"))
+
+# WebSocket interview channel (see interview_channel.py, transcript_writer.py)
+INTERVIEW_WS_HEARTBEAT_SECONDS = float(os.getenv("INTERVIEW_WS_HEARTBEAT_SECONDS", "20"))
+INTERVIEW_WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("INTERVIEW_WS_IDLE_TIMEOUT_SECONDS", "90"))
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", "1.0"))
+TRANSCRIPT_FLUSH_ROWS = int(os.getenv("TRANSCRIPT_FLUSH_ROWS", "100"))
+TRANSCRIPT_MAX_RETRIES = int(os.getenv("TRANSCRIPT_MAX_RETRIES", "5"))
+TRANSCRIPT_MAX_BUFFER_ROWS = int(os.getenv("TRANSCRIPT_MAX_BUFFER_ROWS", "5000"))
+TRANSCRIPT_DEAD_LETTER_PATH = os.getenv("TRANSCRIPT_DEAD_LETTER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcript_dead_letter.jsonl"))
+
+# Bump when the analysis rubric changes; bulk re-analysis rewrites older versions
+INTERVIEW_RUBRIC_VERSION = os.getenv("INTERVIEW_RUBRIC_VERSION", "1")
+
+# Bulk re-analysis of stored interviews (see reanalysis.py)
+REANALYSIS_CONCURRENCY = int(os.getenv("REANALYSIS_CONCURRENCY", "8"))
+REANALYSIS_PAGE_SIZE = int(os.getenv("REANALYSIS_PAGE_SIZE", "100"))
+REANALYSIS_UPSERT_BATCH = int(os.getenv("REANALYSIS_UPSERT_BATCH", "25"))
+REANALYSIS_ADMISSION_RETRIES = int(os.getenv("REANALYSIS_ADMISSION_RETRIES", "5"))
+REANALYSIS_ERROR_REPORT_LIMIT = int(os.getenv("REANALYSIS_ERROR_REPORT_LIMIT", "50"))
+
+# Background interview analysis (see analysis_jobs.py)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+ANALYSIS_JOBS_RETAINED = int(os.getenv("ANALYSIS_JOBS_RETAINED", "1000"))
+
+# Pre-generated interview openers (see opener_pool.py)
+OPENER_POOL_SIZE = int(os.getenv("OPENER_POOL_SIZE", "6"))
+OPENER_POOL_REFILL_AT = int(os.getenv("OPENER_POOL_REFILL_AT", "2"))
+OPENER_POOL_MAX_KEYS = int(os.getenv("OPENER_POOL_MAX_KEYS", "500"))
+
+# Background import jobs (see import_jobs.py)
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_uploads"))
+
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Missing SUPABASE_URL or SUPABASE_KEY in environment")
 
@@ -0,0 +1,169 @@
+"""
+Conversation Context - Bounded LLM context for long conversations
+The last few turns stay verbatim; older turns are folded into a rolling summary by a
+cheap model in the background, and every prompt is trimmed to a hard token budget.
+"""
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+
+from llm_gateway import llm
+
+SUMMARY_MODEL = "claude-3-5-haiku-20241022"
+DEFAULT_SPEAKER_LABELS = {"assistant": "Assistant", "user": "User"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    # One per live conversation, so no per-instance __dict__
+    __slots__ = (
+        "recent_turns", "fold_batch", "token_budget", "summary_max_tokens", "summary_focus",
+        "speaker_labels", "max_verbatim_turns", "summary", "recent", "turn_count",
+        "folded_turns", "dropped_turns", "_fold_task"
+    )
+
+    def __init__(
+        self,
+        recent_turns: int,
+        fold_batch: int,
+        token_budget: int,
+        summary_max_tokens: int,
+        summary_focus: str = "",
+        speaker_labels: Optional[Dict[str, str]] = None,
+        max_verbatim_turns: Optional[int] = None
+    ):
+        self.recent_turns = recent_turns
+        self.fold_batch = fold_batch
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_focus = summary_focus
+        self.speaker_labels = speaker_labels or DEFAULT_SPEAKER_LABELS
+        # Hard cap for when folds keep failing; the oldest verbatim turns are dropped past it
+        self.max_verbatim_turns = max_verbatim_turns or (recent_turns + fold_batch) * 2
+        self.summary = ""
+        # (role, content) pairs; API-shaped dicts are only built per request
+        self.recent: List[Tuple[str, str]] = []
+        self.turn_count = 0
+        self.folded_turns = 0
+        self.dropped_turns = 0
+        self._fold_task: Optional[asyncio.Task] = None
+
+    def add(self, role: str, content: str):
+        self.recent.append((role, content))
+        self.turn_count += 1
+        if self._fold_task is None:
+            overflow = len(self.recent) - self.max_verbatim_turns
+            if overflow > 0:
+                del self.recent[:overflow]
+                self.dropped_turns += overflow
+            if len(self.recent) >= self.recent_turns + self.fold_batch:
+                self._fold_task = asyncio.create_task(self._fold(self.fold_batch))
+
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        """Verbatim turns as role/content dicts"""
+        return [{"role": role, "content": content} for role, content in self.recent]
+
+    def format_turns(self, turns: List[Tuple[str, str]]) -> str:
+        return "\n\n".join(
+            f"{self.speaker_labels.get(role, role)}: {content}"
+            for role, content in turns
+        )
+
+    async def _fold(self, count: int):
+        """Merge the oldest `count` verbatim turns into the summary; they stay in `recent` until it lands"""
+        turns = self.recent[:count]
+        prompt = f"""Update the running summary of a conversation with the new turns below.
+
+{self.summary_focus}
+
+CURRENT SUMMARY:
+{self.summary or "(none yet)"}
+
+NEW TURNS:
+{self.format_turns(turns)}
+
+Return only the updated summary as concise bullet points. Keep concrete facts, names,
+numbers and examples; drop pleasantries."""
+
+        try:
+            response = await llm.create_message(
+                model=SUMMARY_MODEL,
+                max_tokens=self.summary_max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                coalesce=False
+            )
+            self.summary = response.content[0].text.strip()
+            del self.recent[:count]
+            self.folded_turns += count
+        except Exception as e:
+            # Turns stay verbatim; the token budget still bounds the prompt
+            print(f"⚠️ Conversation summary update failed: {e}")
+        finally:
+            self._fold_task = None
+
+    async def settle(self):
+        """Wait for an in-flight fold so the summary covers everything it can"""
+        if self._fold_task is not None:
+            await asyncio.shield(self._fold_task)
+
+    def _summary_message(self) -> Optional[Dict[str, str]]:
+        if not self.summary:
+            return None
+        return {"role": "user", "content": f"Summary of the conversation so far:\n{self.summary}"}
+
+    def messages(self, reserve_tokens: int = 0) -> List[Dict[str, str]]:
+        """
+        Summary plus as many of the latest turns as fit in the token budget, minus
+        `reserve_tokens` for the system prompt and any trailing instruction.
+        """
+        budget = self.token_budget - reserve_tokens
+        summary = self._summary_message()
+        if summary is not None:
+            budget -= estimate_tokens(summary["content"])
+
+        kept: List[Dict[str, str]] = []
+        for role, content in reversed(self.recent):
+            cost = estimate_tokens(content)
+            if cost > budget:
+                if not kept and budget > 0:
+                    # A single oversized turn: keep its tail rather than nothing
+                    kept.append({"role": role, "content": content[-budget * 4:]})
+                break
+            kept.append({"role": role, "content": content})
+            budget -= cost
+        kept.reverse()
+
+        # Adjacent same-role turns (summary then a candidate turn) are merged by the API
+        return ([summary] if summary is not None else []) + kept
+
+    def transcript(self, token_budget: int) -> str:
+        """Summary plus verbatim recent turns as plain text, within `token_budget`"""
+        parts = []
+        if self.summary:
+            parts.append(f"SUMMARY OF EARLIER CONVERSATION:\n{self.summary}")
+            token_budget -= estimate_tokens(parts[0])
+
+        recent: List[str] = []
+        for turn in reversed(self.recent):
+            line = self.format_turns([turn])
+            cost = estimate_tokens(line)
+            if cost > token_budget:
+                break
+            recent.append(line)
+            token_budget -= cost
+        if recent:
+            parts.append("RECENT TRANSCRIPT:\n" + "\n\n".join(reversed(recent)))
+        return "\n\n".join(parts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turn_count,
+            "verbatim_turns": len(self.recent),
+            "folded_turns": self.folded_turns,
+            "dropped_turns": self.dropped_turns,
+            "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+            "folding": self._fold_task is not None
+        }
@@ -1,11 +1,19 @@
 from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY
-from typing import List, Dict, Any, Optional
+from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY, INTERVIEW_RUBRIC_VERSION
+from typing import List, Dict, Any, Optional, Tuple
+from single_flight import normalize_text
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
+RANKING_SCORES = ("overall_score", "technical_score", "communication_score", "cultural_fit_score")
+# At or below PostgREST's default max-rows, so a short page means the end
+TRANSCRIPT_PAGE_ROWS = 1000
+# Analysis rows whose ranking update failed, retried with the next save (interview_id -> row)
+_unindexed_rankings: Dict[str, Dict[str, Any]] = {}
+UNINDEXED_RANKINGS_LIMIT = 1000
+
 
 class DatabaseService:
 
@@ -32,10 +40,16 @@ class DatabaseService:
         }).execute()
 
     @staticmethod
-    def save_analysis(interview_id: str, analysis: Dict[str, Any]):
-        """Save interview analysis"""
-        analysis_data = {
+    def save_transcripts(rows: List[Dict[str, Any]]):
+        """Insert many transcript rows (interview_id, speaker, message, timestamp) at once"""
+        if rows:
+            supabase.table("interview_transcripts").insert(rows).execute()
+
+    @staticmethod
+    def _analysis_row(interview_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "interview_id": interview_id,
+            "rubric_version": INTERVIEW_RUBRIC_VERSION,
             "overall_score": max(1, analysis.get("overall_score", 1)),
             "technical_score": max(1, analysis.get("technical_score", 1)),
             "communication_score": max(1, analysis.get("communication_score", 1)),
@@ -46,7 +60,185 @@ class DatabaseService:
             "recommendation": analysis.get("recommendation"),
             "detailed_analysis": analysis.get("detailed_analysis")
         }
-        supabase.table("interview_analysis").insert(analysis_data).execute()
+
+    @staticmethod
+    def save_analysis(interview_id: str, analysis: Dict[str, Any]):
+        """Save interview analysis, replacing any earlier one for the interview"""
+        row = DatabaseService._analysis_row(interview_id, analysis)
+        supabase.table("interview_analysis").upsert(row, on_conflict="interview_id").execute()
+        DatabaseService._try_index_rankings([row])
+
+    @staticmethod
+    def upsert_analyses(analyses: Dict[str, Dict[str, Any]]):
+        """Save many analyses (interview_id -> analysis) in one request"""
+        if not analyses:
+            return
+        rows = [DatabaseService._analysis_row(interview_id, analysis) for interview_id, analysis in analyses.items()]
+        supabase.table("interview_analysis").upsert(rows, on_conflict="interview_id").execute()
+        DatabaseService._try_index_rankings(rows)
+
+    @staticmethod
+    def position_key(position: str) -> str:
+        return normalize_text(position or "").lower()
+
+    @staticmethod
+    def _index_rankings(analysis_rows: List[Dict[str, Any]]):
+        """
+        Keep candidate_rankings (interview_analysis scores joined to the interview's
+        organization and position) in step with saved analyses.
+        """
+        if not analysis_rows:
+            return
+        interviews = supabase.table("interviews")\
+            .select("id, organization_id, position, candidate_name, interview_date")\
+            .in_("id", [row["interview_id"] for row in analysis_rows])\
+            .execute()
+        by_id = {interview["id"]: interview for interview in interviews.data}
+
+        rankings = []
+        for row in analysis_rows:
+            interview = by_id.get(row["interview_id"])
+            if interview is None:
+                continue
+            rankings.append({
+                "interview_id": row["interview_id"],
+                "organization_id": interview["organization_id"],
+                "position": interview["position"],
+                "position_key": DatabaseService.position_key(interview["position"]),
+                "candidate_name": interview["candidate_name"],
+                "interview_date": interview.get("interview_date"),
+                "recommendation": row["recommendation"],
+                "rubric_version": row["rubric_version"],
+                **{score: row[score] for score in RANKING_SCORES}
+            })
+        if rankings:
+            supabase.table("candidate_rankings").upsert(rankings, on_conflict="interview_id").execute()
+
+    @staticmethod
+    def _try_index_rankings(analysis_rows: List[Dict[str, Any]]):
+        """
+        Best-effort ranking update after an analysis is saved: the analysis is the record,
+        the index is derived. Failed rows are retried with the next save; past the limit
+        the oldest are dropped and need POST /api/interviews/rankings/rebuild.
+        """
+        for row in analysis_rows:
+            _unindexed_rankings[row["interview_id"]] = row
+        pending = list(_unindexed_rankings.values())
+        try:
+            DatabaseService._index_rankings(pending)
+        except Exception as e:
+            dropped = 0
+            while len(_unindexed_rankings) > UNINDEXED_RANKINGS_LIMIT:
+                del _unindexed_rankings[next(iter(_unindexed_rankings))]
+                dropped += 1
+            print(f"⚠️ Candidate ranking update failed, {len(_unindexed_rankings)} pending"
+                  f"{f', {dropped} dropped (rebuild the organization rankings)' if dropped else ''}: {e}")
+            return
+        for row in pending:
+            if _unindexed_rankings.get(row["interview_id"]) is row:
+                del _unindexed_rankings[row["interview_id"]]
+
+    @staticmethod
+    def rebuild_candidate_rankings(organization_id: str, page_size: int = 500) -> int:
+        """Re-index every stored analysis for an organization; returns how many were indexed"""
+        indexed = 0
+        after_id = None
+        while True:
+            query = supabase.table("interviews")\
+                .select("id")\
+                .eq("organization_id", organization_id)
+            if after_id:
+                query = query.gt("id", after_id)
+            page = query.order("id").limit(page_size).execute().data
+            if not page:
+                return indexed
+            after_id = page[-1]["id"]
+
+            analyses = supabase.table("interview_analysis")\
+                .select("*")\
+                .in_("interview_id", [interview["id"] for interview in page])\
+                .execute()
+            DatabaseService._index_rankings(analyses.data)
+            indexed += len(analyses.data)
+
+    @staticmethod
+    def get_candidate_rankings(
+        organization_id: str,
+        position: Optional[str],
+        sort_by: str,
+        recommendations: Optional[List[str]],
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of candidates ordered by `sort_by` (descending), and the total matching"""
+        query = supabase.table("candidate_rankings")\
+            .select("*", count="exact")\
+            .eq("organization_id", organization_id)
+        if position:
+            query = query.eq("position_key", DatabaseService.position_key(position))
+        if recommendations:
+            query = query.in_("recommendation", recommendations)
+        result = query\
+            .order(sort_by, desc=True)\
+            .order("interview_id")\
+            .range(offset, offset + limit - 1)\
+            .execute()
+        return result.data, result.count or 0
+
+    @staticmethod
+    def get_analysis_versions(interview_ids: List[str]) -> Dict[str, str]:
+        """Rubric version of the stored analysis, per interview that has one"""
+        if not interview_ids:
+            return {}
+        result = supabase.table("interview_analysis")\
+            .select("interview_id, rubric_version")\
+            .in_("interview_id", interview_ids)\
+            .execute()
+        return {row["interview_id"]: row.get("rubric_version") for row in result.data}
+
+    @staticmethod
+    def get_completed_interviews_page(organization_id: Optional[str], after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Completed interviews ordered by id, starting after `after_id`"""
+        query = supabase.table("interviews")\
+            .select("id, organization_id, candidate_name, position")\
+            .eq("status", "completed")
+        if organization_id:
+            query = query.eq("organization_id", organization_id)
+        if after_id:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute().data
+
+    @staticmethod
+    def get_transcripts(interview_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Transcript rows in time order, grouped by interview"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        if not interview_ids:
+            return grouped
+        # Paged: PostgREST truncates a response at its max-rows limit without saying so
+        offset = 0
+        while True:
+            page = supabase.table("interview_transcripts")\
+                .select("interview_id, speaker, message, timestamp")\
+                .in_("interview_id", interview_ids)\
+                .order("timestamp")\
+                .order("id")\
+                .range(offset, offset + TRANSCRIPT_PAGE_ROWS - 1)\
+                .execute().data
+            for row in page:
+                grouped.setdefault(row["interview_id"], []).append(row)
+            if len(page) < TRANSCRIPT_PAGE_ROWS:
+                return grouped
+            offset += TRANSCRIPT_PAGE_ROWS
+
+    @staticmethod
+    def get_interview_analysis(interview_id: str) -> Optional[Dict[str, Any]]:
+        """Get stored analysis for an interview, if any"""
+        result = supabase.table("interview_analysis")\
+            .select("*")\
+            .eq("interview_id", interview_id)\
+            .limit(1)\
+            .execute()
+        return result.data[0] if result.data else None
 
     @staticmethod
     def get_interviews(organization_id: str) -> List[Dict[str, Any]]:
@@ -134,6 +326,24 @@ class DatabaseService:
                 result = supabase.table("expenses").insert(data).execute()
                 return result.data[0]
 
+    @staticmethod
+    def create_expenses(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                """Bulk insert expenses in one round trip"""
+                if not rows:
+                    return []
+                result = supabase.table("expenses").insert(rows).execute()
+                return result.data
+
+    @staticmethod
+    def upsert_import_expenses(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                """Bulk insert imported expenses; rows already written for (import_job_id, import_row) are skipped"""
+                if not rows:
+                    return []
+                result = supabase.table("expenses")\
+                    .upsert(rows, on_conflict="import_job_id,import_row", ignore_duplicates=True)\
+                    .execute()
+                return result.data
+
     @staticmethod
     def get_expenses(organization_id: str) -> List[Dict[str, Any]]:
                 """Get all expenses"""
@@ -144,6 +354,18 @@ class DatabaseService:
                     .execute()
                 return result.data
 
+    @staticmethod
+    def get_expenses_on_dates(organization_id: str, dates: List[str]) -> List[Dict[str, Any]]:
+                """Fields used for duplicate detection, for expenses on the given dates"""
+                if not dates:
+                    return []
+                result = supabase.table("expenses")\
+                    .select("id, expense_date, amount, vendor, description, import_job_id, import_row")\
+                    .eq("organization_id", organization_id)\
+                    .in_("expense_date", dates)\
+                    .execute()
+                return result.data
+
     @staticmethod
     def get_expense_summary(organization_id: str) -> Dict[str, Any]:
                 """Get expense summary by category"""
@@ -166,6 +388,74 @@ class DatabaseService:
                     "total": total
                 }
 
+    @staticmethod
+    def get_column_mapping(organization_id: str, header_signature: str) -> Optional[Dict[str, Any]]:
+        """Get cached CSV column mapping for a header signature"""
+        result = supabase.table("csv_column_mappings")\
+            .select("*")\
+            .eq("organization_id", organization_id)\
+            .eq("header_signature", header_signature)\
+            .limit(1)\
+            .execute()
+        return result.data[0] if result.data else None
+
+    @staticmethod
+    def save_column_mapping(data: Dict[str, Any]):
+        """Insert or replace CSV column mapping"""
+        supabase.table("csv_column_mappings")\
+            .upsert(data, on_conflict="organization_id,header_signature")\
+            .execute()
+
+    @staticmethod
+    def get_column_mappings(organization_id: str) -> List[Dict[str, Any]]:
+        """Get all cached CSV column mappings for organization"""
+        result = supabase.table("csv_column_mappings")\
+            .select("*")\
+            .eq("organization_id", organization_id)\
+            .order("updated_at", desc=True)\
+            .execute()
+        return result.data
+
+    @staticmethod
+    def create_import_job(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create background import job"""
+        result = supabase.table("import_jobs").insert(data).execute()
+        return result.data[0]
+
+    @staticmethod
+    def update_import_job(job_id: str, data: Dict[str, Any]):
+        """Update import job progress or status"""
+        supabase.table("import_jobs").update(data).eq("id", job_id).execute()
+
+    @staticmethod
+    def get_import_job(job_id: str) -> Optional[Dict[str, Any]]:
+        result = supabase.table("import_jobs")\
+            .select("*")\
+            .eq("id", job_id)\
+            .limit(1)\
+            .execute()
+        return result.data[0] if result.data else None
+
+    @staticmethod
+    def get_import_jobs(organization_id: str) -> List[Dict[str, Any]]:
+        """Get import jobs for organization"""
+        result = supabase.table("import_jobs")\
+            .select("*")\
+            .eq("organization_id", organization_id)\
+            .order("created_at", desc=True)\
+            .execute()
+        return result.data
+
+    @staticmethod
+    def get_unfinished_import_jobs() -> List[Dict[str, Any]]:
+        """Jobs that were queued or running when the service stopped"""
+        result = supabase.table("import_jobs")\
+            .select("*")\
+            .in_("status", ["queued", "running"])\
+            .order("created_at")\
+            .execute()
+        return result.data
+
     @staticmethod
     def get_user_organization(user_id: str) -> Optional[str]:
         """Get user's organization_id from organization_members"""
@@ -0,0 +1,100 @@
+"""
+Request Deadlines - One time budget per request, carried through every await via contextvars
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before `step` could finish"""
+
+    def __init__(self, step: str):
+        self.step = step
+        super().__init__(f"Deadline exceeded during {step}")
+
+
+class Deadline:
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Start a request budget; nested calls keep the tighter of the two"""
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_budget(reserve: float = 0.0) -> Optional[float]:
+    """Seconds left after holding back `reserve`; None when no deadline is set"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline.remaining() - reserve
+
+
+def can_afford(seconds: float) -> bool:
+    remaining = remaining_budget()
+    return remaining is None or remaining >= seconds
+
+
+def check_deadline(step: str, reserve: float = 0.0):
+    remaining = remaining_budget(reserve)
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(step)
+
+
+async def within_deadline(awaitable, step: str, reserve: float = 0.0):
+    """Await `awaitable`, cancelling it if the request budget runs out first"""
+    remaining = remaining_budget(reserve)
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(step)
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(step)
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking DatabaseService read off the event loop, bounded by the request deadline"""
+    return await within_deadline(asyncio.to_thread(fn, *args, **kwargs), f"database:{fn.__name__}")
+
+
+async def run_db_write(fn, *args, **kwargs):
+    """
+    Run a blocking DatabaseService write off the event loop. A thread can't be stopped, so
+    the deadline only decides whether the write starts; once started it runs to completion.
+    """
+    check_deadline(f"database:{fn.__name__}")
+    return await asyncio.to_thread(fn, *args, **kwargs)
@@ -0,0 +1,130 @@
+"""
+Duplicate Index - Hash-indexed fingerprints for spotting already-imported expenses
+Existing expenses are loaded only for the dates an import touches, so each lookup is a
+couple of set/dict probes no matter how much history the organization has.
+"""
+import re
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from database import db
+from deadline import run_db
+
+# Card/bank noise that changes between exports of the same transaction
+_NOISE_WORDS = {"pos", "debit", "credit", "purchase", "card", "payment", "ach", "visa", "mc", "inc", "llc", "ltd", "com"}
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split())
+
+
+def core_text(text: Optional[str]) -> str:
+    """First two meaningful words, ignoring reference numbers and card noise"""
+    words = [
+        word for word in re.sub(r"[^a-z]+", " ", (text or "").lower()).split()
+        if len(word) > 1 and word not in _NOISE_WORDS
+    ]
+    return " ".join(words[:2])
+
+
+def _cents(amount: Any) -> int:
+    try:
+        return int(round(float(amount) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _shift(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+class DuplicateIndex:
+    """
+    Exact key: (date, cents, normalized description, normalized vendor).
+    Near key: (date, cents, core words of vendor or description), also probed on
+    neighbouring days so pending/posted date shifts still match.
+    """
+
+    def __init__(self, organization_id: str, near_days: int, job_id: str = None, start_row: int = 0):
+        self.organization_id = organization_id
+        self.near_days = near_days
+        # A resumed job re-reads rows after its checkpoint that may already be written;
+        # those are not duplicates of themselves
+        self.job_id = job_id
+        self.start_row = start_row
+        self._exact: Dict[Tuple, str] = {}
+        self._near: Dict[Tuple, str] = {}
+        self._loaded_dates: Set[str] = set()
+
+    @staticmethod
+    def _exact_key(expense: Dict[str, Any]) -> Tuple:
+        return (
+            str(expense.get("expense_date")),
+            _cents(expense.get("amount")),
+            normalize_text(expense.get("description")),
+            normalize_text(expense.get("vendor"))
+        )
+
+    @staticmethod
+    def _near_texts(expense: Dict[str, Any]) -> Set[str]:
+        texts = {core_text(expense.get("vendor")), core_text(expense.get("description"))}
+        texts.discard("")
+        return texts
+
+    def _add(self, expense: Dict[str, Any], source: str):
+        self._exact.setdefault(self._exact_key(expense), source)
+        day = str(expense.get("expense_date"))
+        cents = _cents(expense.get("amount"))
+        for text in self._near_texts(expense):
+            self._near.setdefault((day, cents, text), source)
+
+    def _window(self, day: str) -> List[str]:
+        try:
+            return [_shift(day, offset) for offset in range(-self.near_days, self.near_days + 1)]
+        except ValueError:
+            return [day]
+
+    async def load_for(self, expenses: List[Dict[str, Any]]):
+        """Pull existing expenses for any dates (and near-match neighbours) not loaded yet"""
+        needed = set()
+        for expense in expenses:
+            needed.update(self._window(str(expense.get("expense_date"))))
+        needed -= self._loaded_dates
+        if not needed:
+            return
+
+        try:
+            existing = await run_db(db.get_expenses_on_dates, self.organization_id, sorted(needed))
+        except Exception as e:
+            print(f"⚠️ Duplicate check skipped existing expenses: {e}")
+            existing = []
+        self._loaded_dates |= needed
+
+        for expense in existing:
+            if self.job_id and expense.get("import_job_id") == self.job_id:
+                if (expense.get("import_row") or 0) > self.start_row:
+                    continue
+                self._add(expense, f"row {expense.get('import_row')}")
+            else:
+                self._add(expense, f"expense {expense.get('id')}")
+
+    def match(self, expense: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        source = self._exact.get(self._exact_key(expense))
+        if source is not None:
+            return {"kind": "exact", "matches": source}
+
+        cents = _cents(expense.get("amount"))
+        texts = self._near_texts(expense)
+        for day in self._window(str(expense.get("expense_date"))):
+            for text in texts:
+                source = self._near.get((day, cents, text))
+                if source is not None:
+                    return {"kind": "near", "matches": source}
+        return None
+
+    def check(self, expense: Dict[str, Any], source: str) -> Optional[Dict[str, str]]:
+        """Match against everything seen so far; unmatched rows join the index as `source`"""
+        found = self.match(expense)
+        if found is None:
+            self._add(expense, source)
+        return found
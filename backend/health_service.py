@@ -0,0 +1,151 @@
+"""
+Health Service - Background probes for the database and AI providers
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from database import db
+from llm_gateway import anthropic_client, openai_client, OPENAI_AVAILABLE
+from config import (
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    HEALTH_PROBE_TIMEOUT_SECONDS,
+    HEALTH_STALE_AFTER_SECONDS
+)
+
+
+async def _probe_database():
+    if not await asyncio.to_thread(db.test_connection):
+        raise Exception("Database query failed")
+
+
+async def _probe_anthropic():
+    await anthropic_client.models.list(limit=1)
+
+
+async def _probe_openai():
+    await openai_client.models.list()
+
+
+class HealthMonitor:
+    """Probes dependencies in the background and serves the cached results"""
+
+    def __init__(self, interval: float, timeout: float, stale_after: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.checks: Dict[str, Dict[str, Any]] = {}
+        self.last_probe_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.probes = {
+            "database": _probe_database,
+            "anthropic": _probe_anthropic if os.getenv("ANTHROPIC_API_KEY") else None,
+            "openai": _probe_openai if OPENAI_AVAILABLE and os.getenv("OPENAI_API_KEY") else None
+        }
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"⚠️ Health probe cycle failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        names = list(self.probes.keys())
+        results = await asyncio.gather(*[
+            self._probe(name, self.probes[name]) for name in names
+        ])
+        self.checks = dict(zip(names, results))
+        self.last_probe_at = time.time()
+
+    async def _probe(self, name: str, probe) -> Dict[str, Any]:
+        if probe is None:
+            return {
+                "status": "not_configured",
+                "latency_ms": None,
+                "checked_at": datetime.utcnow().isoformat(),
+                "error": None
+            }
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), timeout=self.timeout)
+            status, error = "up", None
+        except asyncio.TimeoutError:
+            status, error = "down", f"Timed out after {self.timeout}s"
+        except Exception as e:
+            status, error = "down", str(e)
+
+        return {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": datetime.utcnow().isoformat(),
+            "error": error
+        }
+
+    def age_seconds(self) -> Optional[float]:
+        if self.last_probe_at is None:
+            return None
+        return time.time() - self.last_probe_at
+
+    def is_stale(self) -> bool:
+        age = self.age_seconds()
+        return age is None or age > self.stale_after
+
+    def _is_up(self, name: str) -> bool:
+        return self.checks.get(name, {}).get("status") == "up"
+
+    def is_ready(self) -> bool:
+        """Ready when fresh results show the database and at least one AI provider up"""
+        if self.is_stale():
+            return False
+        return self._is_up("database") and (self._is_up("anthropic") or self._is_up("openai"))
+
+    def snapshot(self) -> Dict[str, Any]:
+        age = self.age_seconds()
+
+        if self.last_probe_at is None:
+            status = "starting"
+        elif not self._is_up("database"):
+            status = "unhealthy"
+        elif not (self._is_up("anthropic") or self._is_up("openai")):
+            status = "unhealthy"
+        elif self.is_stale() or any(c["status"] == "down" for c in self.checks.values()):
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        return {
+            "status": status,
+            "database": "connected" if self._is_up("database") else "disconnected",
+            "ai_service": "ready" if (self._is_up("anthropic") or self._is_up("openai")) else "unavailable",
+            "checks": self.checks,
+            "last_probe_at": datetime.utcfromtimestamp(self.last_probe_at).isoformat() if self.last_probe_at else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": self.is_stale(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+health_monitor = HealthMonitor(
+    interval=HEALTH_PROBE_INTERVAL_SECONDS,
+    timeout=HEALTH_PROBE_TIMEOUT_SECONDS,
+    stale_after=HEALTH_STALE_AFTER_SECONDS
+)
@@ -0,0 +1,231 @@
+"""
+Import Jobs - Background CSV imports with progress, checkpoints, cancellation and resume
+The upload is spooled to local disk, a job row is written to import_jobs, and a
+small worker pool streams the file through MigrationService.import_expenses.
+"""
+import asyncio
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from database import db
+from deadline import run_db, run_db_write
+from migration_service import MigrationService
+from config import IMPORT_WORKERS, IMPORT_UPLOAD_DIR
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class ImportJobManager:
+
+    def __init__(self, workers: int, upload_dir: str):
+        self.worker_count = workers
+        self.upload_dir = upload_dir
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel_events: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+
+        try:
+            unfinished = await run_db(db.get_unfinished_import_jobs)
+        except Exception as e:
+            print(f"⚠️ Could not load unfinished import jobs: {e}")
+            unfinished = []
+
+        for job in unfinished:
+            print(f"🔁 Resuming import job {job['id']} after row {job.get('last_committed_row') or 0}")
+            await self._enqueue(job)
+
+    async def stop(self):
+        # Running jobs keep status "running" with their checkpoint and resume on next start
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, upload_file, filename: str, organization_id: str, header_signature: str = None) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        file_path = os.path.join(self.upload_dir, f"{job_id}.upload")
+
+        def spool():
+            with open(file_path, "wb") as out:
+                shutil.copyfileobj(upload_file, out, 1024 * 1024)
+            return os.path.getsize(file_path)
+
+        file_size = await asyncio.to_thread(spool)
+
+        job = {
+            "id": job_id,
+            "organization_id": organization_id,
+            "filename": filename,
+            "file_path": file_path,
+            "file_size": file_size,
+            "header_signature": header_signature,
+            "status": "queued",
+            "processed_rows": 0,
+            "imported_rows": 0,
+            "failed_rows": 0,
+            "duplicate_rows": 0,
+            "last_committed_row": 0,
+            "bytes_processed": 0,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        await run_db_write(db.create_import_job, job)
+        await self._enqueue(job)
+        return self.status(job)
+
+    async def _enqueue(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = job
+        self._cancel_events[job["id"]] = asyncio.Event()
+        await self.queue.put(job["id"])
+
+    async def _update(self, job: Dict[str, Any], **changes):
+        changes["updated_at"] = datetime.utcnow().isoformat()
+        job.update(changes)
+        await run_db_write(db.update_import_job, job["id"], changes)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job and job["status"] not in FINISHED_STATUSES:
+                    await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Import job {job_id} failed: {e}")
+                try:
+                    await self._update(job, status="failed", error=str(e))
+                except Exception as update_error:
+                    print(f"⚠️ Could not record failure for import job {job_id}: {update_error}")
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, job: Dict[str, Any]):
+        cancel_event = self._cancel_events[job["id"]]
+        if cancel_event.is_set():
+            await self._finish(job, "cancelled")
+            return
+
+        await self._update(job, status="running", error=None)
+
+        async def on_commit(last_row: int, imported: int, failed: int, duplicates: int, bytes_read: int):
+            await self._update(
+                job,
+                last_committed_row=last_row,
+                processed_rows=job["processed_rows"] + imported + failed + duplicates,
+                imported_rows=job["imported_rows"] + imported,
+                failed_rows=job["failed_rows"] + failed,
+                duplicate_rows=(job.get("duplicate_rows") or 0) + duplicates,
+                bytes_processed=bytes_read
+            )
+
+        with open(job["file_path"], "rb") as csv_file:
+            result = await MigrationService.import_expenses(
+                csv_file,
+                job["organization_id"],
+                header_signature=job.get("header_signature"),
+                job_id=job["id"],
+                start_row=job.get("last_committed_row") or 0,
+                on_commit=on_commit,
+                cancel_event=cancel_event
+            )
+
+        if not result["success"]:
+            await self._update(job, status="failed", error=result.get("error"))
+        elif result["cancelled"]:
+            await self._finish(job, "cancelled")
+        else:
+            await self._update(
+                job,
+                header_signature=result.get("header_signature"),
+                duplicate_report=result.get("duplicate_report"),
+                row_errors=result.get("errors")
+            )
+            await self._finish(job, "completed", bytes_processed=job.get("file_size") or job["bytes_processed"])
+
+    async def _finish(self, job: Dict[str, Any], status: str, **changes):
+        await self._update(job, status=status, **changes)
+        try:
+            os.remove(job["file_path"])
+        except OSError:
+            pass
+        self._cancel_events.pop(job["id"], None)
+        # Finished jobs are served from the import_jobs table from here on
+        self.jobs.pop(job["id"], None)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = await run_db(db.get_import_job, job_id)
+        return self.status(job) if job else None
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return await self.get(job_id)
+
+        event = self._cancel_events.get(job_id)
+        if event is not None and job["status"] not in FINISHED_STATUSES:
+            event.set()
+            if job["status"] == "queued":
+                await self._finish(job, "cancelled")
+        return self.status(job)
+
+    async def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Re-queue a failed job from its last checkpoint"""
+        job = self.jobs.get(job_id) or await run_db(db.get_import_job, job_id)
+        if job is None:
+            return None
+        if job["status"] == "failed" and os.path.exists(job["file_path"]):
+            await self._update(job, status="queued", error=None)
+            await self._enqueue(job)
+        return self.status(job)
+
+    def status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        file_size = job.get("file_size") or 0
+        progress = min(1.0, (job.get("bytes_processed") or 0) / file_size) if file_size else 0.0
+        if job["status"] == "completed":
+            progress = 1.0
+
+        return {
+            "job_id": job["id"],
+            "organization_id": job["organization_id"],
+            "filename": job.get("filename"),
+            "status": job["status"],
+            "progress": round(progress, 3),
+            "processed_rows": job.get("processed_rows", 0),
+            "imported_rows": job.get("imported_rows", 0),
+            "failed_rows": job.get("failed_rows", 0),
+            "duplicate_rows": job.get("duplicate_rows") or 0,
+            "last_committed_row": job.get("last_committed_row", 0),
+            "error": job.get("error"),
+            "duplicate_report": job.get("duplicate_report"),
+            "row_errors": job.get("row_errors") or [],
+            "created_at": job.get("created_at"),
+            "updated_at": job.get("updated_at")
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self.queue.qsize(),
+            "jobs_by_status": by_status
+        }
+
+
+import_jobs = ImportJobManager(workers=IMPORT_WORKERS, upload_dir=IMPORT_UPLOAD_DIR)
@@ -0,0 +1,234 @@
+"""
+Interview Channel - One WebSocket per interview session
+Candidate messages come in and interviewer tokens stream out over a persistent
+connection. Turns are numbered and kept on the session, so a client that reconnects with
+the last sequence number it saw gets everything after it, including a turn that kept
+generating while it was away. Transcript rows go through the batched transcript writer.
+"""
+import asyncio
+import json
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from transcript_writer import transcript_writer
+from config import INTERVIEW_WS_HEARTBEAT_SECONDS, INTERVIEW_WS_IDLE_TIMEOUT_SECONDS, INTERVIEW_MAX_VERBATIM_TURNS
+
+SPEAKERS = {"assistant": "ai", "user": "candidate"}
+CLOSE_SUPERSEDED = 4000
+CLOSE_IDLE = 4008
+
+
+class InterviewSession:
+    __slots__ = ("interview_id", "conductor", "log", "next_seq", "streaming", "is_complete", "_turn", "_outbound")
+
+    def __init__(self, interview_id: str, conductor):
+        self.interview_id = interview_id
+        self.conductor = conductor
+        # Turns held verbatim so far (normally just the greeting) were persisted by /interview/start
+        self.log: List[Dict[str, Any]] = [
+            {"seq": seq, "speaker": SPEAKERS.get(role, role), "content": content}
+            for seq, (role, content) in enumerate(conductor.context.recent)
+        ]
+        self.next_seq = len(self.log)
+        self.streaming = ""
+        self.is_complete = False
+        self._turn: Optional[asyncio.Task] = None
+        self._outbound: Optional[asyncio.Queue] = None
+
+    def attach(self) -> asyncio.Queue:
+        """Route events to a new connection; an older one is told to close"""
+        self.disconnect()
+        self._outbound = asyncio.Queue()
+        return self._outbound
+
+    def detach(self, outbound: asyncio.Queue):
+        if self._outbound is outbound:
+            self._outbound = None
+
+    def disconnect(self):
+        if self._outbound is not None:
+            self._outbound.put_nowait(None)
+
+    def _send(self, event: Dict[str, Any]):
+        if self._outbound is not None:
+            self._outbound.put_nowait(event)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "type": "session",
+            "interview_id": self.interview_id,
+            "first_seq": self.log[0]["seq"] if self.log else 0,
+            "last_seq": self.next_seq - 1,
+            "question_number": self.conductor.question_count,
+            "total_questions": self.conductor.max_questions,
+            "responding": self.responding,
+            "is_complete": self.is_complete
+        }
+
+    def replay(self, after_seq: int) -> List[Dict[str, Any]]:
+        events = [{"type": "message", **entry} for entry in self.log if entry["seq"] > after_seq]
+        if self.streaming:
+            events.append({"type": "token", "text": self.streaming})
+        return events
+
+    @property
+    def responding(self) -> bool:
+        return self._turn is not None and not self._turn.done()
+
+    def _record(self, speaker: str, content: str) -> Dict[str, Any]:
+        entry = {"seq": self.next_seq, "speaker": speaker, "content": content}
+        self.next_seq += 1
+        self.log.append(entry)
+        # Replay covers recent turns; older ones are in the stored transcript
+        del self.log[:-INTERVIEW_MAX_VERBATIM_TURNS]
+        transcript_writer.add(self.interview_id, speaker, content)
+        return entry
+
+    def submit(self, content: str, on_complete: Callable[[], Awaitable[None]]) -> Optional[str]:
+        """Start the interviewer's reply to a candidate message; returns an error instead if it can't"""
+        if self.is_complete:
+            return "The interview is complete"
+        if self.responding:
+            return "The interviewer is still responding"
+
+        self._send({"type": "message", **self._record("candidate", content)})
+        # The turn belongs to the session, not the socket, so it survives a disconnect
+        self._turn = asyncio.create_task(self._respond(content, on_complete))
+        return None
+
+    def _on_token(self, text: str):
+        self.streaming += text
+        self._send({"type": "token", "text": text})
+
+    async def _respond(self, content: str, on_complete: Callable[[], Awaitable[None]]):
+        try:
+            result = await self.conductor.stream_response(content, self._on_token)
+        except Exception as e:
+            print(f"❌ Interview {self.interview_id} turn failed: {e}")
+            self._send({"type": "error", "detail": str(e)})
+            return
+        finally:
+            self.streaming = ""
+
+        entry = self._record("ai", result["ai_message"])
+        self._send({
+            "type": "message",
+            **entry,
+            "question_number": result["question_number"],
+            "is_complete": result["is_complete"]
+        })
+        if result["is_complete"]:
+            self.is_complete = True
+            try:
+                await on_complete()
+            except Exception as e:
+                print(f"❌ Completing interview {self.interview_id} failed: {e}")
+
+
+class InterviewChannel:
+
+    def __init__(self, heartbeat_seconds: float, idle_timeout_seconds: float):
+        self.heartbeat_seconds = heartbeat_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.sessions: Dict[str, InterviewSession] = {}
+        self.connected = 0
+
+    def session(self, interview_id: str, conductor) -> InterviewSession:
+        if interview_id not in self.sessions:
+            self.sessions[interview_id] = InterviewSession(interview_id, conductor)
+        return self.sessions[interview_id]
+
+    def close(self, interview_id: str):
+        session = self.sessions.pop(interview_id, None)
+        if session is not None:
+            session.disconnect()
+
+    async def serve(
+        self,
+        websocket: WebSocket,
+        session: InterviewSession,
+        last_seq: int,
+        on_complete: Callable[[], Awaitable[None]]
+    ):
+        """Run one accepted connection until the client leaves, goes idle or is superseded"""
+        outbound = session.attach()
+        outbound.put_nowait(session.state())
+        for event in session.replay(last_seq):
+            outbound.put_nowait(event)
+
+        async def receive():
+            while True:
+                try:
+                    raw = await asyncio.wait_for(websocket.receive_text(), timeout=self.idle_timeout_seconds)
+                except asyncio.TimeoutError:
+                    await websocket.close(code=CLOSE_IDLE, reason="No heartbeat from client")
+                    return
+                except WebSocketDisconnect:
+                    return
+
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    outbound.put_nowait({"type": "error", "detail": "Messages must be JSON"})
+                    continue
+
+                kind = data.get("type") if isinstance(data, dict) else None
+                if kind == "ping":
+                    outbound.put_nowait({"type": "pong"})
+                elif kind == "pong":
+                    continue
+                elif kind == "message":
+                    content = str(data.get("content") or "").strip()
+                    error = session.submit(content, on_complete) if content else "Message is empty"
+                    if error:
+                        outbound.put_nowait({"type": "error", "detail": error})
+                else:
+                    outbound.put_nowait({"type": "error", "detail": f"Unknown message type: {kind}"})
+
+        async def send():
+            held: List[Optional[Dict[str, Any]]] = []
+            while True:
+                if held:
+                    event = held.pop()
+                else:
+                    try:
+                        event = await asyncio.wait_for(outbound.get(), timeout=self.heartbeat_seconds)
+                    except asyncio.TimeoutError:
+                        event = {"type": "ping"}
+                if event is None:
+                    await websocket.close(code=CLOSE_SUPERSEDED, reason="Session closed or opened elsewhere")
+                    return
+
+                # Tokens that queued up while the last frame was sending go out as one frame
+                while event["type"] == "token" and not outbound.empty():
+                    following = outbound.get_nowait()
+                    if following is None or following["type"] != "token":
+                        held.append(following)
+                        break
+                    event = {"type": "token", "text": event["text"] + following["text"]}
+                await websocket.send_json(event)
+
+        self.connected += 1
+        tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            session.detach(outbound)
+            self.connected -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "connected": self.connected,
+            "responding": sum(1 for session in self.sessions.values() if session.responding)
+        }
+
+
+interview_channel = InterviewChannel(
+    heartbeat_seconds=INTERVIEW_WS_HEARTBEAT_SECONDS,
+    idle_timeout_seconds=INTERVIEW_WS_IDLE_TIMEOUT_SECONDS
+)
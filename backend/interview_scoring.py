@@ -0,0 +1,187 @@
+"""
+Interview Scoring - Running candidate scores updated by a small model after every answer
+Updates run in the background, one at a time per interview so they apply in order; the
+final analysis is then a short merge of the accumulated notes rather than a transcript read.
+"""
+import asyncio
+import json
+from typing import List, Dict, Any, Optional
+
+from llm_gateway import llm
+from config import SCORING_MAX_NOTES
+
+SCORING_MODEL = "claude-3-5-haiku-20241022"
+SCORE_FIELDS = ("overall_score", "technical_score", "communication_score", "cultural_fit_score")
+
+
+def _parse_json(content: str) -> Dict[str, Any]:
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    return json.loads(content)
+
+
+def _clamp_score(value: Any, fallback: int) -> int:
+    try:
+        return max(1, min(100, int(value)))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _recommendation(overall_score: int) -> str:
+    if overall_score >= 85:
+        return "strong_hire"
+    if overall_score >= 70:
+        return "hire"
+    if overall_score >= 55:
+        return "maybe"
+    return "no_hire"
+
+
+class IncrementalScorer:
+    __slots__ = (
+        "position", "candidate_name", "max_notes", "scores", "strengths", "weaknesses",
+        "notes", "turns_scored", "turns_failed", "_pending"
+    )
+
+    def __init__(self, position: str, candidate_name: str, max_notes: int = SCORING_MAX_NOTES):
+        self.position = position
+        self.candidate_name = candidate_name
+        self.max_notes = max_notes
+        self.scores: Dict[str, int] = {}
+        self.strengths: List[str] = []
+        self.weaknesses: List[str] = []
+        self.notes: List[str] = []
+        self.turns_scored = 0
+        self.turns_failed = 0
+        self._pending: Optional[asyncio.Task] = None
+
+    def observe(self, question: str, answer: str):
+        """Queue a score update for one exchange behind any update still running"""
+        previous = self._pending
+        self._pending = asyncio.create_task(self._update_after(previous, question, answer))
+
+    async def _update_after(self, previous: Optional[asyncio.Task], question: str, answer: str):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await self._update(question, answer)
+            self.turns_scored += 1
+        except Exception as e:
+            self.turns_failed += 1
+            print(f"⚠️ Incremental scoring failed: {e}")
+
+    @staticmethod
+    def _add_unique(items: List[str], new_items: Any, limit: int):
+        seen = {item.lower() for item in items}
+        for item in new_items or []:
+            if isinstance(item, str) and item.strip() and item.lower() not in seen and len(items) < limit:
+                items.append(item.strip())
+                seen.add(item.lower())
+
+    async def _update(self, question: str, answer: str):
+        prompt = f"""You are scoring a job interview for the position of {self.position} while it happens.
+
+CURRENT ASSESSMENT (after {self.turns_scored} answers):
+{json.dumps(self.state(), indent=2)}
+
+LATEST EXCHANGE:
+Interviewer: {question}
+Candidate: {answer}
+
+Update the assessment. Scores (1-100) describe the whole interview so far, not just this answer.
+Return ONLY valid JSON:
+{{
+  "overall_score": <1-100>,
+  "technical_score": <1-100>,
+  "communication_score": <1-100>,
+  "cultural_fit_score": <1-100>,
+  "new_strengths": ["only strengths this answer newly showed"],
+  "new_weaknesses": ["only weaknesses this answer newly showed"],
+  "note": "one sentence of concrete evidence from this answer"
+}}"""
+
+        response = await llm.create_message(
+            model=SCORING_MODEL,
+            max_tokens=400,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}],
+            coalesce=False
+        )
+        update = _parse_json(response.content[0].text)
+
+        for field in SCORE_FIELDS:
+            self.scores[field] = _clamp_score(update.get(field), self.scores.get(field, 50))
+        self._add_unique(self.strengths, update.get("new_strengths"), self.max_notes)
+        self._add_unique(self.weaknesses, update.get("new_weaknesses"), self.max_notes)
+
+        note = update.get("note")
+        if isinstance(note, str) and note.strip():
+            self.notes.append(note.strip())
+            # Oldest evidence goes first; the scores already reflect it
+            del self.notes[:-self.max_notes]
+
+    async def settle(self):
+        if self._pending is not None:
+            await asyncio.gather(asyncio.shield(self._pending), return_exceptions=True)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            **self.scores,
+            "strengths": self.strengths,
+            "weaknesses": self.weaknesses,
+            "evidence": self.notes
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.state(),
+            "turns_scored": self.turns_scored,
+            "turns_failed": self.turns_failed,
+            "updating": self._pending is not None and not self._pending.done()
+        }
+
+    async def final_analysis(self) -> Optional[Dict[str, Any]]:
+        """Merge running scores and notes into the analysis format; None if most turns went unscored"""
+        await self.settle()
+        if not self.turns_scored or self.turns_failed > self.turns_scored:
+            return None
+
+        analysis = {
+            **self.scores,
+            "strengths": self.strengths[:5],
+            "weaknesses": self.weaknesses[:5],
+            "recommendation": _recommendation(self.scores["overall_score"]),
+            "key_insights": self.notes[-1] if self.notes else "",
+            "detailed_analysis": " ".join(self.notes)
+        }
+
+        prompt = f"""Write the final assessment for {self.candidate_name}, interviewed for {self.position}.
+These scores and evidence notes were collected during the interview:
+
+{json.dumps(self.state(), indent=2)}
+
+Return ONLY valid JSON:
+{{
+  "key_insights": "Brief summary of key observations",
+  "recommendation": "strong_hire" | "hire" | "maybe" | "no_hire",
+  "detailed_analysis": "Comprehensive analysis paragraph grounded in the evidence"
+}}"""
+
+        try:
+            response = await llm.create_message(
+                model=SCORING_MODEL,
+                max_tokens=700,
+                messages=[{"role": "user", "content": prompt}],
+                coalesce=False
+            )
+            summary = _parse_json(response.content[0].text)
+            for field in ("key_insights", "recommendation", "detailed_analysis"):
+                if isinstance(summary.get(field), str) and summary[field].strip():
+                    analysis[field] = summary[field].strip()
+        except Exception as e:
+            # Scores and notes are the substance; the narrative is a nicety
+            print(f"⚠️ Analysis merge fell back to notes: {e}")
+
+        return analysis
@@ -1,20 +1,50 @@
-from anthropic import Anthropic
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
 import json
-import os
+import sys
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+from llm_gateway import llm
+from conversation_context import ConversationContext, estimate_tokens
+from interview_scoring import IncrementalScorer
+from config import (
+    INTERVIEW_RECENT_TURNS, INTERVIEW_FOLD_BATCH, INTERVIEW_CONTEXT_TOKEN_BUDGET,
+    INTERVIEW_SUMMARY_MAX_TOKENS, INTERVIEW_ANALYSIS_TOKEN_BUDGET, INTERVIEW_MAX_VERBATIM_TURNS
+)
+
+INTERVIEW_SUMMARY_FOCUS = """This is a job interview. Keep everything needed to assess the candidate
+later: their stated experience, skills, concrete examples and results, how clearly they
+communicate, motivations, concerns, and which topics the interviewer has already covered."""
+INTERVIEW_SPEAKER_LABELS = {"assistant": "Interviewer", "user": "Candidate"}
 
 class InterviewConductor:
+    __slots__ = (
+        "position", "candidate_name", "context", "scorer", "last_question", "question_count", "max_questions"
+    )
 
     def __init__(self, position: str, candidate_name: str):
-        self.position = position
+        # Many concurrent sessions share a handful of positions
+        self.position = sys.intern(position)
         self.candidate_name = candidate_name
-        self.conversation_history = []
+        # Last few turns verbatim, older ones in a rolling summary
+        self.context = ConversationContext(
+            recent_turns=INTERVIEW_RECENT_TURNS,
+            fold_batch=INTERVIEW_FOLD_BATCH,
+            token_budget=INTERVIEW_CONTEXT_TOKEN_BUDGET,
+            summary_max_tokens=INTERVIEW_SUMMARY_MAX_TOKENS,
+            summary_focus=INTERVIEW_SUMMARY_FOCUS,
+            speaker_labels=INTERVIEW_SPEAKER_LABELS,
+            max_verbatim_turns=INTERVIEW_MAX_VERBATIM_TURNS
+        )
+        self.scorer = IncrementalScorer(position, candidate_name)
+        self.last_question = ""
         self.question_count = 0
         self.max_questions = 8
 
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Turns still held verbatim (older ones live in context.summary)"""
+        return self.context.history
+
     def get_system_prompt(self) -> str:
         return f"""You are a professional HR interviewer conducting a job interview for the position of {self.position}.
 
@@ -45,8 +75,15 @@ Position: {self.position}
 
 You are now conducting this interview. Start by greeting the candidate warmly and asking your first question."""
 
-    async def start_interview(self) -> str:
-        response = client.messages.create(
+    async def start_interview(self, opener: str = None) -> str:
+        """Greet the candidate - with a pre-generated opener when one is supplied"""
+        if opener:
+            self.context.add("assistant", opener)
+            self.last_question = opener
+            self.question_count += 1
+            return opener
+
+        response = await llm.create_message(
             model="claude-sonnet-4-5-20250929",
             max_tokens=300,
             system=self.get_system_prompt(),
@@ -59,43 +96,37 @@ You are now conducting this interview. Start by greeting the candidate warmly an
         )
 
         ai_message = response.content[0].text
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": ai_message
-        })
+        self.context.add("assistant", ai_message)
+        self.last_question = ai_message
         self.question_count += 1
 
         return ai_message
 
-    async def process_response(self, candidate_response: str) -> Dict[str, Any]:
-        self.conversation_history.append({
-            "role": "user",
-            "content": candidate_response
-        })
+    def _begin_turn(self, candidate_response: str):
+        self.context.add("user", candidate_response)
+        # Scored in the background; the candidate only waits for the next question
+        self.scorer.observe(self.last_question, candidate_response)
 
         should_end = self.question_count >= self.max_questions
+        system_prompt = self.get_system_prompt()
+        messages = self.context.messages(reserve_tokens=estimate_tokens(system_prompt))
 
         if should_end:
-            messages = self.conversation_history + [{
+            messages = messages + [{
                 "role": "user",
                 "content": "Please conclude the interview professionally and thank the candidate."
             }]
-        else:
-            messages = self.conversation_history
 
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=300,
-            system=self.get_system_prompt(),
-            messages=messages
-        )
-
-        ai_message = response.content[0].text
+        return should_end, {
+            "model": "claude-sonnet-4-5-20250929",
+            "max_tokens": 300,
+            "system": system_prompt,
+            "messages": messages
+        }
 
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": ai_message
-        })
+    def _finish_turn(self, ai_message: str, should_end: bool) -> Dict[str, Any]:
+        self.context.add("assistant", ai_message)
+        self.last_question = ai_message
 
         self.question_count += 1
 
@@ -106,17 +137,60 @@ You are now conducting this interview. Start by greeting the candidate warmly an
             "conversation_history": self.conversation_history
         }
 
+    async def process_response(self, candidate_response: str) -> Dict[str, Any]:
+        should_end, request = self._begin_turn(candidate_response)
+        response = await llm.create_message(**request)
+        return self._finish_turn(response.content[0].text, should_end)
+
+    async def stream_response(self, candidate_response: str, on_token: Callable[[str], None]) -> Dict[str, Any]:
+        """process_response, handing each text delta to `on_token` as it is generated"""
+        should_end, request = self._begin_turn(candidate_response)
+        parts: List[str] = []
+        async for text in llm.stream_message(**request):
+            parts.append(text)
+            on_token(text)
+        return self._finish_turn("".join(parts), should_end)
+
     async def analyze_interview(self) -> Dict[str, Any]:
 
-        transcript = "\n\n".join([
-            f"{'Interviewer' if msg['role'] == 'assistant' else 'Candidate'}: {msg['content']}"
-            for msg in self.conversation_history
-        ])
+        # Normally a short merge of the notes gathered turn by turn
+        analysis = await self.scorer.final_analysis()
+        if analysis is not None:
+            return analysis
+
+        await self.context.settle()
+        transcript = self.context.transcript(INTERVIEW_ANALYSIS_TOKEN_BUDGET)
+        return await analyze_transcript(self.position, self.candidate_name, transcript)
 
-        analysis_prompt = f"""Analyze this job interview transcript and provide a detailed assessment.
 
-Position: {self.position}
-Candidate: {self.candidate_name}
+STORED_SPEAKER_LABELS = {"ai": "Interviewer", "candidate": "Candidate"}
+
+
+def format_stored_transcript(rows: List[Dict[str, Any]], token_budget: int) -> str:
+    """interview_transcripts rows as plain text; the latest turns that fit in `token_budget`"""
+    lines: List[str] = []
+    for row in reversed(rows):
+        line = f"{STORED_SPEAKER_LABELS.get(row['speaker'], row['speaker'])}: {row['message']}"
+        cost = estimate_tokens(line)
+        if cost > token_budget:
+            break
+        lines.append(line)
+        token_budget -= cost
+    omitted = len(rows) - len(lines)
+    if omitted:
+        lines.append(f"[{omitted} earlier turns omitted]")
+    return "\n\n".join(reversed(lines))
+
+
+async def analyze_transcript(position: str, candidate_name: str, transcript: str, fallback: bool = True) -> Dict[str, Any]:
+    """
+    Full-transcript assessment. With `fallback`, unparseable model output becomes a
+    neutral placeholder analysis; without it the JSON error is raised.
+    """
+    analysis_prompt = f"""Analyze this job interview transcript and provide a detailed assessment.
+
+Position: {position}
+Candidate: {candidate_name}
 
 TRANSCRIPT:
 {transcript}
@@ -136,31 +210,33 @@ Provide your analysis in the following JSON format:
 
 Be honest, fair, and specific in your assessment."""
 
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": analysis_prompt}]
-        )
-
-        analysis_text = response.content[0].text
-
-        if "```json" in analysis_text:
-            analysis_text = analysis_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in analysis_text:
-            analysis_text = analysis_text.split("```")[1].split("```")[0].strip()
-
-        try:
-            analysis = json.loads(analysis_text)
-            return analysis
-        except json.JSONDecodeError:
-            return {
-                "overall_score": 70,
-                "technical_score": 70,
-                "communication_score": 75,
-                "cultural_fit_score": 70,
-                "strengths": ["Good communication", "Relevant experience"],
-                "weaknesses": ["Could provide more specific examples"],
-                "key_insights": "Candidate showed potential but needs more depth in responses.",
-                "recommendation": "maybe",
-                "detailed_analysis": analysis_text
-            }
\ No newline at end of file
+    response = await llm.create_message(
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=2000,
+        messages=[{"role": "user", "content": analysis_prompt}]
+    )
+
+    analysis_text = response.content[0].text
+
+    if "```json" in analysis_text:
+        analysis_text = analysis_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in analysis_text:
+        analysis_text = analysis_text.split("```")[1].split("```")[0].strip()
+
+    try:
+        analysis = json.loads(analysis_text)
+        return analysis
+    except json.JSONDecodeError:
+        if not fallback:
+            raise
+        return {
+            "overall_score": 70,
+            "technical_score": 70,
+            "communication_score": 75,
+            "cultural_fit_score": 70,
+            "strengths": ["Good communication", "Relevant experience"],
+            "weaknesses": ["Could provide more specific examples"],
+            "key_insights": "Candidate showed potential but needs more depth in responses.",
+            "recommendation": "maybe",
+            "detailed_analysis": analysis_text
+        }
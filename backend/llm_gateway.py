@@ -0,0 +1,352 @@
+"""
+LLM Gateway - Shared entry point for every Anthropic and OpenAI call
+Applies per-model admission control (concurrency + token rate) with bounded wait queues
+and per-provider circuit breakers, all bounded by the caller's request deadline.
+Identical concurrent requests are coalesced into a single provider call.
+"""
+from anthropic import AsyncAnthropic
+from fastapi import HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import os
+import time
+from typing import Dict, Any, Optional, AsyncIterator
+
+from config import (
+    LLM_DEFAULT_LIMITS,
+    LLM_MODEL_LIMITS,
+    CIRCUIT_BREAKER_SETTINGS,
+    LLM_SLOW_CALL_TOKENS_PER_SECOND,
+    LLM_DEFAULT_SLOW_CALL_TOKENS_PER_SECOND,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    DEADLINE_DB_RESERVE_SECONDS
+)
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from deadline import DeadlineExceeded, remaining_budget, within_deadline
+from single_flight import SingleFlight, request_key
+
+anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+try:
+    from openai import AsyncOpenAI
+    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    OPENAI_AVAILABLE = True
+except Exception:
+    OPENAI_AVAILABLE = False
+    openai_client = None
+
+
+class AdmissionRejected(HTTPException):
+    """Raised when a model's wait queue is full - surfaces as 429 + Retry-After"""
+
+    def __init__(self, model: str, retry_after: int, reason: str):
+        self.model = model
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=429,
+            detail=f"AI provider busy ({model}): {reason}. Retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class ModelLimiter:
+    """Concurrency slots plus a token bucket for one model, fronted by a bounded queue"""
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int,
+        tokens_per_minute: int,
+        max_queue: int,
+        queue_timeout_seconds: float
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._bucket_lock = asyncio.Lock()
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.avg_call_seconds = 1.0
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60.0
+        self._tokens = min(self.tokens_per_minute, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    async def _take_tokens(self, tokens: int):
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._bucket_lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / (self.tokens_per_minute / 60.0))
+                self._refill()
+            self._tokens -= tokens
+
+    def settle(self, reserved: int, actual: Optional[int]):
+        """Refund or charge the difference once the real token usage is known"""
+        if actual is None:
+            return
+        self._refill()
+        self._tokens = min(self.tokens_per_minute, self._tokens + reserved - actual)
+
+    def retry_after(self) -> int:
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(backlog / self.max_concurrency * self.avg_call_seconds))
+
+    async def _admit(self, tokens: int):
+        await self._slots.acquire()
+        try:
+            await self._take_tokens(tokens)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int, max_wait: Optional[float] = None):
+        if self.in_flight + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.model, self.retry_after(), "queue full")
+
+        deadline_bound = max_wait is not None and max_wait < self.queue_timeout_seconds
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._admit(tokens),
+                timeout=max_wait if deadline_bound else self.queue_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            if deadline_bound:
+                raise DeadlineExceeded(f"queue:{self.model}")
+            self.rejected += 1
+            raise AdmissionRejected(self.model, self.retry_after(), "queue wait timed out")
+        finally:
+            self.waiting -= 1
+
+        self.admitted += 1
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self.avg_call_seconds = 0.8 * self.avg_call_seconds + 0.2 * (time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "tokens_per_minute": self.tokens_per_minute,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "tokens_available": int(self._tokens),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_call_seconds": round(self.avg_call_seconds, 3)
+        }
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Client-side mistakes (bad request, auth) say nothing about provider health"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None and 400 <= status_code < 500 and status_code != 429:
+        return False
+    return True
+
+
+def _estimate_tokens(texts, max_tokens: int) -> int:
+    chars = 0
+    for text in texts:
+        if isinstance(text, str):
+            chars += len(text)
+        elif isinstance(text, list):
+            chars += sum(len(str(part.get("text", part))) if isinstance(part, dict) else len(str(part)) for part in text)
+    return chars // 4 + max_tokens
+
+
+class LLMGateway:
+    """All AI callers in the backend go through this so limits are shared"""
+
+    def __init__(self):
+        self.limiters: Dict[str, ModelLimiter] = {}
+        for model in LLM_MODEL_LIMITS:
+            self.limiter_for(model)
+
+        self.breakers: Dict[str, CircuitBreaker] = {
+            provider: CircuitBreaker(provider, **CIRCUIT_BREAKER_SETTINGS)
+            for provider in ("anthropic", "openai")
+        }
+
+        self.flights = SingleFlight()
+        # Successful call latency per model (EWMA), for routing between models
+        self.model_latencies: Dict[str, float] = {}
+
+    def slow_after(self, model: str, max_tokens: int) -> float:
+        """Seconds after which a call asking for `max_tokens` is slow for the breaker"""
+        tokens_per_second = LLM_SLOW_CALL_TOKENS_PER_SECOND.get(model, LLM_DEFAULT_SLOW_CALL_TOKENS_PER_SECOND)
+        return CIRCUIT_BREAKER_SETTINGS["slow_call_seconds"] + (max_tokens or 0) / tokens_per_second
+
+    def _observe_model_latency(self, model: str, latency: float):
+        previous = self.model_latencies.get(model)
+        self.model_latencies[model] = latency if previous is None else 0.7 * previous + 0.3 * latency
+
+    def limiter_for(self, model: str) -> ModelLimiter:
+        if model not in self.limiters:
+            limits = {**LLM_DEFAULT_LIMITS, **LLM_MODEL_LIMITS.get(model, {})}
+            self.limiters[model] = ModelLimiter(model, **limits)
+        return self.limiters[model]
+
+    async def _call_provider(self, provider: str, model: str, call, max_tokens: int = 0):
+        breaker = self.breakers[provider]
+        if not breaker.allow_request():
+            raise CircuitOpenError(provider, breaker.retry_after())
+
+        step = f"llm:{model}"
+        started = time.monotonic()
+        try:
+            response = await within_deadline(call(), step, reserve=DEADLINE_DB_RESERVE_SECONDS)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            breaker.release()
+            raise
+        except Exception as e:
+            budget = remaining_budget(DEADLINE_DB_RESERVE_SECONDS)
+            if budget is not None and budget <= 0:
+                # The SDK timeout was cut short by our own budget, not by the provider
+                breaker.release()
+                raise DeadlineExceeded(step)
+            if _is_provider_failure(e):
+                breaker.record_failure(time.monotonic() - started)
+            else:
+                breaker.release()
+            raise
+
+        latency = time.monotonic() - started
+        breaker.record_success(latency, slow_after=self.slow_after(model, max_tokens))
+        self._observe_model_latency(model, latency)
+        return response
+
+    async def _create(self, provider: str, kwargs: Dict[str, Any], reserved: int, call, usage_tokens):
+        model = kwargs["model"]
+        budget = remaining_budget(DEADLINE_DB_RESERVE_SECONDS)
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(f"llm:{model}")
+
+        kwargs.setdefault("timeout", LLM_REQUEST_TIMEOUT_SECONDS)
+        if budget is not None:
+            kwargs["timeout"] = min(kwargs["timeout"], budget)
+
+        limiter = self.limiter_for(model)
+        async with limiter.acquire(reserved, max_wait=budget):
+            response = await self._call_provider(
+                provider, model, lambda: call(**kwargs), max_tokens=kwargs.get("max_tokens") or 0
+            )
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            limiter.settle(reserved, usage_tokens(usage))
+        return response
+
+    async def _coalesced(self, kwargs: Dict[str, Any], coalesce: bool, create):
+        if not coalesce:
+            return await create()
+        key = request_key(kwargs["model"], kwargs)
+        return await self.flights.do(key, create, label=kwargs["model"])
+
+    async def create_message(self, coalesce: bool = True, **kwargs):
+        """
+        Anthropic messages.create behind the model's limiter and the provider breaker.
+        Pass coalesce=False when identical prompts should produce independent samples.
+        """
+        texts = [kwargs.get("system")] + [m["content"] for m in kwargs["messages"]]
+        reserved = _estimate_tokens(texts, kwargs["max_tokens"])
+
+        return await self._coalesced(kwargs, coalesce, lambda: self._create(
+            "anthropic", kwargs, reserved, anthropic_client.messages.create,
+            lambda usage: usage.input_tokens + usage.output_tokens
+        ))
+
+    async def stream_message(self, **kwargs) -> AsyncIterator[str]:
+        """
+        Anthropic messages.stream under the same limiter and breaker as create_message,
+        yielding text deltas as they arrive. Streams are never coalesced.
+        """
+        model = kwargs["model"]
+        texts = [kwargs.get("system")] + [m["content"] for m in kwargs["messages"]]
+        reserved = _estimate_tokens(texts, kwargs["max_tokens"])
+        kwargs.setdefault("timeout", LLM_REQUEST_TIMEOUT_SECONDS)
+
+        limiter = self.limiter_for(model)
+        breaker = self.breakers["anthropic"]
+        async with limiter.acquire(reserved):
+            if not breaker.allow_request():
+                raise CircuitOpenError("anthropic", breaker.retry_after())
+
+            # Judged on time to first token; the rest of the stream's length is up to max_tokens
+            started = time.monotonic()
+            first_token: Optional[float] = None
+            try:
+                async with anthropic_client.messages.stream(**kwargs) as stream:
+                    async for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.monotonic() - started
+                        yield text
+                    final = await stream.get_final_message()
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.release()
+                raise
+            except Exception as e:
+                if _is_provider_failure(e):
+                    breaker.record_failure(time.monotonic() - started)
+                else:
+                    breaker.release()
+                raise
+            breaker.record_success(first_token if first_token is not None else time.monotonic() - started)
+
+        usage = getattr(final, "usage", None)
+        if usage is not None:
+            limiter.settle(reserved, usage.input_tokens + usage.output_tokens)
+
+    async def create_chat_completion(self, coalesce: bool = True, **kwargs):
+        """OpenAI chat.completions.create behind the model's limiter and the provider breaker"""
+        if not OPENAI_AVAILABLE or not openai_client:
+            raise Exception("OpenAI not available")
+
+        texts = [m["content"] for m in kwargs["messages"]]
+        reserved = _estimate_tokens(texts, kwargs.get("max_tokens") or 0)
+
+        return await self._coalesced(kwargs, coalesce, lambda: self._create(
+            "openai", kwargs, reserved, openai_client.chat.completions.create,
+            lambda usage: usage.total_tokens
+        ))
+
+    def is_available(self, provider: str) -> bool:
+        return self.breakers[provider].is_available()
+
+    def model_latency(self, model: str) -> Optional[float]:
+        """Recent successful call latency for `model`, None until it has been called"""
+        return self.model_latencies.get(model)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {model: limiter.snapshot() for model, limiter in self.limiters.items()}
+
+    def coalescing_snapshot(self) -> Dict[str, Any]:
+        return self.flights.snapshot()
+
+    def breaker_snapshot(self) -> Dict[str, Any]:
+        return {provider: breaker.snapshot() for provider, breaker in self.breakers.items()}
+
+
+llm = LLMGateway()
@@ -2,6 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import API_TITLE, API_DESCRIPTION, API_VERSION, SUPABASE_URL
+from health_service import health_monitor
+from import_jobs import import_jobs
+from analysis_jobs import analysis_jobs
+from reanalysis import reanalysis
+from transcript_writer import transcript_writer
 
 app = FastAPI(
     title=API_TITLE,
@@ -17,7 +22,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from routes import interview, health, project, finance, migration, orchestrator, user, auth
+from routes import interview, health, project, finance, migration, orchestrator, user, auth, metrics
 app.include_router(health.router)
 app.include_router(interview.router)
 app.include_router(project.router)
@@ -26,11 +31,19 @@ app.include_router(migration.router)
 app.include_router(orchestrator.router)
 app.include_router(user.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup_event():
     print("🚀 Starting Project Lightning AI Service...")
     print(f"📡 Connected to Supabase: {SUPABASE_URL}")
+    await health_monitor.start()
+    print("🩺 Health monitor: Probing in background")
+    await import_jobs.start()
+    print(f"📥 Import workers: {import_jobs.worker_count} running")
+    await analysis_jobs.start()
+    await transcript_writer.start()
+    print(f"📝 Analysis workers: {analysis_jobs.worker_count} running")
     print("🤖 AI Interview Conductor: Ready")
     print("✅ Service operational!")
 
@@ -38,6 +51,11 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     print("👋 Shutting down AI Service...")
+    await health_monitor.stop()
+    await import_jobs.stop()
+    await analysis_jobs.stop()
+    await reanalysis.stop()
+    await transcript_writer.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+"""
+Column Mapping Cache - Reuses CSV column mappings per organization and header signature
+Orgs re-upload the same bank/card export every month; only new formats need the LLM.
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from database import db
+from deadline import run_db, run_db_write
+from config import MAPPING_CACHE_MIN_CONFIDENCE
+
+
+def _normalize_column(column: str) -> str:
+    return re.sub(r"\s+", " ", column or "").strip().lower()
+
+
+def header_signature(columns: List[str]) -> str:
+    """Order- and case-insensitive fingerprint of a CSV header row"""
+    normalized = sorted(_normalize_column(col) for col in columns if _normalize_column(col))
+    return hashlib.sha1("|".join(normalized).encode("utf-8")).hexdigest()[:16]
+
+
+def align_mapping(mapping: Dict[str, str], columns: List[str]) -> Dict[str, str]:
+    """Re-key a cached mapping onto this file's exact column spelling"""
+    by_normalized = {_normalize_column(col): col for col in columns}
+    aligned = {}
+    for csv_col, target_field in mapping.items():
+        actual = by_normalized.get(_normalize_column(csv_col))
+        if actual is not None:
+            aligned[actual] = target_field
+    return aligned
+
+
+class ColumnMappingCache:
+    """In-process cache in front of the csv_column_mappings table"""
+
+    def __init__(self, min_confidence: float):
+        self.min_confidence = min_confidence
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_trusted(self, entry: Dict[str, Any]) -> bool:
+        return bool(entry.get("confirmed")) or entry.get("confidence", 0) >= self.min_confidence
+
+    async def get(self, organization_id: str, signature: str) -> Optional[Dict[str, Any]]:
+        key = (organization_id, signature)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            try:
+                entry = await run_db(db.get_column_mapping, organization_id, signature)
+            except Exception as e:
+                print(f"⚠️ Column mapping lookup failed: {e}")
+                entry = None
+            if entry:
+                self._entries[key] = entry
+
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    async def put(
+        self,
+        organization_id: str,
+        signature: str,
+        columns: List[str],
+        analysis: Dict[str, Any],
+        confirmed: bool = False
+    ) -> Dict[str, Any]:
+        entry = {
+            "organization_id": organization_id,
+            "header_signature": signature,
+            "columns": columns,
+            "mapping": analysis.get("mapping", {}),
+            "confidence": analysis.get("confidence", 0),
+            "warnings": analysis.get("warnings", []),
+            "confirmed": confirmed,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        self._entries[(organization_id, signature)] = entry
+
+        try:
+            await run_db_write(db.save_column_mapping, entry)
+        except Exception as e:
+            print(f"⚠️ Column mapping not persisted: {e}")
+        return entry
+
+    async def confirm(
+        self,
+        organization_id: str,
+        signature: str,
+        mapping: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Mark a mapping as human-confirmed, optionally replacing it"""
+        entry = await self.get(organization_id, signature)
+        if entry is None and mapping is None:
+            return None
+
+        analysis = {
+            "mapping": mapping if mapping is not None else entry["mapping"],
+            "confidence": 1.0,
+            "warnings": []
+        }
+        columns = entry["columns"] if entry else list(analysis["mapping"].keys())
+        return await self.put(organization_id, signature, columns, analysis, confirmed=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "min_confidence": self.min_confidence
+        }
+
+
+mapping_cache = ColumnMappingCache(min_confidence=MAPPING_CACHE_MIN_CONFIDENCE)
@@ -1,35 +1,46 @@
 """
 Migration Service - AI-powered CSV analysis and import
+Uploads are streamed: decompress/decode -> parse -> transform -> categorize -> bulk insert,
+with bounded queues between stages so memory stays flat regardless of file size.
 """
-from anthropic import Anthropic
-import os
+import asyncio
 import json
-import csv
-from io import StringIO
-from datetime import datetime
-
-claude = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+from typing import List, Dict, Any
+
+from llm_gateway import llm, AdmissionRejected
+from database import db
+from project_service import FinanceAssistant
+from mapping_cache import mapping_cache, header_signature, align_mapping
+from row_sources import open_row_source
+from column_formats import infer_formats, transform_batch
+from duplicate_index import DuplicateIndex
+from config import (
+    IMPORT_BATCH_SIZE, IMPORT_QUEUE_DEPTH, FORMAT_SAMPLE_ROWS, ROW_COUNT_SCAN_MAX_BYTES,
+    NEAR_DUPLICATE_DAYS, DUPLICATE_REPORT_LIMIT,
+    IMPORT_CATEGORIZE_CONCURRENCY, IMPORT_ADMISSION_RETRIES, IMPORT_ERROR_REPORT_LIMIT
+)
+
+
+async def _run_stages(*stages):
+    """Run pipeline stages together; if one fails, cancel the others so none hang on a queue"""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
 
 
 class MigrationService:
     """AI-powered migration toolkit"""
 
     @staticmethod
-    async def analyze_csv(csv_content: str) -> dict:
-        try:
-            csv_file = StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            rows = list(reader)
-
-            if not rows:
-                return {"success": False, "error": "Empty CSV file"}
-
-            columns = list(rows[0].keys())
-
-            prompt = f"""Analyze this CSV structure and map fields for expense import.
+    async def map_columns(columns: List[str], sample_row: Dict[str, Any]) -> dict:
+        prompt = f"""Analyze this CSV structure and map fields for expense import.
 
 CSV Columns: {', '.join(columns)}
-Sample Row: {json.dumps(rows[0])}
+Sample Row: {json.dumps(sample_row)}
 
 Expected Target Fields:
 - expense_date (date of expense)
@@ -46,107 +57,317 @@ Return ONLY valid JSON:
   "warnings": ["any issues"]
 }}"""
 
-            response = claude.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
-            )
+        response = await llm.create_message(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=500,
+            messages=[{"role": "user", "content": prompt}]
+        )
 
-            content = response.content[0].text
+        content = response.content[0].text
 
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
 
-            mapping = json.loads(content)
+        return json.loads(content)
 
+    @staticmethod
+    async def resolve_mapping(
+        organization_id: str,
+        columns: List[str],
+        sample_row: Dict[str, Any],
+        expected_signature: str = None
+    ) -> Dict[str, Any]:
+        """
+        Mapping for this header: a confirmed or confident cached one, the one
+        a preceding analyze-csv call produced, or a fresh LLM mapping. A fresh
+        mapping replaces a cached one only if it is confident; otherwise the
+        cached one stands, so what was previewed is what gets imported.
+        """
+        signature = header_signature(columns)
+        cached = await mapping_cache.get(organization_id, signature)
+
+        def from_cache(entry: Dict[str, Any]) -> Dict[str, Any]:
             return {
-                "success": True,
-                "original_columns": columns,
-                "mapping": mapping,
-                "preview": rows[:3],
-                "total_rows": len(rows)
+                "header_signature": signature,
+                "source": "confirmed" if entry.get("confirmed") else "cache",
+                "mapping": {
+                    "mapping": align_mapping(entry["mapping"], columns),
+                    "confidence": entry.get("confidence", 0),
+                    "warnings": entry.get("warnings", [])
+                },
+                "needs_confirmation": not mapping_cache.is_trusted(entry)
             }
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        if cached and (signature == expected_signature or mapping_cache.is_trusted(cached)):
+            return from_cache(cached)
 
-    @staticmethod
-    def parse_date(date_str: str) -> str:
-        if not date_str:
-            return datetime.now().strftime('%Y-%m-%d')
-
-        formats = [
-            '%Y-%m-%d',
-            '%m/%d/%Y',
-            '%d/%m/%Y',
-            '%Y/%m/%d',
-            '%m-%d-%Y',
-            '%d-%m-%Y',
-        ]
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(str(date_str), fmt).strftime('%Y-%m-%d')
-            except:
-                continue
+        analysis = await MigrationService.map_columns(columns, sample_row)
+        if cached and analysis.get("confidence", 0) < mapping_cache.min_confidence:
+            return from_cache(cached)
+        entry = await mapping_cache.put(organization_id, signature, columns, analysis)
 
-        return datetime.now().strftime('%Y-%m-%d')
+        return {
+            "header_signature": signature,
+            "source": "ai",
+            "mapping": analysis,
+            "needs_confirmation": not mapping_cache.is_trusted(entry)
+        }
 
     @staticmethod
-    async def import_expenses(csv_content: str, organization_id: str) -> dict:
+    async def analyze_csv(csv_file, organization_id: str) -> dict:
+        """
+        Mapping, formats and preview from the header plus a bounded sample;
+        the rest of the file is never parsed here.
+        """
+        source = None
         try:
-            analysis = await MigrationService.analyze_csv(csv_content)
+            source = await open_row_source(csv_file, ROW_COUNT_SCAN_MAX_BYTES)
+            sample = await source.peek(FORMAT_SAMPLE_ROWS)
 
-            if not analysis['success']:
-                return analysis
+            if not sample:
+                return {"success": False, "error": "Empty CSV file"}
 
-            csv_file = StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            rows = list(reader)
+            resolved = await MigrationService.resolve_mapping(
+                organization_id, source.columns, sample[0]
+            )
+            formats = infer_formats(sample, resolved["mapping"]["mapping"])
 
-            mapping = analysis['mapping']['mapping']
-            transformed_rows = []
+            if len(sample) < FORMAT_SAMPLE_ROWS:
+                # The sample is the whole file
+                row_count = {"total_rows": len(sample), "total_rows_method": "parsed", "total_rows_estimated": False}
+            else:
+                row_count = await asyncio.to_thread(source.count_rows, sample)
 
-            for row in rows:
-                transformed = {}
+            return {
+                "success": True,
+                "original_columns": source.columns,
+                **source.describe(),
+                "mapping": resolved["mapping"],
+                "header_signature": resolved["header_signature"],
+                "mapping_source": resolved["source"],
+                "needs_confirmation": resolved["needs_confirmation"],
+                "formats": formats["columns"],
+                "format_warnings": formats["warnings"],
+                "preview": sample[:3],
+                **row_count
+            }
 
-                for csv_col, target_field in mapping.items():
-                    if csv_col in row and row[csv_col]:
-                        value = row[csv_col].strip()
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            if source is not None:
+                source.close()
 
-                        if target_field == 'expense_date':
-                            value = MigrationService.parse_date(value)
-                        elif target_field == 'amount':
-                            value = value.replace('$', '').replace(',', '').strip()
-                            try:
-                                value = float(value)
-                            except:
-                                value = 0
+    @staticmethod
+    async def _categorize_row(expense_data: Dict[str, Any], organization_id: str) -> Dict[str, Any]:
+        ai_result = await FinanceAssistant.categorize_expense(
+            description=expense_data.get('description', ''),
+            amount=float(expense_data.get('amount', 0)),
+            vendor=expense_data.get('vendor')
+        )
+
+        expense_data['category'] = ai_result.get('category', 'Other')
+        expense_data['ai_categorized'] = True
+        expense_data['ai_category_confidence'] = ai_result.get('confidence', 0)
+        expense_data['organization_id'] = organization_id
+        expense_data['status'] = 'pending'
+        return expense_data
 
-                        transformed[target_field] = value
+    @staticmethod
+    def _uncategorized_row(expense_data: Dict[str, Any], organization_id: str) -> Dict[str, Any]:
+        """Row whose categorization failed, imported as 'Other' for review"""
+        expense_data['category'] = 'Other'
+        expense_data['ai_categorized'] = False
+        expense_data['ai_category_confidence'] = 0
+        expense_data['organization_id'] = organization_id
+        expense_data['status'] = 'pending'
+        return expense_data
 
-                if 'description' not in transformed or not transformed['description']:
-                    transformed['description'] = 'Unknown Expense'
+    @staticmethod
+    async def _categorize_with_retry(expense_data: Dict[str, Any], organization_id: str) -> Dict[str, Any]:
+        """Categorize one row, waiting out admission rejections from the shared model limits"""
+        for attempt in range(IMPORT_ADMISSION_RETRIES + 1):
+            try:
+                return await MigrationService._categorize_row(expense_data, organization_id)
+            except AdmissionRejected as e:
+                if attempt == IMPORT_ADMISSION_RETRIES:
+                    raise
+                await asyncio.sleep(e.retry_after)
 
-                if 'amount' not in transformed:
-                    transformed['amount'] = 0
+    @staticmethod
+    async def import_expenses(
+        csv_file,
+        organization_id: str,
+        header_signature: str = None,
+        job_id: str = None,
+        start_row: int = 0,
+        on_commit=None,
+        cancel_event: asyncio.Event = None
+    ) -> dict:
+        """
+        Stream-import a CSV. Rows are numbered from 1 in file order; rows at or
+        below `start_row` were committed by an earlier run and are skipped.
+        With a job_id, rows are tagged (import_job_id, import_row) and upserted,
+        so re-running a batch after a crash never duplicates it, and `on_commit`
+        is awaited after each batch with its checkpoint and counts.
+        Rows matching an existing expense or an earlier row of the file are
+        dropped before categorization and listed in the duplicate report.
+        """
+        source = None
+        try:
+            source = await open_row_source(csv_file)
+            sample = await source.peek(FORMAT_SAMPLE_ROWS)
 
-                if 'expense_date' not in transformed:
-                    transformed['expense_date'] = datetime.now().strftime('%Y-%m-%d')
+            if not sample:
+                return {"success": False, "error": "Empty CSV file"}
 
-                transformed_rows.append(transformed)
+            resolved = await MigrationService.resolve_mapping(
+                organization_id, source.columns, sample[0], header_signature
+            )
+            analysis = resolved['mapping']
+            mapping = analysis['mapping']
+            formats = infer_formats(sample, mapping)
+
+            parsed = asyncio.Queue(maxsize=IMPORT_QUEUE_DEPTH)
+            categorized = asyncio.Queue(maxsize=IMPORT_QUEUE_DEPTH)
+            stats = {"total": 0, "imported": 0, "failed": 0, "uncategorized": 0, "last_row": start_row}
+            duplicates = DuplicateIndex(organization_id, NEAR_DUPLICATE_DAYS, job_id, start_row)
+            duplicate_report = {"exact": 0, "near": 0, "rows": []}
+            errors: List[Dict[str, Any]] = []
+
+            async def parse_stage():
+                row_number = 0
+                async for batch in source.batches(IMPORT_BATCH_SIZE):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+
+                    first_row = row_number + 1
+                    row_number += len(batch)
+                    if row_number <= start_row:
+                        continue
+
+                    skip = max(0, start_row - first_row + 1)
+                    transformed_rows = transform_batch(batch[skip:], mapping, formats)
+                    await duplicates.load_for(transformed_rows)
+
+                    rows = []
+                    row_numbers = []
+                    skipped = 0
+                    for offset, transformed in enumerate(transformed_rows):
+                        import_row = first_row + skip + offset
+                        found = duplicates.check(transformed, f"row {import_row}")
+                        if found is not None:
+                            skipped += 1
+                            duplicate_report[found["kind"]] += 1
+                            if len(duplicate_report["rows"]) < DUPLICATE_REPORT_LIMIT:
+                                duplicate_report["rows"].append({
+                                    "row": import_row,
+                                    **found,
+                                    "expense_date": transformed.get("expense_date"),
+                                    "amount": transformed.get("amount"),
+                                    "description": transformed.get("description"),
+                                    "vendor": transformed.get("vendor")
+                                })
+                            continue
+                        if job_id:
+                            transformed['import_job_id'] = job_id
+                            transformed['import_row'] = import_row
+                        rows.append(transformed)
+                        row_numbers.append(import_row)
+
+                    stats["total"] += len(transformed_rows)
+                    await parsed.put({
+                        "last_row": row_number,
+                        "rows": rows,
+                        "row_numbers": row_numbers,
+                        "duplicates": skipped
+                    })
+                await parsed.put(None)
+
+            def record_error(row, stage: str, error: Any):
+                if len(errors) < IMPORT_ERROR_REPORT_LIMIT:
+                    errors.append({"row": row, "stage": stage, "error": str(error)})
+
+            # Shared across batches; the per-model limiters in llm_gateway still apply on top
+            categorize_slots = asyncio.Semaphore(IMPORT_CATEGORIZE_CONCURRENCY)
+
+            async def categorize_one(expense_data: Dict[str, Any]):
+                async with categorize_slots:
+                    return await MigrationService._categorize_with_retry(expense_data, organization_id)
+
+            async def categorize_stage():
+                while (batch := await parsed.get()) is not None:
+                    # gather keeps results in file order
+                    results = await asyncio.gather(
+                        *(categorize_one(expense_data) for expense_data in batch["rows"]),
+                        return_exceptions=True
+                    )
+                    ready = []
+                    for expense_data, row, result in zip(batch["rows"], batch["row_numbers"], results):
+                        if isinstance(result, asyncio.CancelledError):
+                            raise result
+                        if isinstance(result, BaseException):
+                            # Kept rather than dropped: the checkpoint moves past this batch,
+                            # so a resume would never see the row again
+                            record_error(row, "categorize", f"{result} (imported as Other)")
+                            stats["uncategorized"] += 1
+                            result = MigrationService._uncategorized_row(expense_data, organization_id)
+                        ready.append(result)
+                    await categorized.put({**batch, "rows": ready, "failed": 0})
+                await categorized.put(None)
+
+            async def insert_stage():
+                while (batch := await categorized.get()) is not None:
+                    inserted = 0
+                    failed = batch["failed"]
+                    try:
+                        if job_id:
+                            inserted = len(await asyncio.to_thread(db.upsert_import_expenses, batch["rows"]))
+                        else:
+                            inserted = len(await asyncio.to_thread(db.create_expenses, batch["rows"]))
+                    except Exception as e:
+                        if job_id:
+                            # Leave the checkpoint behind this batch so a resume retries it
+                            raise
+                        failed += len(batch["rows"])
+                        first = batch["row_numbers"][0] if batch["row_numbers"] else None
+                        record_error(first, "insert", e)
+
+                    stats["imported"] += inserted
+                    stats["failed"] += failed
+                    stats["last_row"] = batch["last_row"]
+                    if on_commit is not None:
+                        await on_commit(batch["last_row"], inserted, failed, batch["duplicates"], source.bytes_read())
+
+            await _run_stages(parse_stage(), categorize_stage(), insert_stage())
 
             return {
                 "success": True,
-                "transformed_data": transformed_rows,
-                "preview": transformed_rows[:3],
-                "original_columns": analysis['original_columns'],
-                "total_rows": len(transformed_rows),
-                "mapping": analysis['mapping'],
-                "analysis": "Successfully mapped and transformed all rows"
+                "imported": stats["imported"],
+                "failed": stats["failed"],
+                "uncategorized": stats["uncategorized"],
+                "duplicates": duplicate_report["exact"] + duplicate_report["near"],
+                "total": stats["total"],
+                "last_row": stats["last_row"],
+                "cancelled": cancel_event is not None and cancel_event.is_set(),
+                "original_columns": source.columns,
+                **source.describe(),
+                "mapping": analysis,
+                "format_warnings": formats["warnings"],
+                "duplicate_report": duplicate_report,
+                "errors": errors,
+                "header_signature": resolved["header_signature"],
+                "mapping_source": resolved["source"]
             }
 
+        except AdmissionRejected:
+            raise
         except Exception as e:
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+        finally:
+            if source is not None:
+                source.close()
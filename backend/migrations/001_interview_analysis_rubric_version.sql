@@ -0,0 +1,15 @@
+-- Analyses are upserted on interview_id and tagged with the rubric they were scored
+-- under (see DatabaseService.save_analysis and reanalysis.py).
+
+ALTER TABLE interview_analysis
+    ADD COLUMN IF NOT EXISTS rubric_version text;
+
+-- Earlier saves inserted a new row per analysis; keep one row per interview (the last
+-- one stored) before adding the unique index.
+DELETE FROM interview_analysis older
+USING interview_analysis newer
+WHERE older.interview_id = newer.interview_id
+  AND older.ctid < newer.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS interview_analysis_interview_id_key
+    ON interview_analysis (interview_id);
@@ -0,0 +1,31 @@
+-- Precomputed candidate ranking index, one row per analyzed interview
+-- (see DatabaseService._index_rankings and GET /api/interviews/rankings).
+
+CREATE TABLE IF NOT EXISTS candidate_rankings (
+    interview_id uuid PRIMARY KEY REFERENCES interviews (id) ON DELETE CASCADE,
+    organization_id uuid NOT NULL,
+    position text,
+    position_key text NOT NULL DEFAULT '',
+    candidate_name text,
+    interview_date timestamptz,
+    recommendation text,
+    rubric_version text,
+    overall_score integer,
+    technical_score integer,
+    communication_score integer,
+    cultural_fit_score integer
+);
+
+-- Top-K per position by each score; interview_id breaks ties for stable paging
+CREATE INDEX IF NOT EXISTS candidate_rankings_position_overall
+    ON candidate_rankings (organization_id, position_key, overall_score DESC, interview_id);
+CREATE INDEX IF NOT EXISTS candidate_rankings_position_technical
+    ON candidate_rankings (organization_id, position_key, technical_score DESC, interview_id);
+CREATE INDEX IF NOT EXISTS candidate_rankings_position_communication
+    ON candidate_rankings (organization_id, position_key, communication_score DESC, interview_id);
+CREATE INDEX IF NOT EXISTS candidate_rankings_position_cultural_fit
+    ON candidate_rankings (organization_id, position_key, cultural_fit_score DESC, interview_id);
+
+-- Organization-wide rankings (no position filter)
+CREATE INDEX IF NOT EXISTS candidate_rankings_org_overall
+    ON candidate_rankings (organization_id, overall_score DESC, interview_id);
@@ -0,0 +1,38 @@
+-- Background CSV/XLSX imports (see import_jobs.py and MigrationService.import_expenses).
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id uuid PRIMARY KEY,
+    organization_id uuid NOT NULL,
+    filename text,
+    file_path text,
+    file_size bigint,
+    header_signature text,
+    status text NOT NULL DEFAULT 'queued',
+    processed_rows integer NOT NULL DEFAULT 0,
+    imported_rows integer NOT NULL DEFAULT 0,
+    failed_rows integer NOT NULL DEFAULT 0,
+    duplicate_rows integer NOT NULL DEFAULT 0,
+    last_committed_row integer NOT NULL DEFAULT 0,
+    bytes_processed bigint NOT NULL DEFAULT 0,
+    error text,
+    duplicate_report jsonb,
+    row_errors jsonb,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Per-organization job history, and queued/running jobs resumed at startup
+CREATE INDEX IF NOT EXISTS import_jobs_organization_created
+    ON import_jobs (organization_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS import_jobs_status_created
+    ON import_jobs (status, created_at);
+
+-- Imported expenses remember the job and source row that wrote them
+ALTER TABLE expenses
+    ADD COLUMN IF NOT EXISTS import_job_id uuid REFERENCES import_jobs (id) ON DELETE SET NULL,
+    ADD COLUMN IF NOT EXISTS import_row integer;
+
+-- Conflict target of upsert_import_expenses: a resumed job skips rows it already wrote.
+-- Expenses not created by an import have NULLs here and never conflict.
+CREATE UNIQUE INDEX IF NOT EXISTS expenses_import_job_row_key
+    ON expenses (import_job_id, import_row);
@@ -0,0 +1,21 @@
+-- Column mappings cached per organization and CSV header (see mapping_cache.py).
+
+CREATE TABLE IF NOT EXISTS csv_column_mappings (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    organization_id uuid NOT NULL,
+    header_signature text NOT NULL,
+    columns jsonb NOT NULL DEFAULT '[]'::jsonb,
+    mapping jsonb NOT NULL DEFAULT '{}'::jsonb,
+    confidence double precision NOT NULL DEFAULT 0,
+    warnings jsonb NOT NULL DEFAULT '[]'::jsonb,
+    confirmed boolean NOT NULL DEFAULT false,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Conflict target of save_column_mapping, and the lookup key of get_column_mapping
+CREATE UNIQUE INDEX IF NOT EXISTS csv_column_mappings_org_signature_key
+    ON csv_column_mappings (organization_id, header_signature);
+
+-- get_column_mappings lists an organization's mappings newest first
+CREATE INDEX IF NOT EXISTS csv_column_mappings_org_updated
+    ON csv_column_mappings (organization_id, updated_at DESC);
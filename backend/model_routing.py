@@ -0,0 +1,94 @@
+"""
+Model Routing - Fastest model first, escalating per step on low confidence or bad output
+Each orchestrator step has an ordered model list and a confidence threshold. Every attempt
+is logged and counted, so the per-step policy can be tuned from /api/metrics.
+"""
+import time
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from llm_gateway import AdmissionRejected
+from deadline import DeadlineExceeded
+from config import ORCHESTRATOR_MODEL_POLICY
+
+
+class ModelRouter:
+
+    def __init__(self, policies: Dict[str, Dict[str, Any]]):
+        self.policies = policies
+        # step -> model -> counters
+        self.stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    def _record(self, step: str, model: str, outcome: str, seconds: float, confidence: Optional[float]):
+        counters = self.stats.setdefault(step, {}).setdefault(model, {
+            "attempts": 0, "accepted": 0, "low_confidence": 0, "invalid": 0, "rejected": 0,
+            "total_seconds": 0.0, "confidence_sum": 0.0, "confidence_count": 0
+        })
+        counters["attempts"] += 1
+        counters[outcome] += 1
+        counters["total_seconds"] += seconds
+        if confidence is not None:
+            counters["confidence_sum"] += confidence
+            counters["confidence_count"] += 1
+        shown = f" confidence={confidence:.2f}" if confidence is not None else ""
+        print(f"🔀 {step}: {model} {outcome}{shown} in {seconds:.2f}s")
+
+    async def run(self, step: str, attempt: Callable[[str], Awaitable[Tuple[Any, Optional[float]]]]) -> Any:
+        """
+        Call `attempt(model)` down the step's model list. It returns (result, confidence)
+        or raises when the output is unusable; a confidence of None is always accepted.
+        The last model's answer is taken as is; if every model failed the last error is raised.
+        """
+        policy = self.policies[step]
+        models = policy["models"]
+        threshold = policy.get("min_confidence")
+        fallback = None
+        last_error: Optional[Exception] = None
+
+        for index, model in enumerate(models):
+            is_last = index == len(models) - 1
+            started = time.monotonic()
+            try:
+                result, confidence = await attempt(model)
+            except DeadlineExceeded:
+                raise
+            except AdmissionRejected as e:
+                self._record(step, model, "rejected", time.monotonic() - started, None)
+                if is_last and fallback is None:
+                    raise
+                last_error = e
+                continue
+            except Exception as e:
+                self._record(step, model, "invalid", time.monotonic() - started, None)
+                last_error = e
+                continue
+
+            if confidence is None or threshold is None or confidence >= threshold or is_last:
+                self._record(step, model, "accepted", time.monotonic() - started, confidence)
+                return result
+            self._record(step, model, "low_confidence", time.monotonic() - started, confidence)
+            fallback = result
+
+        # A low-confidence answer beats none when the stronger model failed outright
+        if fallback is not None:
+            return fallback
+        raise last_error or ValueError(f"No models configured for step '{step}'")
+
+    def snapshot(self) -> Dict[str, Any]:
+        steps = {}
+        for step, policy in self.policies.items():
+            models = {}
+            for model, c in self.stats.get(step, {}).items():
+                models[model] = {
+                    "attempts": c["attempts"],
+                    "accepted": c["accepted"],
+                    "low_confidence": c["low_confidence"],
+                    "invalid": c["invalid"],
+                    "rejected": c["rejected"],
+                    "avg_seconds": round(c["total_seconds"] / c["attempts"], 3),
+                    "avg_confidence": round(c["confidence_sum"] / c["confidence_count"], 3) if c["confidence_count"] else None
+                }
+            steps[step] = {"policy": policy, "models": models}
+        return steps
+
+
+model_router = ModelRouter(ORCHESTRATOR_MODEL_POLICY)
@@ -19,6 +19,17 @@ class InterviewAnalysisRequest(BaseModel):
     interview_id: str
 
 
+class OpenerWarmRequest(BaseModel):
+    organization_id: str
+    positions: List[str] = Field(..., min_length=1)
+
+
+class ReanalysisRequest(BaseModel):
+    # Runs across all organizations are CLI-only (python reanalysis.py)
+    organization_id: str
+    limit: Optional[int] = Field(None, ge=1)
+
+
 class InterviewResponse(BaseModel):
     success: bool
     interview_id: str
@@ -30,7 +41,9 @@ class InterviewResponse(BaseModel):
 
 class AnalysisResponse(BaseModel):
     success: bool
-    analysis: Dict[str, Any]
+    status: str = "completed"
+    analysis: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 
 class InterviewListResponse(BaseModel):
@@ -38,6 +51,16 @@ class InterviewListResponse(BaseModel):
     interviews: List[Dict[str, Any]]
 
 
+class CandidateRankingResponse(BaseModel):
+    success: bool
+    sort_by: str
+    total: int
+    limit: int
+    offset: int
+    next_offset: Optional[int] = None
+    candidates: List[Dict[str, Any]]
+
+
 class InterviewDetailsResponse(BaseModel):
     success: bool
     interview: Dict[str, Any]
@@ -71,6 +94,12 @@ class ExpenseCreateRequest(BaseModel):
     organization_id: str
 
 
+class ColumnMappingConfirmRequest(BaseModel):
+    organization_id: str
+    header_signature: str
+    mapping: Optional[Dict[str, str]] = None
+
+
 class ExpenseResponse(BaseModel):
     success: bool
     expense: Dict[str, Any]
@@ -79,4 +108,6 @@ class ExpenseResponse(BaseModel):
     ai_insights: Optional[str] = None
     categorization_model: Optional[str] = None
     analysis_model: Optional[str] = None
-    tier: Optional[int] = None
\ No newline at end of file
+    tier: Optional[int] = None
+    partial: bool = False
+    skipped_steps: Optional[List[str]] = None
\ No newline at end of file
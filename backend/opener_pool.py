@@ -0,0 +1,121 @@
+"""
+Opener Pool - Pre-generated interview greetings per organization and position
+Openers are written once with a name placeholder, refilled in the background, and
+personalized at request time, so starting an interview doesn't wait on Sonnet.
+"""
+import asyncio
+import json
+import random
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from llm_gateway import llm
+from interview_service import InterviewConductor
+from single_flight import normalize_text
+from config import OPENER_POOL_SIZE, OPENER_POOL_REFILL_AT, OPENER_POOL_MAX_KEYS
+
+NAME_PLACEHOLDER = "[CANDIDATE]"
+
+
+class OpenerPool:
+
+    def __init__(self, size: int, refill_at: int, max_keys: int):
+        self.size = size
+        self.refill_at = refill_at
+        self.max_keys = max_keys
+        # (organization_id, normalized position) -> openers, least recently used first
+        self._pools: "OrderedDict[Tuple[str, str], List[str]]" = OrderedDict()
+        self._refills: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+
+    @staticmethod
+    def _key(organization_id: str, position: str) -> Tuple[str, str]:
+        return (organization_id, normalize_text(position).lower())
+
+    def take(self, organization_id: str, position: str, candidate_name: str) -> Optional[str]:
+        """A personalized opener if one is ready; starts a refill when the pool runs low"""
+        key = self._key(organization_id, position)
+        pool = self._pools.get(key)
+
+        opener = None
+        if pool:
+            self._pools.move_to_end(key)
+            opener = pool.pop(random.randrange(len(pool)))
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        if pool is None or len(pool) <= self.refill_at:
+            self.warm(organization_id, position)
+
+        return opener.replace(NAME_PLACEHOLDER, candidate_name) if opener else None
+
+    def warm(self, organization_id: str, position: str):
+        """Top the pool up in the background; at most one refill per key at a time"""
+        key = self._key(organization_id, position)
+        if key in self._refills:
+            return
+        self._refills[key] = asyncio.create_task(self._refill(key, position))
+
+    async def _refill(self, key: Tuple[str, str], position: str):
+        try:
+            missing = self.size - len(self._pools.get(key, []))
+            if missing <= 0:
+                return
+            openers = await self._generate(position, missing)
+            self.generated += len(openers)
+
+            self._pools.setdefault(key, []).extend(openers)
+            self._pools.move_to_end(key)
+            while len(self._pools) > self.max_keys:
+                self._pools.popitem(last=False)
+        except Exception as e:
+            print(f"⚠️ Opener refill failed for {position}: {e}")
+        finally:
+            self._refills.pop(key, None)
+
+    @staticmethod
+    async def _generate(position: str, count: int) -> List[str]:
+        conductor = InterviewConductor(position=position, candidate_name=NAME_PLACEHOLDER)
+        response = await llm.create_message(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=200 * count,
+            system=conductor.get_system_prompt(),
+            messages=[{
+                "role": "user",
+                "content": f"""Write {count} different ways to start this interview: a warm greeting followed by your first question.
+Vary the wording and the first question between them. Refer to the candidate only as {NAME_PLACEHOLDER}.
+
+Return ONLY a JSON array of {count} strings."""
+            }],
+            temperature=1.0,
+            # Identical refill prompts must not share one answer
+            coalesce=False
+        )
+
+        content = response.content[0].text
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+
+        openers = json.loads(content)
+        return [
+            opener.strip() for opener in openers
+            if isinstance(opener, str) and opener.strip()
+        ][:count]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pools": len(self._pools),
+            "ready_openers": sum(len(pool) for pool in self._pools.values()),
+            "refilling": len(self._refills),
+            "hits": self.hits,
+            "misses": self.misses,
+            "generated": self.generated
+        }
+
+
+opener_pool = OpenerPool(size=OPENER_POOL_SIZE, refill_at=OPENER_POOL_REFILL_AT, max_keys=OPENER_POOL_MAX_KEYS)
@@ -2,15 +2,106 @@
 Unified AI Orchestrator - The Brain of Project Lightning
 Routes natural language commands to appropriate modules
 """
-from anthropic import Anthropic
+import asyncio
 import json
-import os
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional, Literal
+from pydantic import BaseModel, Field, ValidationError
 from database import db
-from project_service import ProjectCoordinator, FinanceAssistant
+from project_service import ProjectCoordinator, FinanceAssistant, EXPENSE_CATEGORIES
 from interview_service import InterviewConductor
+from llm_gateway import llm, AdmissionRejected
+from deadline import DeadlineExceeded, run_db, run_db_write
+from model_routing import model_router
+from config import FUSED_CATEGORY_MIN_CONFIDENCE, MULTI_EXPENSE_MAX_ITEMS, MULTI_EXPENSE_CONCURRENCY
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+INTERPRET_SYSTEM = """You route commands for Project Lightning, a business assistant.
+
+MODULES:
+- "finance" - anything about expenses, costs, budgets, payments, receipts
+- "project" - anything about projects, tasks, clients, deliverables, deadlines
+- "hr" - anything about hiring, interviews, candidates, employees, team
+- "general" - questions, help, status checks, greetings
+
+ACTIONS:
+- "create" - add/create something new
+- "read" - view/show/list/get information
+- "update" - modify/change something
+- "delete" - remove something
+- "chat" - conversation/question
+- "analyze" - get insights/reports
+
+When the user is adding expenses, also fill in "expenses" with one entry per expense: what
+was purchased, the amount, who was paid, the date (YYYY-MM-DD or "today") and its category.
+Example: "Lunch at Chipotle $47" -> description "Lunch", amount 47.0, vendor "Chipotle",
+date "today", category "Client Meetings" or "Other" depending on context.
+A message can list several: "add these: coffee $5, Uber $23, Figma $15" is three entries."""
+
+# Output tokens per extra listed expense, on top of a single-command interpretation
+TOKENS_PER_EXTRA_ITEM = 60
+AMOUNT_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+INTERPRET_TOOL = {
+    "name": "route_command",
+    "description": "Record the user's intent and, for new expenses, the expense details and category.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "module": {"type": "string", "enum": ["finance", "project", "hr", "general"]},
+            "action": {"type": "string", "enum": ["create", "read", "update", "delete", "chat", "analyze"]},
+            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+            "entities": {
+                "type": "object",
+                "properties": {
+                    "description": {"type": "string"},
+                    "amount": {"type": "number"},
+                    "project_name": {"type": "string"},
+                    "candidate_name": {"type": "string"}
+                }
+            },
+            "expenses": {
+                "type": "array",
+                "description": "Only when module is finance and action is create; one entry per expense",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": {"type": "string"},
+                        "amount": {"type": "number"},
+                        "vendor": {"type": ["string", "null"]},
+                        "date": {"type": "string"},
+                        "category": {"type": "string", "enum": list(EXPENSE_CATEGORIES)},
+                        "category_confidence": {"type": "number", "minimum": 0, "maximum": 1}
+                    },
+                    "required": ["description", "amount", "category", "category_confidence"]
+                }
+            }
+        },
+        "required": ["module", "action", "confidence"]
+    }
+}
+
+
+class ExpenseFields(BaseModel):
+    description: str = Field(..., min_length=1)
+    amount: float = Field(..., ge=0)
+    vendor: Optional[str] = None
+    date: str = "today"
+    category: Literal[EXPENSE_CATEGORIES]
+    category_confidence: float = Field(..., ge=0, le=1)
+
+
+class CommandInterpretation(BaseModel):
+    module: Literal["finance", "project", "hr", "general"]
+    action: Literal["create", "read", "update", "delete", "chat", "analyze"]
+    confidence: float = Field(..., ge=0, le=1)
+    entities: Dict[str, Any] = {}
+    expenses: Optional[List[ExpenseFields]] = None
+
+
+def _item_token_allowance(message: str) -> int:
+    """Extra output tokens for a message that looks like it lists several amounts"""
+    listed = min(len(AMOUNT_PATTERN.findall(message)), MULTI_EXPENSE_MAX_ITEMS + 1)
+    return TOKENS_PER_EXTRA_ITEM * max(0, listed - 1)
 
 
 class UnifiedOrchestrator:
@@ -22,44 +113,63 @@ class UnifiedOrchestrator:
     async def process_command(
         user_message: str,
         organization_id: str,
-        conversation_history: list = None
+        conversation_context: str = ""
     ) -> Dict[str, Any]:
         """
-        Main entry point: Takes natural language, returns action + response
+        Main entry point: Takes natural language, returns action + response.
+        `conversation_context` is the session's summary and recent turns as text.
         """
 
         print(f"\n🧠 ORCHESTRATOR: Processing command...")
         print(f"📝 User said: {user_message}")
 
-        # Step 1: Classify user intent
-        intent = await UnifiedOrchestrator._classify_intent(
-            user_message,
-            conversation_history or []
-        )
-
-        print(f"🎯 Detected: {intent['module']} - {intent['action']}")
-
-        # Step 2: Route to appropriate module
-        if intent['module'] == 'finance':
-            result = await UnifiedOrchestrator._handle_finance(
-                user_message, intent, organization_id
-            )
-        elif intent['module'] == 'project':
-            result = await UnifiedOrchestrator._handle_project(
-                user_message, intent, organization_id
-            )
-        elif intent['module'] == 'hr':
-            result = await UnifiedOrchestrator._handle_hr(
-                user_message, intent, organization_id
-            )
-        elif intent['module'] == 'general':
-            result = await UnifiedOrchestrator._handle_general(
-                user_message, intent, organization_id
+        intent = None
+        try:
+            # Step 1: Intent (and expense details) in one structured call,
+            # falling back to plain classification if that fails validation
+            intent = await UnifiedOrchestrator._interpret_command(
+                user_message,
+                conversation_context
             )
-        else:
+            if intent is None:
+                intent = await UnifiedOrchestrator._classify_intent(
+                    user_message,
+                    conversation_context
+                )
+
+            print(f"🎯 Detected: {intent['module']} - {intent['action']}")
+
+            # Step 2: Route to appropriate module
+            if intent['module'] == 'finance':
+                result = await UnifiedOrchestrator._handle_finance(
+                    user_message, intent, organization_id
+                )
+            elif intent['module'] == 'project':
+                result = await UnifiedOrchestrator._handle_project(
+                    user_message, intent, organization_id
+                )
+            elif intent['module'] == 'hr':
+                result = await UnifiedOrchestrator._handle_hr(
+                    user_message, intent, organization_id
+                )
+            elif intent['module'] == 'general':
+                result = await UnifiedOrchestrator._handle_general(
+                    user_message, intent, organization_id
+                )
+            else:
+                result = {
+                    'success': False,
+                    'message': "I'm not sure what you want me to do. Can you rephrase?"
+                }
+
+        except DeadlineExceeded as e:
+            # Out of time budget - answer with what we have instead of failing the request
+            print(f"⏱️ {e}")
             result = {
                 'success': False,
-                'message': "I'm not sure what you want me to do. Can you rephrase?"
+                'partial': True,
+                'skipped_steps': [e.step],
+                'message': "⏱️ That took longer than expected, so I stopped before finishing. Please try again."
             }
 
         # Step 3: Add intent info to result
@@ -69,7 +179,49 @@ class UnifiedOrchestrator:
         return result
 
     @staticmethod
-    async def _classify_intent(message: str, history: list) -> Dict[str, Any]:
+    async def _interpret_command(message: str, conversation_context: str) -> Optional[Dict[str, Any]]:
+        """
+        Intent, entities and - for new expenses, however many are listed - fields and category
+        from one forced tool call, validated against CommandInterpretation. None if the call or
+        validation fails.
+        """
+        content = f"User Message: \"{message}\"\n\nPrevious context:\n{conversation_context or 'None'}"
+
+        async def attempt(model: str):
+            response = await llm.create_message(
+                model=model,
+                max_tokens=400 + _item_token_allowance(message),
+                system=INTERPRET_SYSTEM,
+                tools=[INTERPRET_TOOL],
+                tool_choice={"type": "tool", "name": INTERPRET_TOOL["name"]},
+                messages=[{"role": "user", "content": content}]
+            )
+            tool_input = next(
+                (block.input for block in response.content if block.type == "tool_use"), None
+            )
+            if tool_input is None:
+                raise ValueError("No route_command tool call in response")
+            intent = CommandInterpretation.model_validate(tool_input).model_dump()
+            intent["interpreted_by"] = model
+            return intent, intent["confidence"]
+
+        try:
+            intent = await model_router.run("interpret", attempt)
+        except (AdmissionRejected, DeadlineExceeded):
+            raise
+        except ValidationError as e:
+            print(f"⚠️ Structured interpretation rejected, classifying instead: {e}")
+            return None
+        except Exception as e:
+            print(f"⚠️ Structured interpretation failed, classifying instead: {e}")
+            return None
+
+        if not intent["expenses"] or (intent["module"], intent["action"]) != ("finance", "create"):
+            intent.pop("expenses")
+        return intent
+
+    @staticmethod
+    async def _classify_intent(message: str, conversation_context: str) -> Dict[str, Any]:
         """
         Use AI to understand what the user wants
         """
@@ -78,7 +230,8 @@ class UnifiedOrchestrator:
 
 User Message: "{message}"
 
-Previous context: {json.dumps(history[-3:]) if history else "None"}
+Previous context:
+{conversation_context or "None"}
 
 Classify into:
 
@@ -110,23 +263,31 @@ Return ONLY valid JSON:
   "natural_language": true
 }}"""
 
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=300,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        async def attempt(model: str):
+            response = await llm.create_message(
+                model=model,
+                max_tokens=300,
+                messages=[{"role": "user", "content": prompt}]
+            )
+
+            content = response.content[0].text.strip()
 
-        content = response.content[0].text.strip()
+            # Extract JSON
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
 
-        # Extract JSON
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
+            intent = json.loads(content)
+            if not isinstance(intent, dict) or "module" not in intent or "action" not in intent:
+                raise ValueError("Intent is missing module or action")
+            return intent, float(intent.get("confidence", 0))
 
         try:
-            return json.loads(content)
-        except:
+            return await model_router.run("classify", attempt)
+        except (AdmissionRejected, DeadlineExceeded):
+            raise
+        except Exception:
             return {
                 "module": "general",
                 "action": "chat",
@@ -148,29 +309,25 @@ Return ONLY valid JSON:
         entities = intent.get('entities', {})
 
         if action == 'create':
-            # Extract expense details from natural language
-            details = await UnifiedOrchestrator._extract_expense_details(message)
+            # Details usually came with the intent; extract them only if they didn't
+            items = intent.get('expenses') or await UnifiedOrchestrator._extract_expense_items(message)
 
-            # Create expense using AI categorization
-            ai_result = await FinanceAssistant.categorize_expense(
-                details['description'],
-                details['amount'],
-                details.get('vendor')
-            )
+            if len(items) > MULTI_EXPENSE_MAX_ITEMS:
+                return {
+                    'success': False,
+                    'message': f"That's {len(items)} expenses - I can add up to {MULTI_EXPENSE_MAX_ITEMS} at once. "
+                               f"For more, split the list or use CSV import."
+                }
+            if len(items) > 1:
+                return await UnifiedOrchestrator._create_expenses(items, intent, organization_id)
+
+            details = items[0]
+            ai_result = await UnifiedOrchestrator._categorize_item(details, intent)
 
             # Save to database
-            expense_data = {
-                "organization_id": organization_id,
-                "description": details['description'],
-                "amount": details['amount'],
-                "expense_date": details.get('date', 'today'),
-                "vendor": details.get('vendor'),
-                "category": ai_result['category'],
-                "ai_categorized": True,
-                "status": "pending"
-            }
+            expense_data = UnifiedOrchestrator._expense_row(details, ai_result, organization_id)
 
-            expense = db.create_expense(expense_data)
+            expense = await run_db_write(db.create_expense, expense_data)
 
             # Build natural response
             response = f"✅ Got it! Added expense:\n\n"
@@ -184,12 +341,14 @@ Return ONLY valid JSON:
                 'success': True,
                 'message': response,
                 'data': expense,
-                'action_taken': 'created_expense'
+                'action_taken': 'created_expense',
+                'partial': ai_result.get('partial', False),
+                'skipped_steps': ai_result.get('skipped_steps') or None
             }
 
         elif action == 'read':
             # Get expenses
-            expenses = db.get_expenses(organization_id)
+            expenses = await run_db(db.get_expenses, organization_id)
 
             response = f"📊 You have {len(expenses)} expenses.\n\n"
 
@@ -213,50 +372,161 @@ Return ONLY valid JSON:
             }
 
     @staticmethod
-    async def _extract_expense_details(message: str) -> Dict[str, Any]:
+    async def _categorize_item(details: Dict[str, Any], intent: Dict) -> Dict[str, Any]:
+        """Keep the category chosen while interpreting if it was confident, else run the tiered categorizer"""
+        if details.get('category') and details.get('category_confidence', 0) >= FUSED_CATEGORY_MIN_CONFIDENCE:
+            return await FinanceAssistant.finalize_category(
+                {
+                    'category': details['category'],
+                    'confidence': details['category_confidence'],
+                    'reasoning': 'Categorized while interpreting the command',
+                    'categorization_model': intent.get('interpreted_by')
+                },
+                details['description'],
+                details['amount'],
+                details.get('vendor')
+            )
+        # Low confidence: the tiered categorizer gets the final say
+        return await FinanceAssistant.categorize_expense(
+            details['description'],
+            details['amount'],
+            details.get('vendor')
+        )
+
+    @staticmethod
+    def _expense_row(details: Dict[str, Any], ai_result: Dict[str, Any], organization_id: str) -> Dict[str, Any]:
+        return {
+            "organization_id": organization_id,
+            "description": details['description'],
+            "amount": details['amount'],
+            "expense_date": details.get('date', 'today'),
+            "vendor": details.get('vendor'),
+            "category": ai_result['category'],
+            "ai_categorized": ai_result.get('ai_categorized', True),
+            "status": "pending"
+        }
+
+    @staticmethod
+    async def _create_expenses(
+        items: List[Dict[str, Any]],
+        intent: Dict,
+        organization_id: str
+    ) -> Dict[str, Any]:
         """
-        Extract expense details from natural language
+        Several expenses from one message: categorize them concurrently, insert them in one
+        round trip and answer once. An item whose categorization fails is saved as 'Other';
+        only if every item was shed by admission control does the request fail with 429.
         """
+        slots = asyncio.Semaphore(MULTI_EXPENSE_CONCURRENCY)
+
+        async def categorize(details: Dict[str, Any]) -> Dict[str, Any]:
+            async with slots:
+                return await UnifiedOrchestrator._categorize_item(details, intent)
+
+        # gather keeps results in message order
+        results = await asyncio.gather(*(categorize(details) for details in items), return_exceptions=True)
+
+        skipped_steps: List[str] = []
+        ai_results = []
+        for result in results:
+            if isinstance(result, BaseException):
+                if not isinstance(result, (AdmissionRejected, DeadlineExceeded)):
+                    print(f"⚠️ Categorization failed for one item: {result}")
+                result = {'category': 'Other', 'ai_categorized': False, 'skipped_steps': ['categorization']}
+            ai_results.append(result)
+            skipped_steps.extend(step for step in result.get('skipped_steps') or [] if step not in skipped_steps)
+
+        if all(isinstance(result, AdmissionRejected) for result in results):
+            raise results[0]
+
+        rows = [
+            UnifiedOrchestrator._expense_row(details, ai_result, organization_id)
+            for details, ai_result in zip(items, ai_results)
+        ]
+        expenses = await run_db_write(db.create_expenses, rows)
+
+        total = sum(details['amount'] for details in items)
+        response = f"✅ Got it! Added {len(items)} expenses (${total:,.2f} total):\n\n"
+        for details, ai_result in zip(items, ai_results):
+            response += f"💰 ${details['amount']} - {details['description']} → 📁 {ai_result['category']}\n"
+
+        insights = [
+            f"• {details['description']}: {ai_result['ai_insights']}"
+            for details, ai_result in zip(items, ai_results) if ai_result.get('ai_insights')
+        ]
+        if insights:
+            response += "\n💡 AI Insights:\n" + "\n".join(insights)
 
-        prompt = f"""Extract expense details from this message:
+        return {
+            'success': True,
+            'message': response,
+            'data': expenses,
+            'action_taken': 'created_expenses',
+            'partial': bool(skipped_steps),
+            'skipped_steps': skipped_steps or None
+        }
+
+    @staticmethod
+    async def _extract_expense_items(message: str) -> List[Dict[str, Any]]:
+        """
+        Extract every expense listed in a natural language message
+        """
+
+        prompt = f"""Extract the expenses from this message. It may list one or several.
 
 "{message}"
 
 Return ONLY valid JSON:
 {{
-  "description": "what was purchased",
-  "amount": 0.0,
-  "vendor": "who was paid (or null)",
-  "date": "YYYY-MM-DD or 'today'"
+  "items": [
+    {{
+      "description": "what was purchased",
+      "amount": 0.0,
+      "vendor": "who was paid (or null)",
+      "date": "YYYY-MM-DD or 'today'"
+    }}
+  ],
+  "confidence": 0.95
 }}
 
 Examples:
-"Lunch at Chipotle $47" → {{"description": "Lunch", "amount": 47.0, "vendor": "Chipotle", "date": "today"}}
-"Adobe subscription 54.99" → {{"description": "Adobe subscription", "amount": 54.99, "vendor": "Adobe", "date": "today"}}
+"Lunch at Chipotle $47" → {{"items": [{{"description": "Lunch", "amount": 47.0, "vendor": "Chipotle", "date": "today"}}], "confidence": 0.95}}
+"add these: coffee $5, Uber $23" → {{"items": [{{"description": "Coffee", "amount": 5.0, "vendor": null, "date": "today"}}, {{"description": "Ride", "amount": 23.0, "vendor": "Uber", "date": "today"}}], "confidence": 0.9}}
 """
 
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=200,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        async def attempt(model: str):
+            response = await llm.create_message(
+                model=model,
+                max_tokens=200 + _item_token_allowance(message),
+                messages=[{"role": "user", "content": prompt}]
+            )
+
+            content = response.content[0].text.strip()
 
-        content = response.content[0].text.strip()
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
 
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
+            extracted = json.loads(content)
+            items = extracted.get("items")
+            if not items or not all(
+                item.get("description") and isinstance(item.get("amount"), (int, float)) for item in items
+            ):
+                raise ValueError("Expense is missing description or amount")
+            return items, float(extracted.get("confidence", 0))
 
         try:
-            return json.loads(content)
-        except:
-            return {
+            return await model_router.run("extract", attempt)
+        except (AdmissionRejected, DeadlineExceeded):
+            raise
+        except Exception:
+            return [{
                 "description": message,
                 "amount": 0.0,
                 "vendor": None,
                 "date": "today"
-            }
+            }]
 
     @staticmethod
     async def _handle_project(
@@ -294,21 +564,26 @@ Examples:
                 "ai_generated": True
             }
 
-            project = db.create_project(project_data)
+            project = await run_db_write(db.create_project, project_data)
 
             # Create tasks
             tasks = []
-            for task_data in ai_plan.get('tasks', [])[:3]:  # Limit to 3 for quick response
-                task = db.create_task({
-                    "organization_id": organization_id,
-                    "project_id": project['id'],
-                    "task_title": task_data['title'],
-                    "task_description": task_data.get('description'),
-                    "priority": task_data.get('priority', 'medium'),
-                    "status": "todo",
-                    "ai_generated": True
-                })
-                tasks.append(task)
+            skipped_steps = []
+            try:
+                for task_data in ai_plan.get('tasks', [])[:3]:  # Limit to 3 for quick response
+                    task = await run_db_write(db.create_task, {
+                        "organization_id": organization_id,
+                        "project_id": project['id'],
+                        "task_title": task_data['title'],
+                        "task_description": task_data.get('description'),
+                        "priority": task_data.get('priority', 'medium'),
+                        "status": "todo",
+                        "ai_generated": True
+                    })
+                    tasks.append(task)
+            except DeadlineExceeded:
+                # The project is saved; asking to retry would create it twice
+                skipped_steps.append('tasks')
 
             response = f"✅ Project created!\n\n"
             response += f"📊 **{ai_plan['project_name']}**\n"
@@ -320,11 +595,13 @@ Examples:
                 'success': True,
                 'message': response,
                 'data': {'project': project, 'tasks': tasks},
-                'action_taken': 'created_project'
+                'action_taken': 'created_project',
+                'partial': bool(skipped_steps),
+                'skipped_steps': skipped_steps or None
             }
 
         elif action == 'read':
-            projects = db.get_projects(organization_id)
+            projects = await run_db(db.get_projects, organization_id)
 
             response = f"📊 You have {len(projects)} projects:\n\n"
 
@@ -380,13 +657,18 @@ Available capabilities:
 
 Respond in a friendly, concise way (2-3 sentences max)."""
 
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=200,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        async def attempt(model: str):
+            response = await llm.create_message(
+                model=model,
+                max_tokens=200,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            text = response.content[0].text.strip()
+            if not text:
+                raise ValueError("Empty reply")
+            return text, None
 
         return {
             'success': True,
-            'message': response.content[0].text
+            'message': await model_router.run("general", attempt)
         }
\ No newline at end of file
@@ -1,19 +1,29 @@
 """
 Project Service - AI Project Coordinator and Finance Assistant
 """
-from anthropic import Anthropic
-import os
 import json
-
-claude = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-try:
-    from openai import AsyncOpenAI
-    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    OPENAI_AVAILABLE = True
-except Exception:
-    OPENAI_AVAILABLE = False
-    openai_client = None
+import random
+
+from llm_gateway import llm, AdmissionRejected, OPENAI_AVAILABLE
+from deadline import DeadlineExceeded, can_afford
+from config import (
+    TIER_ROUTING_EXPLORE_RATE,
+    TIER2_CHECK_MIN_BUDGET_SECONDS,
+    TIER3_MIN_BUDGET_SECONDS
+)
+
+TIER1_MODEL = "gpt-3.5-turbo"
+TIER2_MODEL = "claude-3-5-haiku-20241022"
+
+EXPENSE_CATEGORIES = (
+    "Software & Tools",
+    "Marketing",
+    "Office Supplies",
+    "Travel",
+    "Client Meetings",
+    "Freelancers",
+    "Other"
+)
 
 
 class ProjectCoordinator:
@@ -49,7 +59,7 @@ Return a JSON object with:
 
 Keep it practical and realistic. Generate 5-8 tasks."""
 
-        response = claude.messages.create(
+        response = await llm.create_message(
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
             messages=[{"role": "user", "content": prompt}]
@@ -86,23 +96,30 @@ class FinanceAssistant:
     @staticmethod
     async def categorize_expense(description: str, amount: float, vendor: str = None) -> dict:
         category_result = None
+        rejected = None
+        skipped_steps = []
 
-        if OPENAI_AVAILABLE:
+        for tier, provider, _, categorize in FinanceAssistant._route_tiers():
             try:
-                category_result = await FinanceAssistant._tier1_gpt_categorize(
-                    description, amount, vendor
-                )
-            except Exception:
+                category_result = await categorize(description, amount, vendor)
+            except AdmissionRejected as e:
+                rejected = e
                 category_result = None
-
-        if not category_result or not isinstance(category_result, dict):
-            try:
-                category_result = await FinanceAssistant._tier2_haiku_categorize(
-                    description, amount, vendor
-                )
-            except Exception:
+            except DeadlineExceeded:
+                skipped_steps.append('categorization')
+                category_result = None
+                break
+            except Exception as e:
+                print(f"Tier {tier} ({provider}) categorization failed: {e}")
                 category_result = None
 
+            if category_result and isinstance(category_result, dict):
+                break
+
+        # Every tier was shed by admission control - let the caller return 429
+        if rejected and (not category_result or not isinstance(category_result, dict)):
+            raise rejected
+
         if not category_result or not isinstance(category_result, dict):
             category_result = {
                 'category': 'Other',
@@ -115,29 +132,56 @@ class FinanceAssistant:
         if 'category' not in category_result or not category_result['category']:
             category_result['category'] = 'Other'
 
-        if OPENAI_AVAILABLE and (category_result.get('confidence', 0) < 0.8 or (100 <= amount <= 500)):
-            try:
-                haiku_result = await FinanceAssistant._tier2_haiku_categorize(
-                    description, amount, vendor
-                )
-                if haiku_result and haiku_result.get('category'):
-                    category_result = haiku_result
-            except Exception:
-                pass
-
-        if amount > 500:
-            try:
-                analysis = await FinanceAssistant._tier3_sonnet_analysis(
-                    description, amount, vendor, category_result['category']
-                )
-                category_result['ai_insights'] = analysis
-                category_result['analysis_model'] = 'claude-sonnet-4-5'
-            except Exception:
-                category_result['ai_insights'] = None
-                category_result['analysis_model'] = 'none'
-        else:
-            category_result['ai_insights'] = None
-            category_result['analysis_model'] = 'none'
+        needs_check = category_result.get('confidence', 0) < 0.8 or (100 <= amount <= 500)
+        if category_result.get('tier') == 1 and needs_check and llm.is_available("anthropic"):
+            if not can_afford(TIER2_CHECK_MIN_BUDGET_SECONDS):
+                skipped_steps.append('tier2_check')
+            else:
+                try:
+                    haiku_result = await FinanceAssistant._tier2_haiku_categorize(
+                        description, amount, vendor
+                    )
+                    if haiku_result and haiku_result.get('category'):
+                        category_result = haiku_result
+                except DeadlineExceeded:
+                    skipped_steps.append('tier2_check')
+                except Exception:
+                    pass
+
+        return await FinanceAssistant.finalize_category(
+            category_result, description, amount, vendor, skipped_steps
+        )
+
+    @staticmethod
+    async def finalize_category(
+        category_result: dict,
+        description: str,
+        amount: float,
+        vendor: str = None,
+        skipped_steps: list = None
+    ) -> dict:
+        """Tier 3 insight for large expenses plus the result fields callers rely on"""
+        skipped_steps = skipped_steps if skipped_steps is not None else []
+        category_result['ai_insights'] = None
+        category_result['analysis_model'] = 'none'
+
+        if amount > 500 and llm.is_available("anthropic"):
+            if not can_afford(TIER3_MIN_BUDGET_SECONDS):
+                skipped_steps.append('tier3_insight')
+            else:
+                try:
+                    analysis = await FinanceAssistant._tier3_sonnet_analysis(
+                        description, amount, vendor, category_result['category']
+                    )
+                    category_result['ai_insights'] = analysis
+                    category_result['analysis_model'] = 'claude-sonnet-4-5'
+                except DeadlineExceeded:
+                    skipped_steps.append('tier3_insight')
+                except Exception:
+                    pass
+
+        category_result['skipped_steps'] = skipped_steps
+        category_result['partial'] = bool(skipped_steps)
 
         if not category_result.get('category'):
             category_result['category'] = 'Other'
@@ -146,9 +190,35 @@ class FinanceAssistant:
 
         return category_result
 
+    @staticmethod
+    def _route_tiers() -> list:
+        """
+        Categorization tiers whose provider breaker is not open, fastest first by
+        recent latency of the tier's model. A tier whose model hasn't been timed yet
+        keeps its tier position. A small share of calls flips the order so a slower
+        tier's latency stays current.
+        """
+        tiers = []
+        if OPENAI_AVAILABLE:
+            tiers.append((1, "openai", TIER1_MODEL, FinanceAssistant._tier1_gpt_categorize))
+        tiers.append((2, "anthropic", TIER2_MODEL, FinanceAssistant._tier2_haiku_categorize))
+
+        healthy = [t for t in tiers if llm.is_available(t[1])]
+        latency = {t[0]: llm.model_latency(t[2]) for t in healthy}
+        # Timed tiers are reordered among the positions they hold
+        timed = iter(sorted(
+            (t for t in healthy if latency[t[0]] is not None),
+            key=lambda t: (latency[t[0]], t[0])
+        ))
+        ranked = [next(timed) if latency[t[0]] is not None else t for t in healthy]
+
+        if len(ranked) > 1 and random.random() < TIER_ROUTING_EXPLORE_RATE:
+            ranked.reverse()
+        return ranked
+
     @staticmethod
     async def _tier1_gpt_categorize(description: str, amount: float, vendor: str = None) -> dict:
-        if not OPENAI_AVAILABLE or not openai_client:
+        if not OPENAI_AVAILABLE:
             raise Exception("OpenAI not available")
 
         prompt = f"""Categorize this expense into ONE category:
@@ -169,8 +239,8 @@ Amount: ${amount}
 Respond with ONLY valid JSON:
 {{"category": "category name", "confidence": 0.95, "reasoning": "brief reason"}}"""
 
-        response = await openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await llm.create_chat_completion(
+            model=TIER1_MODEL,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=100,
             temperature=0.1
@@ -202,8 +272,8 @@ Categories: Software & Tools, Marketing, Office Supplies, Travel, Client Meeting
 Return ONLY valid JSON:
 {{"category": "exact category", "confidence": 0.0-1.0, "reasoning": "why this category"}}"""
 
-        response = claude.messages.create(
-            model="claude-3-5-haiku-20241022",
+        response = await llm.create_message(
+            model=TIER2_MODEL,
             max_tokens=150,
             temperature=0,
             messages=[{"role": "user", "content": prompt}]
@@ -241,7 +311,7 @@ Return ONLY valid JSON:
 
 Keep response concise but insightful (4-5 sentences)."""
 
-        response = claude.messages.create(
+        response = await llm.create_message(
             model="claude-sonnet-4-5-20250929",
             max_tokens=400,
             temperature=0.3,
@@ -0,0 +1,266 @@
+"""
+Reanalysis - Re-score stored interviews after a rubric change
+Completed interviews are paged by id with their transcripts, analyzed by a bounded pool of
+workers and upserted into interview_analysis in batches. Every saved row carries
+INTERVIEW_RUBRIC_VERSION, which doubles as the checkpoint: re-running after a cancel or a
+crash skips interviews that already have an analysis under the current rubric.
+
+    python reanalysis.py [--organization-id ORG] [--limit N]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from database import db
+from deadline import run_db, run_db_write
+from llm_gateway import AdmissionRejected
+from interview_service import analyze_transcript, format_stored_transcript
+from config import (
+    INTERVIEW_RUBRIC_VERSION, INTERVIEW_ANALYSIS_TOKEN_BUDGET,
+    REANALYSIS_CONCURRENCY, REANALYSIS_PAGE_SIZE, REANALYSIS_UPSERT_BATCH,
+    REANALYSIS_ADMISSION_RETRIES, REANALYSIS_ERROR_REPORT_LIMIT
+)
+
+
+class ReanalysisManager:
+
+    def __init__(self, concurrency: int, page_size: int, upsert_batch: int):
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.upsert_batch = upsert_batch
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start_run(self, organization_id: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Start a run, or return the one already running for the same scope"""
+        for run in self.runs.values():
+            if run["status"] == "running" and run["organization_id"] == organization_id:
+                return self.status(run)
+
+        now = datetime.utcnow().isoformat()
+        run = {
+            "id": str(uuid.uuid4()),
+            "organization_id": organization_id,
+            "rubric_version": INTERVIEW_RUBRIC_VERSION,
+            "limit": limit,
+            "status": "running",
+            "scanned": 0,
+            "skipped": 0,
+            "empty": 0,
+            "analyzed": 0,
+            "failed": 0,
+            "analysis_seconds": 0.0,
+            "last_interview_id": None,
+            "errors": [],
+            "error": None,
+            "started": time.monotonic(),
+            "finished": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        self.runs[run["id"]] = run
+        self._tasks[run["id"]] = asyncio.create_task(self._execute(run))
+        return self.status(run)
+
+    def cancel(self, run_id: str) -> Optional[Dict[str, Any]]:
+        run = self.runs.get(run_id)
+        if run is None:
+            return None
+        task = self._tasks.get(run_id)
+        if task is not None:
+            task.cancel()
+        return self.status(run)
+
+    async def stop(self):
+        # Interrupted runs pick up where they left off when started again
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _execute(self, run: Dict[str, Any]):
+        try:
+            await self._run(run)
+            run["status"] = "completed"
+        except asyncio.CancelledError:
+            run["status"] = "cancelled"
+        except Exception as e:
+            print(f"❌ Reanalysis run {run['id']} failed: {e}")
+            run.update(status="failed", error=str(e))
+        finally:
+            run.update(finished=time.monotonic(), updated_at=datetime.utcnow().isoformat())
+            self._tasks.pop(run["id"], None)
+            print(f"📊 Reanalysis run {run['id']} {run['status']}: {self._progress_line(run)}")
+
+    def _record_error(self, run: Dict[str, Any], interview_id: str, error: Exception):
+        run["failed"] += 1
+        if len(run["errors"]) < REANALYSIS_ERROR_REPORT_LIMIT:
+            run["errors"].append({"interview_id": interview_id, "error": str(error)})
+
+    async def _run(self, run: Dict[str, Any]):
+        """Loader -> bounded analysis workers -> batched writer, connected by queues"""
+        work: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def load_stage():
+            after_id = None
+            queued = 0
+            while run["limit"] is None or queued < run["limit"]:
+                page = await run_db(
+                    db.get_completed_interviews_page, run["organization_id"], after_id, self.page_size
+                )
+                if not page:
+                    break
+                after_id = page[-1]["id"]
+                run["scanned"] += len(page)
+
+                versions = await run_db(db.get_analysis_versions, [i["id"] for i in page])
+                todo = [i for i in page if versions.get(i["id"]) != run["rubric_version"]]
+                if run["limit"] is not None:
+                    todo = todo[:run["limit"] - queued]
+                run["skipped"] += len(page) - len(todo)
+
+                transcripts = await run_db(db.get_transcripts, [i["id"] for i in todo])
+                for interview in todo:
+                    rows = transcripts.get(interview["id"], [])
+                    if not any(row["speaker"] == "candidate" for row in rows):
+                        run["empty"] += 1
+                        continue
+                    await work.put((interview, rows))
+                    queued += 1
+            for _ in range(self.concurrency):
+                await work.put(None)
+
+        async def analyze_stage():
+            while (item := await work.get()) is not None:
+                interview, rows = item
+                started = time.monotonic()
+                try:
+                    analysis = await self._analyze(interview, rows)
+                    run["analysis_seconds"] += time.monotonic() - started
+                    await results.put((interview["id"], analysis))
+                except Exception as e:
+                    self._record_error(run, interview["id"], e)
+            await results.put(None)
+
+        async def write_stage():
+            batch: Dict[str, Dict[str, Any]] = {}
+            running_workers = self.concurrency
+            while running_workers:
+                item = await results.get()
+                if item is None:
+                    running_workers -= 1
+                else:
+                    batch[item[0]] = item[1]
+                if len(batch) >= self.upsert_batch or (not running_workers and batch):
+                    await self._flush(run, batch)
+                    batch = {}
+
+        stages = [
+            asyncio.create_task(load_stage()),
+            *(asyncio.create_task(analyze_stage()) for _ in range(self.concurrency)),
+            asyncio.create_task(write_stage())
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _analyze(self, interview: Dict[str, Any], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        transcript = format_stored_transcript(rows, INTERVIEW_ANALYSIS_TOKEN_BUDGET)
+        for attempt in range(REANALYSIS_ADMISSION_RETRIES + 1):
+            try:
+                # A placeholder analysis would overwrite a real one, so parse errors fail the row
+                return await analyze_transcript(
+                    interview.get("position") or "", interview.get("candidate_name") or "the candidate",
+                    transcript, fallback=False
+                )
+            except AdmissionRejected as e:
+                if attempt == REANALYSIS_ADMISSION_RETRIES:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def _flush(self, run: Dict[str, Any], batch: Dict[str, Dict[str, Any]]):
+        try:
+            await run_db_write(db.upsert_analyses, batch)
+            run["analyzed"] += len(batch)
+            run["last_interview_id"] = max(batch)
+        except Exception as e:
+            for interview_id in batch:
+                self._record_error(run, interview_id, e)
+        run["updated_at"] = datetime.utcnow().isoformat()
+
+    @staticmethod
+    def _elapsed(run: Dict[str, Any]) -> float:
+        return (run["finished"] or time.monotonic()) - run["started"]
+
+    def _progress_line(self, run: Dict[str, Any]) -> str:
+        status = self.status(run)
+        return (
+            f"{status['analyzed']} analyzed, {status['failed']} failed, {status['skipped']} already current, "
+            f"{status['empty']} empty of {status['scanned']} scanned in {status['elapsed_seconds']}s "
+            f"({status['interviews_per_minute']}/min)"
+        )
+
+    def status(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        elapsed = self._elapsed(run)
+        attempted = run["analyzed"] + run["failed"]
+        return {
+            "run_id": run["id"],
+            "organization_id": run["organization_id"],
+            "rubric_version": run["rubric_version"],
+            "status": run["status"],
+            "scanned": run["scanned"],
+            "skipped": run["skipped"],
+            "empty": run["empty"],
+            "analyzed": run["analyzed"],
+            "failed": run["failed"],
+            "elapsed_seconds": round(elapsed, 1),
+            "interviews_per_minute": round(run["analyzed"] * 60 / elapsed, 1) if elapsed > 0 else 0.0,
+            "avg_analysis_seconds": round(run["analysis_seconds"] / attempted, 2) if attempted else None,
+            "last_interview_id": run["last_interview_id"],
+            "errors": run["errors"],
+            "error": run["error"],
+            "created_at": run["created_at"],
+            "updated_at": run["updated_at"]
+        }
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        run = self.runs.get(run_id)
+        return self.status(run) if run is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "running": [self.status(self.runs[run_id]) for run_id in self._tasks if run_id in self.runs]
+        }
+
+
+reanalysis = ReanalysisManager(
+    concurrency=REANALYSIS_CONCURRENCY,
+    page_size=REANALYSIS_PAGE_SIZE,
+    upsert_batch=REANALYSIS_UPSERT_BATCH
+)
+
+
+async def _main(organization_id: Optional[str], limit: Optional[int]):
+    run = reanalysis.start_run(organization_id, limit)
+    print(f"🔁 Reanalysis run {run['run_id']} for rubric v{run['rubric_version']}")
+    task = reanalysis._tasks.get(run["run_id"])
+    while task is not None and not task.done():
+        await asyncio.wait({task}, timeout=10)
+        if not task.done():
+            print(f"… {reanalysis._progress_line(reanalysis.runs[run['run_id']])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze stored interviews under the current rubric")
+    parser.add_argument("--organization-id", default=None, help="Only this organization's interviews")
+    parser.add_argument("--limit", type=int, default=None, help="Analyze at most this many interviews")
+    args = parser.parse_args()
+    asyncio.run(_main(args.organization_id, args.limit))
@@ -1,3 +1,3 @@
-from . import interview, health, project, finance, migration, orchestrator, user, auth
+from . import interview, health, project, finance, migration, orchestrator, user, auth, metrics
 
-__all__ = ["interview", "health", "project", "finance", "migration", "orchestrator", "user", "auth"]
\ No newline at end of file
+__all__ = ["interview", "health", "project", "finance", "migration", "orchestrator", "user", "auth", "metrics"]
\ No newline at end of file
@@ -6,6 +6,8 @@ from fastapi import APIRouter, HTTPException
 from models import ExpenseCreateRequest, ExpenseResponse
 from database import db
 from project_service import FinanceAssistant
+from deadline import request_deadline, run_db_write, DeadlineExceeded
+from config import EXPENSE_CREATE_DEADLINE_SECONDS
 
 router = APIRouter(prefix="/api", tags=["finance"])
 
@@ -18,41 +20,48 @@ async def create_expense(request: ExpenseCreateRequest):
         print(f"Description: {request.description}")
         print(f"Amount: ${request.amount}")
 
-        # Use AI to categorize
-        ai_result = await FinanceAssistant.categorize_expense(
-            request.description,
-            request.amount,
-            request.vendor
-        )
+        with request_deadline(EXPENSE_CREATE_DEADLINE_SECONDS):
+            # Use AI to categorize
+            ai_result = await FinanceAssistant.categorize_expense(
+                request.description,
+                request.amount,
+                request.vendor
+            )
 
-        print(f"AI Category: {ai_result['category']} ({ai_result['confidence']})")
+            print(f"AI Category: {ai_result['category']} ({ai_result['confidence']})")
 
-        # Create expense
-        expense_data = {
-            "organization_id": request.organization_id,
-            "description": request.description,
-            "amount": request.amount,
-            "expense_date": request.expense_date,
-            "vendor": request.vendor,
-            "project_id": request.project_id,
-            "category": ai_result['category'],
-            "ai_categorized": True,
-            "ai_category_confidence": ai_result['confidence'],
-            "status": "pending"
-        }
+            # Create expense
+            expense_data = {
+                "organization_id": request.organization_id,
+                "description": request.description,
+                "amount": request.amount,
+                "expense_date": request.expense_date,
+                "vendor": request.vendor,
+                "project_id": request.project_id,
+                "category": ai_result['category'],
+                "ai_categorized": True,
+                "ai_category_confidence": ai_result['confidence'],
+                "status": "pending"
+            }
 
-        expense = db.create_expense(expense_data)
+            expense = await run_db_write(db.create_expense, expense_data)
 
-        return ExpenseResponse(
-            success=True,
-            expense=expense,
-            ai_category=ai_result['category'],
-            confidence=ai_result['confidence'],
-            ai_insights=ai_result.get('ai_insights'),
-            categorization_model=ai_result.get('categorization_model'),
-            analysis_model=ai_result.get('analysis_model')
-        )
+            return ExpenseResponse(
+                success=True,
+                expense=expense,
+                ai_category=ai_result['category'],
+                confidence=ai_result['confidence'],
+                ai_insights=ai_result.get('ai_insights'),
+                categorization_model=ai_result.get('categorization_model'),
+                analysis_model=ai_result.get('analysis_model'),
+                partial=ai_result.get('partial', False),
+                skipped_steps=ai_result.get('skipped_steps') or None
+            )
 
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"ERROR: {e}")
         import traceback
@@ -1,7 +1,8 @@
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
-from database import db
+from health_service import health_monitor
 from config import API_VERSION
 
 router = APIRouter(tags=["health"])
@@ -23,11 +24,30 @@ async def root():
 
 @router.get("/api/health")
 async def health_check():
-    database_healthy = db.test_connection()
+    """Cached dependency status from the background prober"""
+    return health_monitor.snapshot()
 
+
+@router.get("/api/health/live")
+async def liveness():
     return {
-        "status": "healthy" if database_healthy else "unhealthy",
-        "database": "connected" if database_healthy else "disconnected",
-        "ai_service": "ready",
+        "status": "alive",
         "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/api/health/ready")
+async def readiness():
+    snapshot = health_monitor.snapshot()
+    ready = health_monitor.is_ready()
+
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": snapshot["checks"],
+            "age_seconds": snapshot["age_seconds"],
+            "stale": snapshot["stale"],
+            "timestamp": snapshot["timestamp"]
+        }
+    )
@@ -1,22 +1,48 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket
 from datetime import datetime
-from typing import Dict
 
 from models import (
     InterviewStartRequest,
     InterviewResponseRequest,
     InterviewAnalysisRequest,
+    OpenerWarmRequest,
+    ReanalysisRequest,
     InterviewResponse,
     AnalysisResponse,
     InterviewListResponse,
+    CandidateRankingResponse,
     InterviewDetailsResponse
 )
-from database import db
+from database import db, RANKING_SCORES
+from deadline import run_db, run_db_write
 from interview_service import InterviewConductor
+from opener_pool import opener_pool
+from analysis_jobs import analysis_jobs
+from reanalysis import reanalysis
+from interview_channel import interview_channel
+from transcript_writer import transcript_writer
+from session_store import interview_sessions
 
 router = APIRouter(prefix="/api", tags=["interviews"])
 
-active_interviews: Dict[str, InterviewConductor] = {}
+active_interviews = interview_sessions
+# An evicted session's socket goes with it
+active_interviews.on_evict = interview_channel.close
+
+
+def _release_interview(interview_id: str):
+    active_interviews.pop(interview_id, None)
+    interview_channel.close(interview_id)
+
+
+async def _complete_interview(interview_id: str, conductor: InterviewConductor):
+    # Analysis and status readers expect the whole transcript to be stored
+    await transcript_writer.flush()
+    await run_db_write(db.update_interview_status, interview_id, "completed")
+    analysis_jobs.submit(
+        interview_id, conductor,
+        on_complete=lambda: _release_interview(interview_id)
+    )
 
 
 @router.post("/interview/start", response_model=InterviewResponse)
@@ -36,7 +62,10 @@ async def start_interview(request: InterviewStartRequest):
             position=request.position,
             candidate_name=request.candidate_name
         )
-        greeting = await conductor.start_interview()
+        opener = opener_pool.take(
+            request.organization_id, request.position, request.candidate_name
+        )
+        greeting = await conductor.start_interview(opener)
         active_interviews[interview_id] = conductor
         db.save_transcript(interview_id, "ai", greeting)
         return InterviewResponse(
@@ -46,12 +75,22 @@ async def start_interview(request: InterviewStartRequest):
             question_number=1,
             total_questions=conductor.max_questions
         )
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/interview/openers/warm")
+async def warm_openers(request: OpenerWarmRequest):
+    """Pre-generate openers for positions an organization is about to interview for"""
+    for position in request.positions:
+        opener_pool.warm(request.organization_id, position)
+    return {"success": True, "warming": request.positions}
+
+
 @router.post("/interview/respond")
 async def respond_to_interview(request: InterviewResponseRequest):
     try:
@@ -66,7 +105,7 @@ async def respond_to_interview(request: InterviewResponseRequest):
         result = await conductor.process_response(request.candidate_response)
         db.save_transcript(interview_id, "ai", result["ai_message"])
         if result["is_complete"]:
-            db.update_interview_status(interview_id, "completed")
+            await _complete_interview(interview_id, conductor)
         return {
             "success": True,
             "ai_message": result["ai_message"],
@@ -80,22 +119,77 @@ async def respond_to_interview(request: InterviewResponseRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.websocket("/interview/{interview_id}/ws")
+async def interview_socket(websocket: WebSocket, interview_id: str, last_seq: int = -1):
+    """
+    The rest of an interview started with /interview/start over one connection.
+    Client sends {"type": "message", "content"} and {"type": "ping"}; server sends
+    session, message (with seq), token, ping/pong and error events. Reconnect with
+    ?last_seq=<seq> to receive what was missed.
+    """
+    conductor = active_interviews.get(interview_id)
+    if conductor is None:
+        await websocket.close(code=4404, reason="Interview session not found")
+        return
+
+    await websocket.accept()
+    session = interview_channel.session(interview_id, conductor)
+    # Socket turns never go through active_interviews.get, so hold the entry while connected
+    active_interviews.pin(interview_id)
+    try:
+        await interview_channel.serve(
+            websocket, session, last_seq,
+            on_complete=lambda: _complete_interview(interview_id, conductor)
+        )
+    finally:
+        active_interviews.unpin(interview_id)
+
+
 @router.post("/interview/analyze", response_model=AnalysisResponse)
 async def analyze_interview(request: InterviewAnalysisRequest):
+    """Start (or find) the background analysis; poll /interview/{id}/analysis until completed"""
     try:
         interview_id = request.interview_id
-        if interview_id not in active_interviews:
-            raise HTTPException(
-                status_code=404,
-                detail="Interview session not found"
-            )
-        conductor = active_interviews[interview_id]
-        analysis = await conductor.analyze_interview()
-        db.save_analysis(interview_id, analysis)
-        del active_interviews[interview_id]
+        job = await analysis_jobs.get(interview_id)
+
+        if job is None or job["status"] == "failed":
+            conductor = active_interviews.get(interview_id)
+            if conductor is None:
+                if job is None:
+                    raise HTTPException(
+                        status_code=404,
+                        detail="Interview session not found"
+                    )
+            else:
+                job = analysis_jobs.submit(
+                    interview_id, conductor,
+                    on_complete=lambda: _release_interview(interview_id)
+                )
+
+        return AnalysisResponse(
+            success=True,
+            status=job["status"],
+            analysis=job["analysis"],
+            error=job["error"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/interview/{interview_id}/analysis", response_model=AnalysisResponse)
+async def get_interview_analysis(interview_id: str):
+    """Status of an interview's analysis, with the result once completed"""
+    try:
+        job = await analysis_jobs.get(interview_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="No analysis for this interview")
         return AnalysisResponse(
             success=True,
-            analysis=analysis
+            status=job["status"],
+            analysis=job["analysis"],
+            error=job["error"]
         )
     except HTTPException:
         raise
@@ -103,6 +197,41 @@ async def analyze_interview(request: InterviewAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/interview/{interview_id}/scores")
+async def get_live_scores(interview_id: str):
+    """Running scores and evidence while the interview is in progress"""
+    conductor = active_interviews.get(interview_id)
+    if conductor is None:
+        raise HTTPException(status_code=404, detail="Interview session not found")
+    return {
+        "success": True,
+        "question_number": conductor.question_count,
+        **conductor.scorer.snapshot()
+    }
+
+
+@router.post("/interview/reanalyze")
+async def start_reanalysis(request: ReanalysisRequest):
+    """Re-score one organization's completed interviews under the current rubric in the background"""
+    return {"success": True, **reanalysis.start_run(request.organization_id, request.limit)}
+
+
+@router.get("/interview/reanalyze/{run_id}")
+async def get_reanalysis(run_id: str):
+    run = reanalysis.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Reanalysis run not found")
+    return {"success": True, **run}
+
+
+@router.post("/interview/reanalyze/{run_id}/cancel")
+async def cancel_reanalysis(run_id: str):
+    run = reanalysis.cancel(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Reanalysis run not found")
+    return {"success": True, **run}
+
+
 @router.get("/interviews", response_model=InterviewListResponse)
 async def get_interviews(organization_id: str):
     try:
@@ -115,6 +244,56 @@ async def get_interviews(organization_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/interviews/rankings", response_model=CandidateRankingResponse)
+async def get_candidate_rankings(
+    organization_id: str,
+    position: str = None,
+    sort_by: str = "overall_score",
+    recommendation: str = None,
+    limit: int = 10,
+    offset: int = 0
+):
+    """
+    Top candidates by one score dimension, optionally for one position and a
+    comma-separated set of recommendations, served from the candidate_rankings index.
+    """
+    if sort_by not in RANKING_SCORES:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(RANKING_SCORES)}")
+    if not 1 <= limit <= 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-100 and offset non-negative")
+
+    recommendations = [r.strip() for r in recommendation.split(",") if r.strip()] if recommendation else None
+    try:
+        candidates, total = await run_db(
+            db.get_candidate_rankings, organization_id, position, sort_by, recommendations, limit, offset
+        )
+        return CandidateRankingResponse(
+            success=True,
+            sort_by=sort_by,
+            total=total,
+            limit=limit,
+            offset=offset,
+            next_offset=offset + limit if offset + limit < total else None,
+            candidates=candidates
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/interviews/rankings/rebuild")
+async def rebuild_candidate_rankings(organization_id: str):
+    """Re-index stored analyses, e.g. ones saved before the ranking index existed"""
+    try:
+        indexed = await run_db(db.rebuild_candidate_rankings, organization_id)
+        return {"success": True, "indexed": indexed}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/interview/{interview_id}", response_model=InterviewDetailsResponse)
 async def get_interview_details(interview_id: str):
     try:
@@ -0,0 +1,39 @@
+"""
+Runtime metrics for the AI service layer
+"""
+from fastapi import APIRouter
+
+from llm_gateway import llm
+from model_routing import model_router
+from mapping_cache import mapping_cache
+from import_jobs import import_jobs
+from opener_pool import opener_pool
+from analysis_jobs import analysis_jobs
+from reanalysis import reanalysis
+from interview_channel import interview_channel
+from transcript_writer import transcript_writer
+from session_store import interview_sessions
+from chat_sessions import chat_sessions
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def get_metrics():
+    """Admission-control limits, live queue depths, circuit breakers and request coalescing"""
+    return {
+        "success": True,
+        "llm_limits": llm.snapshot(),
+        "circuit_breakers": llm.breaker_snapshot(),
+        "coalescing": llm.coalescing_snapshot(),
+        "orchestrator_models": model_router.snapshot(),
+        "column_mapping_cache": mapping_cache.snapshot(),
+        "import_jobs": import_jobs.snapshot(),
+        "interview_openers": opener_pool.snapshot(),
+        "analysis_jobs": analysis_jobs.snapshot(),
+        "reanalysis": reanalysis.snapshot(),
+        "interview_sessions": interview_sessions.snapshot(),
+        "chat_sessions": chat_sessions.snapshot(),
+        "interview_channel": interview_channel.snapshot(),
+        "transcript_writer": transcript_writer.snapshot()
+    }
@@ -1,9 +1,12 @@
 """Migration API endpoints"""
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from typing import Optional
+
+from models import ColumnMappingConfirmRequest
 from migration_service import MigrationService
-from project_service import FinanceAssistant
+from mapping_cache import mapping_cache
+from import_jobs import import_jobs
 from database import db
-from datetime import datetime
 
 router = APIRouter(prefix="/api/migration", tags=["migration"])
 
@@ -13,12 +16,12 @@ async def analyze_csv(
     file: UploadFile = File(...),
     organization_id: str = Form(...)  #
 ):
-    """Analyze CSV structure"""
+    """Analyze upload structure - CSV, .csv.gz, .zip or XLSX"""
     try:
-        content = await file.read()
-        csv_content = content.decode('utf-8')
-        result = await MigrationService.analyze_csv(csv_content)
+        result = await MigrationService.analyze_csv(file.file, organization_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,48 +29,96 @@ async def analyze_csv(
 @router.post("/import-expenses")
 async def import_expenses(
     file: UploadFile = File(...),
-    organization_id: str = Form(...)  #
+    organization_id: str = Form(...),  #
+    header_signature: Optional[str] = Form(None)
 ):
+    """Queue a background import job and return its ID right away"""
+    try:
+        job = await import_jobs.submit(
+            file.file, file.filename, organization_id, header_signature
+        )
+        return {"success": True, **job}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/import-jobs")
+async def get_import_jobs(organization_id: str):
+    """Import jobs for an organization, newest first"""
+    try:
+        jobs = db.get_import_jobs(organization_id)
+        return {"success": True, "jobs": [import_jobs.status(job) for job in jobs]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/import-jobs/{job_id}")
+async def get_import_job(job_id: str):
+    """Progress and status of an import job"""
+    try:
+        job = await import_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return {"success": True, **job}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/import-jobs/{job_id}/cancel")
+async def cancel_import_job(job_id: str):
+    """Stop an import after the batches already in flight are committed"""
     try:
-        content = await file.read()
-        csv_content = content.decode('utf-8')
-
-        result = await MigrationService.import_expenses(csv_content, organization_id)
-
-        if not result['success']:
-            return result
-
-        all_expenses = result.get('transformed_data', result['preview'])
-        imported_count = 0
-
-        for expense_data in all_expenses:
-            try:
-                ai_result = await FinanceAssistant.categorize_expense(
-                    description=expense_data.get('description', ''),
-                    amount=float(expense_data.get('amount', 0)),
-                    vendor=expense_data.get('vendor')
-                )
-
-                expense_data['category'] = ai_result.get('category', 'Other')
-                expense_data['ai_categorized'] = True
-                expense_data['ai_category_confidence'] = ai_result.get('confidence', 0)
-                expense_data['organization_id'] = organization_id
-                expense_data['status'] = 'pending'
-
-                if 'expense_date' not in expense_data:
-                    expense_data['expense_date'] = datetime.now().strftime('%Y-%m-%d')
-
-                db.create_expense(expense_data)
-                imported_count += 1
-
-            except Exception as e:
-                print(f"Error importing expense: {e}")
-                continue
-
-        return {
-            "success": True,
-            "imported": imported_count,
-            "total": len(all_expenses)
-        }
+        job = await import_jobs.cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return {"success": True, **job}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/import-jobs/{job_id}/resume")
+async def resume_import_job(job_id: str):
+    """Re-queue a failed import from its last committed row"""
+    try:
+        job = await import_jobs.resume(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return {"success": True, **job}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/mappings")
+async def get_mappings(organization_id: str):
+    """Cached column mappings for an organization"""
+    try:
+        mappings = db.get_column_mappings(organization_id)
+        return {"success": True, "mappings": mappings}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/mappings/confirm")
+async def confirm_mapping(request: ColumnMappingConfirmRequest):
+    """Confirm a cached mapping, or override it with a corrected one"""
+    try:
+        entry = await mapping_cache.confirm(
+            request.organization_id,
+            request.header_signature,
+            request.mapping
+        )
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Mapping not found")
+        return {"success": True, "mapping": entry}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -5,6 +5,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from orchestrator import UnifiedOrchestrator
+from chat_sessions import chat_sessions, open_chat_session
+from deadline import request_deadline
+from config import AI_CHAT_DEADLINE_SECONDS
 
 router = APIRouter(prefix="/api/ai", tags=["orchestrator"])
 
@@ -12,6 +15,9 @@ router = APIRouter(prefix="/api/ai", tags=["orchestrator"])
 class ChatRequest(BaseModel):
     message: str
     organization_id: Optional[str] = None
+    # Returned by the first reply; the server keeps the history from then on
+    conversation_id: Optional[str] = None
+    # Only used to seed a new conversation for clients that still send it
     conversation_history: Optional[List[Dict]] = []
 
 
@@ -21,6 +27,9 @@ class ChatResponse(BaseModel):
     intent: Optional[Dict] = None
     data: Optional[Any] = None
     action_taken: Optional[str] = None
+    partial: bool = False
+    skipped_steps: Optional[List[str]] = None
+    conversation_id: Optional[str] = None
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -35,14 +44,24 @@ async def unified_chat(request: ChatRequest):
                 detail="organization_id is required"
             )
 
-        result = await UnifiedOrchestrator.process_command(
-            request.message,
+        session, _ = open_chat_session(
+            request.conversation_id,
             request.organization_id,
             request.conversation_history
         )
 
-        return ChatResponse(**result)
+        with request_deadline(AI_CHAT_DEADLINE_SECONDS):
+            result = await UnifiedOrchestrator.process_command(
+                request.message,
+                request.organization_id,
+                session.prompt_context()
+            )
+
+        session.record(request.message, result['message'])
+        return ChatResponse(**result, conversation_id=session.conversation_id)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in orchestrator: {e}")
         import traceback
@@ -50,6 +69,14 @@ async def unified_chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/chat/{conversation_id}")
+async def end_conversation(conversation_id: str):
+    """
+    Forget a conversation's server-side history
+    """
+    return {"success": True, "ended": chat_sessions.pop(conversation_id) is not None}
+
+
 @router.get("/capabilities")
 async def get_capabilities():
     """
@@ -60,6 +87,7 @@ async def get_capabilities():
         "capabilities": {
             "finance": [
                 "Add expenses from natural language",
+                "Add several expenses in one message",
                 "View expense summaries",
                 "Get budget insights"
             ],
@@ -81,6 +109,7 @@ async def get_capabilities():
         },
         "examples": [
             "Add expense: Coffee at Starbucks $5.50",
+            "Add these: coffee $5, Uber $23, Figma $15",
             "Create project for mobile app development",
             "Show me my recent expenses",
             "What projects do I have?",
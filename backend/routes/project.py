@@ -69,6 +69,8 @@ async def create_project(request: ProjectCreateRequest):
             tasks=tasks
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: {e}")
         import traceback
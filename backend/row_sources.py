@@ -0,0 +1,363 @@
+"""
+Row Sources - Streams rows out of uploaded CSV, .csv.gz, .zip and XLSX files
+The format is sniffed from magic bytes and the text encoding from the first chunk, so an
+upload is decompressed and decoded incrementally and never held in memory as a whole.
+"""
+import asyncio
+import codecs
+import gzip
+import io
+import itertools
+import csv
+import struct
+import zipfile
+from datetime import datetime, date
+from typing import List, Dict, Any, Optional
+
+try:
+    import openpyxl
+    XLSX_AVAILABLE = True
+except ImportError:
+    XLSX_AVAILABLE = False
+
+READ_CHUNK_BYTES = 64 * 1024
+SCAN_CHUNK_BYTES = 1024 * 1024
+# Exports that are not UTF-8 are almost always Excel/Windows "ANSI"
+FALLBACK_ENCODING = "cp1252"
+TEXT_MEMBER_SUFFIXES = (".csv", ".txt")
+# Encodings where a b"\n" byte is always a newline, so lines can be counted on raw bytes
+NEWLINE_SAFE_ENCODINGS = ("utf-8", "utf-8-sig", FALLBACK_ENCODING)
+# Encoders that would prepend a BOM to every sampled row when measuring its width
+_WIDTH_ENCODINGS = {"utf-8-sig": "utf-8", "utf-16": "utf-16-le"}
+
+
+def detect_encoding(head: bytes) -> str:
+    """Best guess from a BOM or the first chunk of the (decompressed) file"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    # UTF-16 without a BOM: ASCII text leaves every other byte NUL
+    if len(head) >= 4:
+        if head[1::2].count(0) > len(head) // 4:
+            return "utf-16-le"
+        if head[0::2].count(0) > len(head) // 4:
+            return "utf-16-be"
+
+    try:
+        # final=False: a multibyte character cut off at the end of the sample is fine
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+class _Utf8Transcoder(io.RawIOBase):
+    """
+    Decodes a byte stream from the detected encoding and re-emits UTF-8, chunk by chunk.
+    If bytes further in turn out not to be valid UTF-8 after all, decoding switches to
+    the fallback encoding from that chunk on instead of failing the import.
+    """
+
+    def __init__(self, stream, head: bytes, encoding: str):
+        self._stream = stream
+        self._pending = head
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._out = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _decode(self, chunk: bytes) -> str:
+        try:
+            return self._decoder.decode(chunk, final=self._eof)
+        except UnicodeDecodeError:
+            if self.encoding == FALLBACK_ENCODING:
+                raise
+            # Bytes of a character split across the previous chunk boundary are still held
+            # by the old decoder; carry them over so they aren't lost
+            held, _ = self._decoder.getstate()
+            self.encoding = FALLBACK_ENCODING
+            self._decoder = codecs.getincrementaldecoder(FALLBACK_ENCODING)(errors="replace")
+            return self._decoder.decode(held + chunk, final=self._eof)
+
+    def readinto(self, buffer) -> int:
+        while not self._out and not self._eof:
+            if self._pending:
+                chunk, self._pending = self._pending, b""
+            else:
+                chunk = self._stream.read(READ_CHUNK_BYTES)
+                self._eof = not chunk
+            self._out = self._decode(chunk).encode("utf-8")
+
+        count = min(len(buffer), len(self._out))
+        buffer[:count] = self._out[:count]
+        self._out = self._out[count:]
+        return count
+
+
+class RowSource:
+    """Reads rows lazily, a batch at a time; subclasses yield each row as a list of strings"""
+
+    file_format = "csv"
+
+    def __init__(self, raw_file):
+        self._raw = raw_file
+        self._rows = iter(())
+        self._buffered: List[Dict[str, Any]] = []
+        self._exhausted = False
+        self.columns: List[str] = []
+        self.encoding: Optional[str] = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    async def open(self) -> "RowSource":
+        self._rows = await asyncio.to_thread(self._open)
+        header = await asyncio.to_thread(next, self._rows, [])
+        self.columns = [str(col).strip() for col in header]
+        return self
+
+    def _read(self, count: int) -> List[Dict[str, Any]]:
+        """Up to `count` non-blank rows; fewer only once the reader is exhausted"""
+        rows = []
+        # Exports can hold long runs of blank (or formatted but empty) rows, so keep
+        # reading past them rather than returning a short or empty window
+        while len(rows) < count and not self._exhausted:
+            window = list(itertools.islice(self._rows, count - len(rows)))
+            if not window:
+                self._exhausted = True
+                break
+            rows += [dict(zip(self.columns, values)) for values in window if any(values)]
+        return rows
+
+    async def peek(self, count: int) -> List[Dict[str, Any]]:
+        """First `count` rows, kept buffered so batches() still yields them"""
+        if len(self._buffered) < count:
+            self._buffered += await asyncio.to_thread(self._read, count - len(self._buffered))
+        return self._buffered[:count]
+
+    async def batches(self, size: int):
+        if self._buffered:
+            buffered, self._buffered = self._buffered, []
+            for i in range(0, len(buffered), size):
+                yield buffered[i:i + size]
+
+        while not self._exhausted:
+            batch = await asyncio.to_thread(self._read, size)
+            if batch:
+                yield batch
+
+    def bytes_read(self) -> int:
+        """Position in the uploaded (possibly compressed) file - read-ahead included"""
+        try:
+            return self._raw.tell()
+        except (OSError, ValueError):
+            return 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {"file_format": self.file_format, "encoding": self.encoding}
+
+    def _file_size(self) -> int:
+        position = self._raw.tell()
+        size = self._raw.seek(0, io.SEEK_END)
+        self._raw.seek(position)
+        return size
+
+    def _average_row_bytes(self, sample: List[Dict[str, Any]]) -> float:
+        encoding = _WIDTH_ENCODINGS.get(self.encoding or "utf-8", self.encoding or "utf-8")
+        widths = [
+            len((",".join(str(value) for value in row.values()) + "\n").encode(encoding, errors="replace"))
+            for row in sample
+        ]
+        return sum(widths) / len(widths) if widths else 0.0
+
+    def _estimate_rows(self, content_bytes: int, sample: List[Dict[str, Any]]) -> Dict[str, Any]:
+        width = self._average_row_bytes(sample)
+        # The header row is roughly one average row wide
+        rows = int(content_bytes / width) - 1 if width else len(sample)
+        return {"total_rows": max(rows, len(sample)), "total_rows_method": "size_estimate", "total_rows_estimated": True}
+
+    def count_rows(self, sample: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Row count without reading past the sample - exact where cheap, estimated otherwise"""
+        return self._estimate_rows(self._file_size(), sample)
+
+    def close(self):
+        pass
+
+
+class CsvRowSource(RowSource):
+    """CSV text from a plain, gzip'd or zipped upload"""
+
+    def __init__(self, raw_file, file_format: str = "csv", scan_max_bytes: int = 0):
+        super().__init__(raw_file)
+        self.file_format = file_format
+        self.scan_max_bytes = scan_max_bytes
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._member: Optional[zipfile.ZipInfo] = None
+        self._stream = None
+        self._transcoder: Optional[_Utf8Transcoder] = None
+        self._text = None
+
+    def _open_stream(self):
+        if self.file_format == "csv.gz":
+            return gzip.GzipFile(fileobj=self._raw, mode="rb")
+
+        if self.file_format == "zip":
+            self._archive = zipfile.ZipFile(self._raw)
+            members = [
+                info for info in self._archive.infolist()
+                if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+            ]
+            if not members:
+                raise ValueError("Zip archive is empty")
+            text_members = [m for m in members if m.filename.lower().endswith(TEXT_MEMBER_SUFFIXES)]
+            self._member = (text_members or members)[0]
+            return self._archive.open(self._member)
+
+        return self._raw
+
+    def _open(self):
+        self._stream = self._open_stream()
+        head = self._stream.read(READ_CHUNK_BYTES)
+        self._transcoder = _Utf8Transcoder(self._stream, head, detect_encoding(head))
+        self._text = io.TextIOWrapper(io.BufferedReader(self._transcoder), encoding="utf-8", newline="")
+        return csv.reader(self._text)
+
+    def describe(self) -> Dict[str, Any]:
+        # The transcoder may have fallen back mid-file
+        self.encoding = self._transcoder.encoding if self._transcoder else None
+        return super().describe()
+
+    def _scan_newlines(self) -> int:
+        position = self._raw.tell()
+        self._raw.seek(0)
+        newlines = 0
+        last = b""
+        while chunk := self._raw.read(SCAN_CHUNK_BYTES):
+            newlines += chunk.count(b"\n")
+            last = chunk[-1:]
+        self._raw.seek(position)
+        return newlines + (1 if last and last != b"\n" else 0)
+
+    def _gzip_uncompressed_size(self) -> int:
+        # ISIZE trailer: uncompressed length mod 2**32 of the last member
+        position = self._raw.tell()
+        size = self._raw.seek(-4, io.SEEK_END) + 4
+        isize = struct.unpack("<I", self._raw.read(4))[0]
+        self._raw.seek(position)
+        return isize if isize >= size else size
+
+    def count_rows(self, sample: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.describe()
+
+        if self.file_format == "csv.gz":
+            return self._estimate_rows(self._gzip_uncompressed_size(), sample)
+        if self.file_format == "zip":
+            return self._estimate_rows(self._member.file_size, sample)
+
+        size = self._file_size()
+        if self.encoding in NEWLINE_SAFE_ENCODINGS and size <= self.scan_max_bytes:
+            # Physical lines: quoted multi-line cells or blank lines make this slightly off
+            lines = self._scan_newlines()
+            return {"total_rows": max(0, lines - 1), "total_rows_method": "newline_scan", "total_rows_estimated": False}
+        return self._estimate_rows(size, sample)
+
+    def close(self):
+        # Close our wrappers but hand the underlying upload back open
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.close()
+        if self._archive is not None:
+            self._archive.close()
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if (value.hour, value.minute, value.second) == (0, 0, 0):
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class XlsxRowSource(RowSource):
+    """First worksheet of an XLSX workbook, read in openpyxl's streaming read-only mode"""
+
+    file_format = "xlsx"
+
+    def __init__(self, raw_file):
+        super().__init__(raw_file)
+        self._workbook = None
+        self._size_bytes = 0
+        self._total_rows: Optional[int] = None
+        self._rows_read = 0
+
+    def _open(self):
+        if not XLSX_AVAILABLE:
+            raise ValueError("XLSX uploads require openpyxl")
+
+        self._size_bytes = self._raw.seek(0, io.SEEK_END)
+        self._raw.seek(0)
+        self._workbook = openpyxl.load_workbook(self._raw, read_only=True, data_only=True)
+        sheet = self._workbook.active
+        self._total_rows = sheet.max_row
+
+        def rows():
+            for values in sheet.iter_rows(values_only=True):
+                self._rows_read += 1
+                yield [_cell_text(value) for value in values]
+
+        return rows()
+
+    def count_rows(self, sample: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self._total_rows:
+            # From the sheet's <dimension> element, written by Excel and most exporters
+            return {"total_rows": max(0, self._total_rows - 1), "total_rows_method": "sheet_dimension", "total_rows_estimated": False}
+        return self._estimate_rows(self._size_bytes, sample)
+
+    def bytes_read(self) -> int:
+        # The zip container is read out of order, so estimate from rows read
+        if not self._total_rows:
+            return 0
+        return int(self._size_bytes * min(1.0, self._rows_read / self._total_rows))
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+
+
+def _sniff(raw_file, scan_max_bytes: int) -> RowSource:
+    magic = raw_file.read(4)
+    raw_file.seek(0)
+
+    if magic[:2] == b"\x1f\x8b":
+        return CsvRowSource(raw_file, "csv.gz")
+
+    if magic == b"PK\x03\x04":
+        with zipfile.ZipFile(raw_file) as archive:
+            is_workbook = "xl/workbook.xml" in archive.namelist()
+        raw_file.seek(0)
+        return XlsxRowSource(raw_file) if is_workbook else CsvRowSource(raw_file, "zip")
+
+    return CsvRowSource(raw_file, scan_max_bytes=scan_max_bytes)
+
+
+async def open_row_source(raw_file, scan_max_bytes: int = 0) -> RowSource:
+    """
+    Sniff the upload's format and return a source positioned after the header row.
+    Plain files up to `scan_max_bytes` get their rows counted by a newline scan.
+    """
+    source = await asyncio.to_thread(_sniff, raw_file, scan_max_bytes)
+    try:
+        return await source.open()
+    except BaseException:
+        source.close()
+        raise
@@ -0,0 +1,120 @@
+"""
+Session Store - Live per-conversation state with idle expiry and a capacity bound
+Sessions are kept least recently used first; ones idle past `idle_seconds` are dropped
+when the store is next touched, and the oldest are evicted once `max_sessions` is reached.
+Pinned sessions (an open WebSocket) are never evicted; their idle clock restarts on unpin.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List
+
+from config import INTERVIEW_MAX_SESSIONS, INTERVIEW_SESSION_IDLE_SECONDS
+
+
+class SessionStore:
+
+    def __init__(
+        self,
+        max_sessions: int,
+        idle_seconds: float,
+        on_evict: Callable[[str], None] = None,
+        label: str = "interview"
+    ):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.on_evict = on_evict
+        self.label = label
+        # session id -> [value, last_used]
+        self._sessions: "OrderedDict[str, List[Any]]" = OrderedDict()
+        # session id -> open connections holding it
+        self._pinned: Dict[str, int] = {}
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __setitem__(self, interview_id: str, conductor):
+        self._sessions[interview_id] = [conductor, time.monotonic()]
+        self._sessions.move_to_end(interview_id)
+        self._evict()
+
+    def get(self, interview_id: str, default=None):
+        entry = self._sessions.get(interview_id)
+        if entry is None:
+            return default
+        now = time.monotonic()
+        if now - entry[1] > self.idle_seconds and interview_id not in self._pinned:
+            self._drop(interview_id, "idle")
+            return default
+        entry[1] = now
+        self._sessions.move_to_end(interview_id)
+        return entry[0]
+
+    def __getitem__(self, interview_id: str):
+        conductor = self.get(interview_id)
+        if conductor is None:
+            raise KeyError(interview_id)
+        return conductor
+
+    def __contains__(self, interview_id: str) -> bool:
+        return self.get(interview_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def pin(self, interview_id: str):
+        self._pinned[interview_id] = self._pinned.get(interview_id, 0) + 1
+
+    def unpin(self, interview_id: str):
+        count = self._pinned.pop(interview_id, 0) - 1
+        if count > 0:
+            self._pinned[interview_id] = count
+        elif interview_id in self._sessions:
+            self._sessions[interview_id][1] = time.monotonic()
+            self._sessions.move_to_end(interview_id)
+
+    def pop(self, interview_id: str, default=None):
+        self._pinned.pop(interview_id, None)
+        entry = self._sessions.pop(interview_id, None)
+        return entry[0] if entry is not None else default
+
+    def values(self) -> List[Any]:
+        return [entry[0] for entry in self._sessions.values()]
+
+    def _drop(self, interview_id: str, reason: str):
+        self._sessions.pop(interview_id, None)
+        if reason == "idle":
+            self.evicted_idle += 1
+        else:
+            self.evicted_capacity += 1
+        print(f"🧹 Evicted {self.label} session {interview_id} ({reason})")
+        if self.on_evict is not None:
+            self.on_evict(interview_id)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = []
+        for interview_id, (_, last_used) in self._sessions.items():
+            if last_used >= cutoff:
+                break
+            if interview_id not in self._pinned:
+                expired.append(interview_id)
+        for interview_id in expired:
+            self._drop(interview_id, "idle")
+
+        excess = len(self._sessions) - self.max_sessions
+        if excess > 0:
+            oldest = [interview_id for interview_id in self._sessions if interview_id not in self._pinned][:excess]
+            for interview_id in oldest:
+                self._drop(interview_id, "capacity")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "pinned": len(self._pinned),
+            "max_sessions": self.max_sessions,
+            "idle_seconds": self.idle_seconds,
+            "evicted_idle": self.evicted_idle,
+            "evicted_capacity": self.evicted_capacity
+        }
+
+
+interview_sessions = SessionStore(max_sessions=INTERVIEW_MAX_SESSIONS, idle_seconds=INTERVIEW_SESSION_IDLE_SECONDS)
@@ -0,0 +1,86 @@
+"""
+Single Flight - Concurrent identical calls share one in-flight execution and its result
+Only real outcomes are shared: if the leading caller is cancelled or runs out of its own
+request deadline, waiting callers retry under theirs instead of inheriting that failure.
+"""
+import asyncio
+import hashlib
+import json
+import re
+from typing import Dict, Any, Awaitable, Callable
+
+from deadline import DeadlineExceeded, check_deadline, within_deadline
+
+# Result handed to followers when the leader gave up for reasons of its own
+_ABANDONED = object()
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(model: str, payload: Dict[str, Any]) -> str:
+    """Stable key for a provider request: model plus whitespace-normalized prompt and params"""
+    body = json.dumps({"model": model, **_normalize(payload)}, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, label: str, field: str):
+        stats = self.stats.setdefault(label, {"executed": 0, "coalesced": 0, "abandoned": 0})
+        stats[field] += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], label: str = "default"):
+        while (existing := self._in_flight.get(key)) is not None:
+            self._count(label, "coalesced")
+            # Wait only as long as this caller's own deadline allows; shield so a follower
+            # timing out or giving up doesn't cancel the shared call
+            step = f"single_flight:{label}"
+            check_deadline(step)
+            result = await within_deadline(asyncio.shield(existing), step)
+            if result is not _ABANDONED:
+                return result
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved when nobody else was waiting on it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        self._count(label, "executed")
+
+        try:
+            result = await fn()
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # The leader's own disconnect or budget; followers retry under theirs
+            self._count(label, "abandoned")
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "by_model": self.stats,
+            "total_coalesced": sum(s["coalesced"] for s in self.stats.values())
+        }
@@ -0,0 +1,137 @@
+"""
+Transcript Writer - Batched interview_transcripts inserts off the conversation path
+Turns are timestamped when they happen and buffered; a background task writes them in
+inserts of up to `max_rows` per flush interval (or sooner once enough rows are waiting).
+While the database is failing the buffer is bounded: a batch is given up after
+`max_retries` attempts, the oldest rows go once `max_buffer_rows` is reached, and
+everything given up is appended to a JSONL dead-letter file for replay.
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from database import db
+from deadline import run_db_write
+from config import (
+    TRANSCRIPT_FLUSH_SECONDS, TRANSCRIPT_FLUSH_ROWS, TRANSCRIPT_MAX_RETRIES,
+    TRANSCRIPT_MAX_BUFFER_ROWS, TRANSCRIPT_DEAD_LETTER_PATH
+)
+
+
+class TranscriptWriter:
+
+    def __init__(
+        self,
+        flush_seconds: float,
+        max_rows: int,
+        max_retries: int,
+        max_buffer_rows: int,
+        dead_letter_path: str
+    ):
+        self.flush_seconds = flush_seconds
+        self.max_rows = max_rows
+        self.max_retries = max_retries
+        self.max_buffer_rows = max_buffer_rows
+        self.dead_letter_path = dead_letter_path
+        self._pending: List[Dict[str, Any]] = []
+        # Failed attempts for the batch at the head of _pending (it's retried first)
+        self._head_attempts = 0
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def add(self, interview_id: str, speaker: str, message: str):
+        self._pending.append({
+            "interview_id": interview_id,
+            "speaker": speaker,
+            "message": message,
+            # Set here, not by the database, so batched rows keep their order
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        overflow = len(self._pending) - self.max_buffer_rows
+        if overflow > 0 and not self._lock.locked():
+            self._give_up(self._pending[:overflow], "buffer full")
+            del self._pending[:overflow]
+            self._head_attempts = 0
+        if len(self._pending) >= self.max_rows:
+            self._wake.set()
+
+    def _give_up(self, rows: List[Dict[str, Any]], reason: str):
+        self.dropped += len(rows)
+        print(f"⚠️ Dropping {len(rows)} transcript rows ({reason}); dead-lettered to {self.dead_letter_path}")
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as out:
+                for row in rows:
+                    out.write(json.dumps(row) + "\n")
+        except OSError as e:
+            print(f"❌ Transcript dead letter failed, {len(rows)} rows lost: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write what is buffered, one batch at a time; stops at the first failure until the next flush"""
+        async with self._lock:
+            while self._pending:
+                rows = self._pending[:self.max_rows]
+                try:
+                    await run_db_write(db.save_transcripts, rows)
+                except Exception as e:
+                    self.failures += 1
+                    self._head_attempts += 1
+                    print(f"⚠️ Transcript flush of {len(rows)} rows failed (attempt {self._head_attempts}): {e}")
+                    if self._head_attempts >= self.max_retries:
+                        del self._pending[:len(rows)]
+                        self._head_attempts = 0
+                        await asyncio.to_thread(self._give_up, rows, f"{self.max_retries} failed attempts")
+                    break
+                del self._pending[:len(rows)]
+                self._head_attempts = 0
+                self.written += len(rows)
+                self.batches += 1
+
+            overflow = len(self._pending) - self.max_buffer_rows
+            if overflow > 0:
+                rows = self._pending[:overflow]
+                del self._pending[:overflow]
+                self._head_attempts = 0
+                await asyncio.to_thread(self._give_up, rows, "buffer full")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pending_rows": len(self._pending),
+            "written_rows": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped_rows": self.dropped
+        }
+
+
+transcript_writer = TranscriptWriter(
+    flush_seconds=TRANSCRIPT_FLUSH_SECONDS,
+    max_rows=TRANSCRIPT_FLUSH_ROWS,
+    max_retries=TRANSCRIPT_MAX_RETRIES,
+    max_buffer_rows=TRANSCRIPT_MAX_BUFFER_ROWS,
+    dead_letter_path=TRANSCRIPT_DEAD_LETTER_PATH
+)
@@ -27,6 +27,7 @@ export default function UnifiedAIPage() {
     const messagesEndRef = useRef<null | HTMLDivElement>(null)
     const recognitionRef = useRef<any>(null)
     const [organizationId, setOrganizationId] = useState('')
+    const [conversationId, setConversationId] = useState<string | null>(null)
     const router = useRouter()
 
     const scrollToBottom = () => {
@@ -136,15 +137,17 @@ export default function UnifiedAIPage() {
                 body: JSON.stringify({
                     message: userMessage,
                     organization_id: organizationId,
-                    conversation_history: messages.slice(-5).map(m => ({
-                        role: m.role,
-                        content: m.content
-                    }))
+                    conversation_id: conversationId
                 })
             })
 
             const data = await response.json()
 
+            // The server keeps the history; later messages only need this id
+            if (data.conversation_id) {
+                setConversationId(data.conversation_id)
+            }
+
             if (data.success) {
                 const aiMessage = {
                     role: 'ai' as const,
@@ -29,6 +29,7 @@ export default function InterviewChatPage() {
 
 
     const messagesEndRef = useRef<null | HTMLDivElement>(null)
+    const ANALYSIS_POLL_MAX_ATTEMPTS = 40
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" })
@@ -160,10 +161,32 @@ export default function InterviewChatPage() {
                 })
             })
 
-            const data = await response.json()
+            let data = await response.json()
+
+            // Analysis runs in the background; poll with backoff until it has been stored,
+            // fails, or we run out of attempts
+            let attempt = 0
+            while (data.success && (data.status === 'queued' || data.status === 'running')) {
+                if (attempt >= ANALYSIS_POLL_MAX_ATTEMPTS) break
+                const delay = Math.min(2000 * Math.pow(1.5, attempt), 15000)
+                await new Promise(resolve => setTimeout(resolve, delay))
+                attempt += 1
+                const statusResponse = await fetch(`${API_URL}/api/interview/${interviewId}/analysis`, {
+                    headers: {
+                        'Authorization': `Bearer ${session?.access_token || ''}`
+                    }
+                })
+                data = await statusResponse.json()
+            }
 
-            if (data.success) {
+            if (data.success && data.status === 'completed') {
                 router.push(`/hr/interview/${interviewId}/results`)
+            } else if (data.success && data.status === 'failed') {
+                alert(`Analysis failed${data.error ? `: ${data.error}` : ''}. Please try again.`)
+            } else if (data.success) {
+                alert('Analysis is taking longer than expected. Check the results page again in a few minutes.')
+            } else {
+                alert('Error analyzing interview. Please try again.')
             }
         } catch (error) {
             console.error('Error analyzing interview:', error)
@@ -1,5 +1,5 @@
 'use client'
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useRouter } from 'next/navigation'
 import { API_URL, supabase } from '@/lib/supabase'  // ✅ ADD supabase
 import type { Session } from '@supabase/supabase-js'  
@@ -13,8 +13,19 @@ export default function MigrationPage() {
     const [showSuccess, setShowSuccess] = useState(false)
     const [session, setSession] = useState<Session | null>(null)    // 
     const [organizationId, setOrganizationId] = useState('')  // 
+    const [job, setJob] = useState<any>(null)
+    const pollTimer = useRef<ReturnType<typeof setTimeout> | null>(null)
     const router = useRouter()
 
+    const IMPORT_POLL_MAX_ATTEMPTS = 120
+    const FINISHED_JOB_STATUSES = ['completed', 'failed', 'cancelled']
+
+    useEffect(() => {
+        return () => {
+            if (pollTimer.current) clearTimeout(pollTimer.current)
+        }
+    }, [])
+
 
     useEffect(() => {
         const initData = async () => {
@@ -86,9 +97,14 @@ export default function MigrationPage() {
         if (!file || !session || !organizationId) return  // ✅ ADD CHECKS
 
         setImporting(true)
+        setJob(null)
         const formData = new FormData()
         formData.append('file', file)
         formData.append('organization_id', organizationId)  // 
+        // Import with the mapping the preview showed instead of re-asking the AI
+        if (result?.header_signature) {
+            formData.append('header_signature', result.header_signature)
+        }
 
         try {
             const response = await fetch(`${API_URL}/api/migration/import-expenses`, {
@@ -101,18 +117,71 @@ export default function MigrationPage() {
             const data = await response.json()
 
             if (data.success) {
-                setShowSuccess(true)
-                setTimeout(() => {
-                    router.push('/finance/list')
-                }, 2000)
+                setJob(data)
+                pollJob(data.job_id)
+            } else {
+                alert(data.detail || 'Error importing file')
+                setImporting(false)
             }
         } catch (error) {
             alert('Error importing file')
-        } finally {
             setImporting(false)
         }
     }
 
+    // The import runs as a background job; follow it with backoff until it finishes
+    const pollJob = (jobId: string, attempt = 0) => {
+        const delay = Math.min(1000 * Math.pow(1.5, attempt), 10000)
+        pollTimer.current = setTimeout(async () => {
+            try {
+                const response = await fetch(`${API_URL}/api/migration/import-jobs/${jobId}`)
+                const data = await response.json()
+                if (data.success) {
+                    setJob(data)
+                    if (FINISHED_JOB_STATUSES.includes(data.status)) {
+                        setImporting(false)
+                        const clean = data.status === 'completed' && !data.failed_rows && !(data.row_errors || []).length
+                        if (clean) {
+                            setShowSuccess(true)
+                            setTimeout(() => {
+                                router.push('/finance/list')
+                            }, 2000)
+                        }
+                        return
+                    }
+                }
+            } catch (error) {
+                console.error('Error polling import job:', error)
+            }
+
+            if (attempt + 1 >= IMPORT_POLL_MAX_ATTEMPTS) {
+                setImporting(false)
+                setJob((current: any) => ({ ...current, pollingStopped: true }))
+                return
+            }
+            pollJob(jobId, attempt + 1)
+        }, delay)
+    }
+
+    const resumeJob = async () => {
+        if (!job) return
+        setImporting(true)
+        try {
+            const response = await fetch(`${API_URL}/api/migration/import-jobs/${job.job_id}/resume`, {
+                method: 'POST'
+            })
+            const data = await response.json()
+            if (data.success) {
+                setJob(data)
+                pollJob(data.job_id)
+                return
+            }
+        } catch (error) {
+            alert('Error resuming import')
+        }
+        setImporting(false)
+    }
+
     return (
         <div style={{
             minHeight: '100vh',
@@ -325,7 +394,7 @@ export default function MigrationPage() {
                                 {importing ? (
                                     <>
                                         <div className="spinner"></div>
-                                        Importing...
+                                        Importing{job ? ` ${Math.round((job.progress || 0) * 100)}%` : '...'}
                                     </>
                                 ) : (
                                     <>✨ Import Now</>
@@ -482,7 +551,7 @@ export default function MigrationPage() {
                                 </div>
 
                                 {/* Warnings */}
-                                {result.mapping?.warnings?.length > 0 && (
+                                {(result.mapping?.warnings?.length > 0 || result.format_warnings?.length > 0) && (
                                     <div style={{
                                         marginTop: '24px',
                                         padding: '20px',
@@ -504,9 +573,12 @@ export default function MigrationPage() {
                                             paddingLeft: '20px',
                                             color: '#92400e'
                                         }}>
-                                            {result.mapping.warnings.map((w: string, i: number) => (
+                                            {(result.mapping?.warnings || []).map((w: string, i: number) => (
                                                 <li key={i} style={{ marginBottom: '4px' }}>{w}</li>
                                             ))}
+                                            {(result.format_warnings || []).map((w: any, i: number) => (
+                                                <li key={`format-${i}`} style={{ marginBottom: '4px' }}>{w.message}</li>
+                                            ))}
                                         </ul>
                                     </div>
                                 )}
@@ -527,6 +599,89 @@ export default function MigrationPage() {
                     </div>
                 )}
 
+                {/* Import Job Report */}
+                {job && (
+                    <div style={{
+                        background: 'white',
+                        borderRadius: '20px',
+                        padding: '32px',
+                        marginTop: '24px',
+                        boxShadow: '0 20px 60px rgba(0,0,0,0.3)',
+                        animation: 'slideIn 0.4s ease'
+                    }}>
+                        <h3 style={{ fontSize: '20px', fontWeight: 'bold', color: '#1e293b', margin: '0 0 16px' }}>
+                            {job.status === 'completed' ? '✅ Import finished'
+                                : job.status === 'failed' ? '❌ Import failed'
+                                : job.status === 'cancelled' ? '⏹️ Import cancelled'
+                                : `⏳ Importing ${job.filename || ''}`}
+                        </h3>
+                        <div style={{ height: '8px', background: '#e5e7eb', borderRadius: '4px', overflow: 'hidden', marginBottom: '16px' }}>
+                            <div style={{
+                                width: `${Math.round((job.progress || 0) * 100)}%`,
+                                height: '100%',
+                                background: job.status === 'failed' ? '#dc2626' : '#10b981',
+                                transition: 'width 0.4s ease'
+                            }} />
+                        </div>
+                        <p style={{ color: '#475569', margin: '0 0 8px' }}>
+                            {job.imported_rows || 0} imported · {job.failed_rows || 0} failed · {job.duplicate_rows || 0} duplicates skipped
+                        </p>
+                        {job.error && (
+                            <p style={{ color: '#dc2626', margin: '0 0 8px' }}>Error: {job.error}</p>
+                        )}
+                        {job.pollingStopped && (
+                            <p style={{ color: '#92400e', margin: '0 0 8px' }}>
+                                Still running in the background - check back later for the final report.
+                            </p>
+                        )}
+                        {(job.row_errors || []).length > 0 && (
+                            <div style={{ background: '#fef2f2', borderRadius: '8px', padding: '12px', marginTop: '12px' }}>
+                                <strong style={{ color: '#991b1b' }}>Rows that need attention</strong>
+                                {job.row_errors.map((e: any, i: number) => (
+                                    <div key={i} style={{ fontSize: '13px', color: '#7f1d1d', marginTop: '4px' }}>
+                                        Row {e.row ?? '?'} ({e.stage}): {e.error}
+                                    </div>
+                                ))}
+                            </div>
+                        )}
+                        {job.status === 'failed' && (
+                            <button
+                                onClick={resumeJob}
+                                disabled={importing}
+                                style={{
+                                    marginTop: '16px',
+                                    padding: '12px 20px',
+                                    background: '#667eea',
+                                    color: 'white',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    fontWeight: 600,
+                                    cursor: importing ? 'not-allowed' : 'pointer'
+                                }}
+                            >
+                                🔁 Resume import
+                            </button>
+                        )}
+                        {job.status === 'completed' && !showSuccess && (
+                            <button
+                                onClick={() => router.push('/finance/list')}
+                                style={{
+                                    marginTop: '16px',
+                                    padding: '12px 20px',
+                                    background: '#10b981',
+                                    color: 'white',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    fontWeight: 600,
+                                    cursor: 'pointer'
+                                }}
+                            >
+                                View expenses →
+                            </button>
+                        )}
+                    </div>
+                )}
+
                 {/* How It Works */}
                 <div style={{
                     background: 'rgba(255,255,255,0.15)',